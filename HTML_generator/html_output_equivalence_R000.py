@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+HTML Output Sanitizer Equivalence Check
+
+Runs the streaming HtmlOutputSanitizer and the BeautifulSoup fallback
+(process_html_output_bs4) from notebook_to_html_R010.py over the same HTML
+and reports any output that differs, plus the time each path took.
+
+Inputs:
+- Built-in cases covering DataFrames, Colab containers, scripts, styles,
+  nested tables, entities and attribute quoting
+- Every text/html output of any .ipynb files given on the command line
+
+Cases the streaming sanitizer rejects as malformed are counted separately;
+process_html_output sends those to BeautifulSoup anyway.
+
+Usage:
+    python html_output_equivalence_R000.py
+    python html_output_equivalence_R000.py notebook1.ipynb notebook2.ipynb
+
+Requirements:
+    pip install beautifulsoup4
+"""
+
+import sys
+import json
+import time
+import argparse
+
+from notebook_to_html_R010 import (
+    HtmlOutputSanitizer,
+    MalformedHtmlError,
+    process_html_output_bs4,
+    has_bs4,
+)
+
+
+BUILTIN_CASES = {
+    'plain dataframe': """<div>
+<style scoped>
+    .dataframe tbody tr th:only-of-type { vertical-align: middle; }
+    .dataframe thead th { text-align: right; }
+</style>
+<table border="1" class="dataframe">
+  <thead>
+    <tr style="text-align: right;"><th></th><th>a &amp; b</th><th>c</th></tr>
+  </thead>
+  <tbody>
+    <tr><th>0</th><td>1&lt;2</td><td>NaN</td></tr>
+  </tbody>
+</table>
+<p>1 rows × 2 columns</p>
+</div>""",
+    'colab dataframe': """<div id="df-1">
+  <div class="colab-df-container">
+    <div><table class="dataframe"><tr><td>x</td></tr></table></div>
+    <div class="colab-df-buttons">
+      <button class="colab-df-convert" onclick="convertToInteractive('df-1')"><svg><path d="M0"/></svg></button>
+      <style>.colab-df-convert { background-color: #E8F0FE; }</style>
+      <script>const buttonEl = document.querySelector('#df-1 button');</script>
+    </div>
+  </div>
+</div>""",
+    'no tables': '<div class="output"><b>Bold</b> text<br>line &nbsp; two<script>alert(1)</script><style>p{}</style></div>',
+    'nested tables': '<table><tr><td><table class="inner"><tr><td>1</td></tr></table></td></tr></table><table><tr><td>2</td></tr></table>',
+    'only removed tables': '<div class="colab-df-buttons"><table><tr><td>1</td></tr></table></div><p>after</p>',
+    'attributes': """<div class="  a   b " id=x data-q='say "hi"' data-r="it's" data-s='both "a" and &apos;b&apos;' hidden>v</div>""",
+    'void and self-closing': '<p>a<br/>b<img src="x.png">c<hr><div/></p>',
+    'entities': '<p>&copy; &#169; &#xA9; &#150; &unknownentity; &amp;amp; 5 &lt; 6 &gt; 4</p>',
+    'comments and doctype': '<!DOCTYPE html><!-- note --><p>x</p>',
+    'malformed': '<p>one<p>two</div>',
+}
+
+
+def notebook_cases(paths: list) -> dict:
+    """Every text/html output of the given notebooks"""
+    cases = {}
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            notebook = json.load(f)
+        for cell_index, cell in enumerate(notebook.get('cells', [])):
+            for output_index, output in enumerate(cell.get('outputs', [])):
+                html = output.get('data', {}).get('text/html')
+                if html is None:
+                    continue
+                if isinstance(html, list):
+                    html = ''.join(html)
+                cases[f"{path} cell {cell_index} output {output_index}"] = html
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the streaming HTML sanitizer against BeautifulSoup')
+    parser.add_argument('notebooks', nargs='*', help='Notebooks whose text/html outputs are checked too')
+    args = parser.parse_args()
+
+    if not has_bs4():
+        print("ERROR: pip install beautifulsoup4")
+        sys.exit(1)
+
+    cases = dict(BUILTIN_CASES)
+    cases.update(notebook_cases(args.notebooks))
+
+    matched, malformed, mismatched = 0, 0, []
+    fast_time, bs4_time = 0.0, 0.0
+
+    for name, html in cases.items():
+        start = time.perf_counter()
+        expected = process_html_output_bs4(html)
+        bs4_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        try:
+            actual = HtmlOutputSanitizer().sanitize(html)
+        except MalformedHtmlError:
+            malformed += 1
+            continue
+        finally:
+            fast_time += time.perf_counter() - start
+
+        if actual == expected:
+            matched += 1
+        else:
+            mismatched.append((name, expected, actual))
+
+    for name, expected, actual in mismatched:
+        print(f"✗ {name}")
+        print(f"  bs4:       {expected[:300]!r}")
+        print(f"  streaming: {actual[:300]!r}")
+
+    print("-" * 60)
+    print(f"Cases: {len(cases)} | identical: {matched} | mismatched: {len(mismatched)} | "
+          f"malformed (bs4 fallback): {malformed}")
+    print(f"BeautifulSoup: {bs4_time * 1000:.1f} ms | streaming: {fast_time * 1000:.1f} ms")
+    if fast_time:
+        print(f"Speedup: {bs4_time / fast_time:.1f}x")
+
+    sys.exit(1 if mismatched else 0)
+
+
+if __name__ == '__main__':
+    main()
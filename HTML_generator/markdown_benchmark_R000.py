@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Markdown Engine Benchmark
+
+Compares the single-pass markdown tokenizer in notebook_to_html_R010.py
+against the previous regex-chain converter (copied below as
+legacy_convert_markdown_to_html) on the same markdown text.
+
+Corpus:
+- Markdown cells of any .ipynb files given on the command line
+- Otherwise a synthetic, markdown-heavy corpus (headings, lists, emphasis,
+  inline code, links, images)
+
+Usage:
+    python markdown_benchmark_R000.py
+    python markdown_benchmark_R000.py notebook1.ipynb notebook2.ipynb
+    python markdown_benchmark_R000.py --repeat 20
+"""
+
+import re
+import json
+import time
+import argparse
+
+from notebook_to_html_R010 import convert_markdown_to_html
+
+
+# =============================================================================
+# LEGACY REGEX-CHAIN CONVERTER (notebook_to_html_R010 before the tokenizer)
+# =============================================================================
+
+def legacy_convert_markdown_to_html(md_text: str) -> str:
+    """Convert markdown to HTML (basic conversion)"""
+    html = md_text
+
+    # Headers
+    html = re.sub(r'^######\s+(.+)$', r'<h6>\1</h6>', html, flags=re.MULTILINE)
+    html = re.sub(r'^#####\s+(.+)$', r'<h5>\1</h5>', html, flags=re.MULTILINE)
+    html = re.sub(r'^####\s+(.+)$', r'<h4>\1</h4>', html, flags=re.MULTILINE)
+    html = re.sub(r'^###\s+(.+)$', r'<h3>\1</h3>', html, flags=re.MULTILINE)
+    html = re.sub(r'^##\s+(.+)$', r'<h2>\1</h2>', html, flags=re.MULTILINE)
+    html = re.sub(r'^#\s+(.+)$', r'<h1>\1</h1>', html, flags=re.MULTILINE)
+
+    # Bold and italic
+    html = re.sub(r'\*\*\*(.+?)\*\*\*', r'<strong><em>\1</em></strong>', html)
+    html = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', html)
+    html = re.sub(r'\*(.+?)\*', r'<em>\1</em>', html)
+
+    # Inline code
+    html = re.sub(r'`([^`]+)`', r'<code>\1</code>', html)
+
+    # Links
+    html = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', r'<a href="\2">\1</a>', html)
+
+    # Images (markdown style)
+    html = re.sub(r'!\[([^\]]*)\]\(([^)]+)\)', r'<img src="\2" alt="\1">', html)
+
+    # Horizontal rules
+    html = re.sub(r'^---+$', r'<hr>', html, flags=re.MULTILINE)
+    html = re.sub(r'^\*\*\*+$', r'<hr>', html, flags=re.MULTILINE)
+
+    # Unordered lists (simple)
+    lines = html.split('\n')
+    in_list = False
+    result = []
+    for line in lines:
+        if re.match(r'^\s*[\*\-]\s+', line):
+            if not in_list:
+                result.append('<ul>')
+                in_list = True
+            content = re.sub(r'^\s*[\*\-]\s+', '', line)
+            result.append(f'<li>{content}</li>')
+        else:
+            if in_list:
+                result.append('</ul>')
+                in_list = False
+            result.append(line)
+    if in_list:
+        result.append('</ul>')
+    html = '\n'.join(result)
+
+    # Ordered lists (simple)
+    lines = html.split('\n')
+    in_list = False
+    result = []
+    for line in lines:
+        if re.match(r'^\s*\d+\.\s+', line):
+            if not in_list:
+                result.append('<ol>')
+                in_list = True
+            content = re.sub(r'^\s*\d+\.\s+', '', line)
+            result.append(f'<li>{content}</li>')
+        else:
+            if in_list:
+                result.append('</ol>')
+                in_list = False
+            result.append(line)
+    if in_list:
+        result.append('</ol>')
+    html = '\n'.join(result)
+
+    # Paragraphs (wrap loose text)
+    parts = re.split(r'\n\n+', html)
+    wrapped = []
+    for part in parts:
+        part = part.strip()
+        if not part:
+            continue
+        if re.match(r'^<(h[1-6]|ul|ol|li|blockquote|hr|table|div|pre|img)', part):
+            wrapped.append(part)
+        else:
+            wrapped.append(f'<p>{part}</p>')
+
+    return '\n'.join(wrapped)
+
+
+# =============================================================================
+# CORPUS
+# =============================================================================
+
+def synthetic_corpus(cells: int = 400) -> list:
+    """Markdown cells resembling course notes: headings, bullets, emphasis, code"""
+    corpus = []
+    for i in range(cells):
+        corpus.append(f"""## {i}. Section title with *emphasis*
+
+Intro paragraph for section {i} explaining **key ideas**, `df.groupby('col')`
+and a [reference link](https://example.com/docs/{i}) across a couple of lines
+so paragraphs have realistic length. Values like `a * b` and ***notes*** appear.
+
+* First point about **feature scaling** and `StandardScaler()`
+* Second point - mean & standard deviation
+* Third point with a [link](https://example.com/{i})
+
+1. Step one
+2. Step two with *italic* text
+3. Step three
+
+![](https://example.com/images/plot_{i}.png)
+
+---
+""")
+    return corpus
+
+
+def notebook_corpus(paths: list) -> list:
+    """Markdown cell sources from the given notebooks"""
+    corpus = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            notebook = json.load(f)
+        for cell in notebook.get('cells', []):
+            if cell.get('cell_type') == 'markdown':
+                source = cell.get('source', [])
+                corpus.append(''.join(source) if isinstance(source, list) else source)
+    return corpus
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+def time_converter(convert, corpus: list, repeat: int) -> float:
+    """Best-of-repeat seconds to convert the whole corpus once"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in corpus:
+            convert(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the markdown engine against the legacy regex chain')
+    parser.add_argument('notebooks', nargs='*', help='Notebooks whose markdown cells form the corpus')
+    parser.add_argument('--repeat', type=int, default=10, help='Timing repetitions, best is kept (default: 10)')
+    parser.add_argument('--cells', type=int, default=400, help='Synthetic cells when no notebooks are given (default: 400)')
+    args = parser.parse_args()
+
+    corpus = notebook_corpus(args.notebooks) if args.notebooks else synthetic_corpus(args.cells)
+    total_bytes = sum(len(text.encode('utf-8')) for text in corpus)
+    if not total_bytes:
+        print("No markdown found in the corpus")
+        return
+
+    print(f"Corpus: {len(corpus)} markdown cells, {total_bytes / 1024:.1f} KB")
+    print("-" * 60)
+
+    results = {
+        'legacy regex chain': time_converter(legacy_convert_markdown_to_html, corpus, args.repeat),
+        'single-pass tokenizer': time_converter(convert_markdown_to_html, corpus, args.repeat),
+    }
+    for name, seconds in results.items():
+        throughput = total_bytes / seconds / (1024 * 1024)
+        print(f"{name:<24} {seconds * 1000:9.2f} ms   {throughput:8.2f} MB/s")
+
+    print("-" * 60)
+    speedup = results['legacy regex chain'] / results['single-pass tokenizer']
+    print(f"Speedup: {speedup:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
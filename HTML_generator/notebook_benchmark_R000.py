@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Notebook to HTML Benchmark Suite
+
+Generates synthetic notebooks and times a notebook_to_html revision on them:
+- convert_notebook end to end
+- convert_markdown_to_html, highlight_code and process_html_output on their own
+
+Each stage reports best-of-repeat wall time, throughput and peak traced
+memory (a separate tracemalloc run so tracing doesn't skew the timings).
+Results are written as JSON; pass an earlier results file with --compare to
+see the speedup of one revision over another.
+
+Synthetic notebook:
+- Code cells (pandas/sklearn-style source)
+- Markdown cells (headings, lists, emphasis, links)
+- DataFrame cells (execute_result text/html tables with --rows rows)
+- Plot cells (image/png outputs of --image-size pixels)
+
+Usage:
+    python notebook_benchmark_R000.py
+    python notebook_benchmark_R000.py --code 200 --markdown 100 --dataframes 40 --images 20
+    python notebook_benchmark_R000.py --module Temp/notebook_to_html_R008.py -o r008.json
+    python notebook_benchmark_R000.py -o r010.json --compare r008.json
+"""
+
+import gc
+import sys
+import base64
+import json
+import time
+import zlib
+import random
+import struct
+import inspect
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import importlib.util
+from io import StringIO
+from pathlib import Path
+from contextlib import redirect_stdout
+
+
+# =============================================================================
+# SYNTHETIC NOTEBOOK
+# =============================================================================
+
+def make_png(width: int, height: int, seed: int = 0) -> bytes:
+    """PNG resembling a plot: white background, gridlines and a noisy curve"""
+    rng = random.Random(seed)
+    curve = [int(height * (0.5 + 0.35 * ((x * 7919 + seed) % 97 / 97 - 0.5) + 0.1 * rng.random()))
+             for x in range(width)]
+    rows = []
+    for y in range(height):
+        row = bytearray(b'\xff' * (width * 3))
+        if y % 50 == 0:
+            row[:] = b'\xdd' * (width * 3)
+        for x in range(0, width, 80):
+            row[x * 3:x * 3 + 3] = b'\xdd\xdd\xdd'
+        for x, cy in enumerate(curve):
+            if abs(cy - y) <= 1:
+                row[x * 3:x * 3 + 3] = bytes((31, 119, 180))
+        rows.append(b'\x00' + bytes(row))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(b''.join(rows), 6))
+            + chunk(b'IEND', b''))
+
+
+def make_code_source(i: int) -> str:
+    return f"""import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+# Step {i}: scale the numeric columns
+df_{i} = pd.read_csv("data_{i}.csv")
+numeric = df_{i}.select_dtypes(include="number").columns
+scaler = StandardScaler()
+df_{i}[numeric] = scaler.fit_transform(df_{i}[numeric])
+for column in numeric:
+    print(f"{{column}}: mean={{df_{i}[column].mean():.3f}}, std={{df_{i}[column].std():.3f}}")
+df_{i}.describe()
+"""
+
+
+def make_markdown_source(i: int) -> str:
+    return f"""## {i}. Section with *emphasis*
+
+Explanation of step {i} covering **feature scaling**, `df.groupby('col')` and a
+[reference](https://example.com/docs/{i}) so paragraphs have realistic length.
+
+* First point about `StandardScaler()`
+* Second point - mean & standard deviation
+* Third point with ***strong emphasis***
+
+1. Load the data
+2. Scale the columns
+3. Check the result
+"""
+
+
+def make_dataframe_html(i: int, rows: int) -> str:
+    header = ''.join(f'<th>col_{c}</th>' for c in range(6))
+    body = ''.join(
+        f'<tr><th>{r}</th>' + ''.join(f'<td>{(r * 31 + c * 7 + i) % 1000 / 10:.1f}</td>' for c in range(6)) + '</tr>\n'
+        for r in range(rows)
+    )
+    return f"""<div>
+<style scoped>
+    .dataframe tbody tr th:only-of-type {{ vertical-align: middle; }}
+    .dataframe thead th {{ text-align: right; }}
+</style>
+<table border="1" class="dataframe">
+  <thead><tr style="text-align: right;"><th></th>{header}</tr></thead>
+  <tbody>
+{body}  </tbody>
+</table>
+<p>{rows} rows × 6 columns</p>
+</div>"""
+
+
+def make_notebook(code: int, markdown: int, dataframes: int, images: int,
+                  rows: int = 50, image_size: tuple = (800, 600)) -> dict:
+    """Synthetic notebook with the given number of each cell kind, interleaved"""
+    kinds = ['code'] * code + ['markdown'] * markdown + ['dataframe'] * dataframes + ['image'] * images
+    random.Random(0).shuffle(kinds)
+    png_b64 = {}
+    cells = [{'cell_type': 'markdown', 'metadata': {}, 'source': ['# Synthetic Benchmark Notebook\n']}]
+    for i, kind in enumerate(kinds):
+        if kind == 'markdown':
+            cells.append({'cell_type': 'markdown', 'metadata': {}, 'source': make_markdown_source(i)})
+            continue
+        outputs = []
+        if kind == 'code':
+            outputs.append({'output_type': 'stream', 'name': 'stdout', 'text': [f"col_{c}: mean=0.000, std=1.000\n" for c in range(6)]})
+        elif kind == 'dataframe':
+            outputs.append({'output_type': 'execute_result', 'execution_count': i, 'metadata': {},
+                            'data': {'text/html': make_dataframe_html(i, rows), 'text/plain': f'<DataFrame {i}>'}})
+        else:
+            # A handful of distinct plots, like a notebook re-plotting similar figures
+            seed = i % 8
+            if seed not in png_b64:
+                png_b64[seed] = base64.b64encode(make_png(*image_size, seed=seed)).decode('ascii')
+            outputs.append({'output_type': 'display_data', 'metadata': {},
+                            'data': {'image/png': png_b64[seed], 'text/plain': '<Figure>'}})
+        cells.append({'cell_type': 'code', 'execution_count': i, 'metadata': {}, 'outputs': outputs,
+                      'source': make_code_source(i)})
+    return {
+        'cells': cells,
+        'metadata': {'kernelspec': {'name': 'python3', 'language': 'python', 'display_name': 'Python 3'}},
+        'nbformat': 4,
+        'nbformat_minor': 5,
+    }
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+def load_module(path: str):
+    """Import a notebook_to_html revision from a file path"""
+    path = Path(path).resolve()
+    sys.path.insert(0, str(path.parent))
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def reset_caches(module) -> None:
+    """Clear in-process render caches so every repetition does the full work"""
+    highlight_cache = getattr(module, '_highlight_cache', None)
+    if highlight_cache is not None:
+        highlight_cache.clear()
+
+
+def measure(run, module, repeat: int) -> dict:
+    """Best-of-repeat seconds for run(), plus peak traced memory of one more run"""
+    best = float('inf')
+    for _ in range(repeat):
+        reset_caches(module)
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+
+    reset_caches(module)
+    gc.collect()
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': best, 'peak_bytes': peak}
+
+
+def run_benchmarks(module, notebook: dict, work_dir: Path, repeat: int) -> dict:
+    """Time each stage on the synthetic notebook; returns {stage: result}"""
+    notebook_path = work_dir / 'synthetic.ipynb'
+    notebook_path.write_text(json.dumps(notebook), encoding='utf-8')
+    output_path = work_dir / 'synthetic.html'
+
+    def source(cell):
+        text = cell.get('source', '')
+        return ''.join(text) if isinstance(text, list) else text
+
+    markdown = [source(c) for c in notebook['cells'] if c['cell_type'] == 'markdown']
+    code = [source(c) for c in notebook['cells'] if c['cell_type'] == 'code']
+    html_outputs = [o['data']['text/html'] for c in notebook['cells'] for o in c.get('outputs', [])
+                    if 'text/html' in o.get('data', {})]
+
+    # Revisions with a build cache would skip the rebuild without force
+    convert_kwargs = {}
+    if 'force' in inspect.signature(module.convert_notebook).parameters:
+        convert_kwargs['force'] = True
+
+    stages = {
+        'convert_notebook': (
+            lambda: module.convert_notebook(str(notebook_path), str(output_path), **convert_kwargs),
+            notebook_path.stat().st_size, len(notebook['cells']),
+        ),
+        'convert_markdown_to_html': (
+            lambda: [module.convert_markdown_to_html(text) for text in markdown],
+            sum(len(text.encode('utf-8')) for text in markdown), len(markdown),
+        ),
+        'highlight_code': (
+            lambda: [module.highlight_code(text, 'python') for text in code],
+            sum(len(text.encode('utf-8')) for text in code), len(code),
+        ),
+        'process_html_output': (
+            lambda: [module.process_html_output(html) for html in html_outputs],
+            sum(len(html.encode('utf-8')) for html in html_outputs), len(html_outputs),
+        ),
+    }
+
+    results = {}
+    for name, (run, size, items) in stages.items():
+        if not items:
+            continue
+        print(f"  {name}...", end='', flush=True)
+        if name == 'convert_notebook':
+            # Silence the per-notebook "HTML generated" lines
+            quiet_run = run
+            def run(quiet_run=quiet_run):
+                with redirect_stdout(StringIO()):
+                    quiet_run()
+        result = measure(run, module, repeat)
+        result.update({
+            'input_bytes': size,
+            'items': items,
+            'mb_per_second': size / result['seconds'] / (1024 * 1024) if result['seconds'] else None,
+            'items_per_second': items / result['seconds'] if result['seconds'] else None,
+        })
+        results[name] = result
+        print(f" {result['seconds'] * 1000:.1f} ms")
+    return results
+
+
+def print_results(results: dict, baseline: dict = None) -> None:
+    print("-" * 84)
+    print(f"{'stage':<26}{'time':>11}{'MB/s':>9}{'items/s':>11}{'peak mem':>11}"
+          + (f"{'speedup':>10}" if baseline else ''))
+    for name, r in results.items():
+        line = (f"{name:<26}{r['seconds'] * 1000:9.1f} ms{r['mb_per_second']:9.2f}"
+                f"{r['items_per_second']:11.0f}{r['peak_bytes'] / (1024 * 1024):8.1f} MB")
+        if baseline and name in baseline:
+            line += f"{baseline[name]['seconds'] / r['seconds']:9.2f}x"
+        print(line)
+    print("-" * 84)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark notebook_to_html on synthetic notebooks')
+    parser.add_argument('--module', default=str(Path(__file__).parent / 'notebook_to_html_R010.py'),
+                        help='notebook_to_html revision to benchmark (default: notebook_to_html_R010.py)')
+    parser.add_argument('--code', type=int, default=100, help='Code cells (default: 100)')
+    parser.add_argument('--markdown', type=int, default=60, help='Markdown cells (default: 60)')
+    parser.add_argument('--dataframes', type=int, default=20, help='DataFrame HTML cells (default: 20)')
+    parser.add_argument('--images', type=int, default=10, help='PNG plot cells (default: 10)')
+    parser.add_argument('--rows', type=int, default=50, help='Rows per DataFrame (default: 50)')
+    parser.add_argument('--image-size', default='800x600', help='Plot size WIDTHxHEIGHT (default: 800x600)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repetitions, best is kept (default: 5)')
+    parser.add_argument('-o', '--output', help='Write results to this JSON file')
+    parser.add_argument('--compare', metavar='JSON', help='Earlier results file to compute speedups against')
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.image_size.lower().split('x'))
+    config = {
+        'code': args.code, 'markdown': args.markdown, 'dataframes': args.dataframes,
+        'images': args.images, 'rows': args.rows, 'image_size': [width, height], 'repeat': args.repeat,
+    }
+
+    module = load_module(args.module)
+    notebook = make_notebook(args.code, args.markdown, args.dataframes, args.images, args.rows, (width, height))
+    print(f"Module: {args.module}")
+    print(f"Notebook: {len(notebook['cells'])} cells "
+          f"({args.code} code, {args.markdown} markdown, {args.dataframes} DataFrame, {args.images} plot)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = run_benchmarks(module, notebook, Path(tmp), args.repeat)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        if previous.get('config') != config:
+            print(f"Note: {args.compare} was run with different settings")
+        baseline = previous['results']
+    print_results(results, baseline)
+
+    if args.output:
+        report = {
+            'module': Path(args.module).name,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'config': config,
+            'results': results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Results saved: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -9,10 +9,23 @@ Features:
 - Table styling with zebra striping, bold headers/first column
 - Repeating table headers on each printed page
 - Aspect-ratio-based image sizing
-- External images embedded as base64
+- External images embedded as base64 (prefetched concurrently, cached on disk)
 - A4/A3 page size support
 - Optional code cell hiding
-- Optional PDF generation via weasyprint
+- Optional PDF generation via weasyprint (batch PDFs render in their own process pool)
+- Parallel batch conversion across a process pool (--jobs)
+- Optional dependencies loaded lazily; --timing shows import vs render cost
+- Incremental builds: unchanged notebooks are skipped (--force to rebuild)
+- Streaming mode for huge notebooks: cells are parsed and written one at a time
+- Optional external assets: images written once to a shared, hash-named assets/ folder
+- Watch mode: re-renders on save, reusing cached HTML for unchanged cells
+- Optional plot optimization: downscale to print DPI and re-encode as PNG/JPEG/WebP (needs Pillow)
+- Recursive tree conversion: scanning and converting overlap, output mirrors the folder tree
+- Book mode: a folder of notebooks as one HTML with a chapter index, CSS once, images stored once
+- Output budgets: huge DataFrames and logs keep their head and tail with an elision marker
+- --profile: wall time, call counts and peak RSS per stage and cell type, optional JSONL trace
+- In-memory API: render_notebook_html() turns a notebook dict/bytes into an HTML string, no file I/O by default
+- --serve: local preview server, warm imports, gzip pages in an LRU cache keyed by path/mtime/options
 
 Usage:
     python notebook_to_html.py input.ipynb [options]
@@ -20,43 +33,223 @@ Usage:
     Or import and use programmatically:
     from notebook_to_html import convert_notebook
     convert_notebook("input.ipynb", "output.html")
+    
+    Or render in memory (no files written), e.g. to hand straight to html_to_word:
+    from notebook_to_html import render_notebook_html
+    html = render_notebook_html(notebook_bytes)
 """
 
+import time
+MODULE_START = time.perf_counter()
+
+import os
+import sys
+import importlib
 import json
+import gzip
 import base64
+import struct
+import hashlib
+import sqlite3
+import mimetypes
+import threading
+import queue
 import re
 import argparse
+import urllib.parse
 from pathlib import Path
-from typing import Optional, Literal
-from io import BytesIO
-
-# Check for optional dependencies
-try:
-    from bs4 import BeautifulSoup
-    HAS_BS4 = True
-except ImportError:
-    HAS_BS4 = False
-
-try:
-    from pygments import highlight
-    from pygments.lexers import PythonLexer, get_lexer_by_name
-    from pygments.formatters import HtmlFormatter
-    from pygments.styles import get_style_by_name
-    HAS_PYGMENTS = True
-except ImportError:
-    HAS_PYGMENTS = False
-
-try:
-    import requests
-    HAS_REQUESTS = True
-except ImportError:
-    HAS_REQUESTS = False
-
-try:
-    from weasyprint import HTML as WeasyHTML
-    HAS_WEASYPRINT = True
-except ImportError:
-    HAS_WEASYPRINT = False
+from typing import Optional, Literal, Iterator
+from io import BytesIO, StringIO
+from functools import lru_cache
+from collections import OrderedDict, deque
+from contextlib import redirect_stdout, closing, nullcontext, contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from html import unescape as html_unescape, entities as html_entities
+from html.parser import HTMLParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Optional dependencies are imported on first use, not at startup, so a
+# plain HTML run never pays for weasyprint/bs4/requests. Import times are
+# recorded for --timing.
+IMPORT_TIMINGS = {}
+
+
+@lru_cache(maxsize=None)
+def load_optional(module_name: str):
+    """Import an optional dependency on first use; None if it is unavailable"""
+    start = time.perf_counter()
+    try:
+        module = importlib.import_module(module_name)
+    except Exception:
+        module = None
+    IMPORT_TIMINGS[module_name] = time.perf_counter() - start
+    return module
+
+
+def has_bs4() -> bool:
+    return load_optional('bs4') is not None
+
+
+def has_pygments() -> bool:
+    return load_optional('pygments') is not None
+
+
+def has_requests() -> bool:
+    return load_optional('requests') is not None
+
+
+def has_ijson() -> bool:
+    return load_optional('ijson') is not None
+
+
+def has_weasyprint() -> bool:
+    return load_optional('weasyprint') is not None
+
+
+def has_pil() -> bool:
+    return load_optional('PIL.Image') is not None
+
+
+def print_timing_summary(startup: float, elapsed: float) -> None:
+    """Print module startup, per-dependency import time and render time"""
+    imports = sum(IMPORT_TIMINGS.values())
+    print("-" * 50)
+    print("Timing:")
+    print(f"  {'startup':<30}{startup * 1000:9.1f} ms")
+    for name, seconds in sorted(IMPORT_TIMINGS.items(), key=lambda item: -item[1]):
+        status = "" if load_optional(name) is not None else "  (not installed)"
+        print(f"  {'import ' + name:<30}{seconds * 1000:9.1f} ms{status}")
+    print(f"  {'render':<30}{(elapsed - imports) * 1000:9.1f} ms")
+    print(f"  {'total':<30}{(startup + elapsed) * 1000:9.1f} ms")
+
+
+def get_peak_rss() -> Optional[int]:
+    """Peak resident set size of this process in bytes, if the platform reports it"""
+    resource = load_optional('resource')
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024  # KB on Linux
+    psutil = load_optional('psutil')
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss)  # peak_wset on Windows
+    return None
+
+
+def get_current_rss() -> Optional[int]:
+    """Current resident set size of this process in bytes, if available"""
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    psutil = load_optional('psutil')
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    return None
+
+
+class RenderProfiler:
+    """
+    Wall time, call counts and RSS per render stage and cell type (--profile).
+    
+    RSS is sampled when each stage or cell starts and ends; the summary
+    shows the highest RSS seen there and the largest growth across a single
+    call, so short-lived spikes inside a call are not captured. Stages nest
+    (a markdown cell's time includes its image embedding), so stage totals
+    are not meant to add up. With trace_path, every cell is also written as
+    one JSON line, so the slowest cells can be found.
+    """
+    
+    def __init__(self, trace_path: Optional[str] = None):
+        self.stages = {}      # name -> [calls, seconds, max_rss, max_growth]
+        self.cell_types = {}  # cell_type -> [cells, seconds, max_rss, max_growth]
+        self.cells = []       # (seconds, notebook, index, cell_type)
+        self.notebook = None
+        self.start = time.perf_counter()
+        self.trace = open(trace_path, 'w', encoding='utf-8') if trace_path else None
+    
+    @staticmethod
+    def _record(entry: list, elapsed: float, rss_before: Optional[int], rss_after: Optional[int]) -> None:
+        entry[0] += 1
+        entry[1] += elapsed
+        if rss_before is not None and rss_after is not None:
+            entry[2] = max(entry[2], rss_before, rss_after)
+            entry[3] = max(entry[3], rss_after - rss_before)
+    
+    @contextmanager
+    def stage(self, name: str):
+        rss_before = get_current_rss()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._record(self.stages.setdefault(name, [0, 0.0, 0, 0]), elapsed, rss_before, get_current_rss())
+    
+    @contextmanager
+    def cell(self, index: int, cell_type: str):
+        rss_before = get_current_rss()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            rss_after = get_current_rss()
+            self._record(self.cell_types.setdefault(cell_type or 'unknown', [0, 0.0, 0, 0]),
+                         elapsed, rss_before, rss_after)
+            self.cells.append((elapsed, self.notebook, index, cell_type))
+            if self.trace:
+                self.trace.write(json.dumps({
+                    'notebook': self.notebook, 'cell': index, 'cell_type': cell_type,
+                    'ms': round(elapsed * 1000, 3), 'rss': rss_after,
+                    'rss_growth': rss_after - rss_before if rss_before is not None and rss_after is not None else None,
+                    'peak_rss': get_peak_rss(),
+                }) + '\n')
+    
+    def close(self) -> None:
+        if self.trace:
+            self.trace.close()
+            self.trace = None
+    
+    def print_summary(self, slowest: int = 10) -> None:
+        total = time.perf_counter() - self.start
+        print("-" * 50)
+        print("Profile:")
+        mb = 1024 * 1024
+        header = f"{'total':>12}{'mean':>11}{'share':>8}{'max RSS':>11}{'growth':>11}"
+        for label, count, entries in (('stage', 'calls', self.stages), ('cell type', 'cells', self.cell_types)):
+            print(f"  {label:<24}{count:>7}{header}")
+            for name, (calls, seconds, max_rss, growth) in sorted(entries.items(), key=lambda item: -item[1][1]):
+                print(f"  {name:<24}{calls:7d}{seconds * 1000:9.1f} ms{seconds / calls * 1000:8.2f} ms"
+                      f"{seconds / total * 100:7.1f}%{max_rss / mb:8.1f} MB{growth / mb:8.1f} MB")
+        if self.cells:
+            print("  Slowest cells:")
+            for seconds, notebook, index, cell_type in sorted(self.cells, key=lambda c: -c[0])[:slowest]:
+                print(f"    {seconds * 1000:9.1f} ms  {notebook} cell {index} ({cell_type})")
+        peak = get_peak_rss()
+        if peak is not None:
+            print(f"  {'peak RSS':<24}{peak / (1024 * 1024):19.1f} MB")
+        print(f"  {'wall time':<24}{total * 1000:19.1f} ms")
+
+
+# Active profiler, set by --profile; None keeps the stage hooks free
+_profiler = None
+
+
+def set_profiler(profiler: Optional[RenderProfiler]) -> None:
+    global _profiler
+    _profiler = profiler
+
+
+def profile_stage(name: str):
+    """Context manager timing a render stage when profiling is on"""
+    return _profiler.stage(name) if _profiler is not None else nullcontext()
+
+
+def profile_cell(index: int, cell_type: str):
+    """Context manager timing one cell when profiling is on"""
+    return _profiler.cell(index, cell_type) if _profiler is not None else nullcontext()
 
 
 # =============================================================================
@@ -245,6 +438,13 @@ thead th:first-child {
     }
 }
 
+/* Marker row for DataFrames cut down to the row budget */
+tbody tr.elided-rows td {
+    font-style: italic;
+    color: #777;
+    background-color: #fff;
+}
+
 /* Remove Colab/Jupyter interactive elements */
 .colab-df-container,
 .colab-df-buttons,
@@ -437,9 +637,36 @@ def get_markdown_css() -> str:
 """
 
 
+def get_book_css() -> str:
+    """CSS for --book mode: chapter index and one chapter per printed section"""
+    return """
+/* Book index */
+.book-index ol {
+    padding-left: 1.5em;
+}
+
+.book-index li {
+    margin: 0.35em 0;
+}
+
+/* Each chapter starts on a new page */
+.book-chapter {
+    page-break-before: always;
+    break-before: page;
+}
+
+@media print {
+    /* Page numbers in the index (WeasyPrint; browsers ignore this) */
+    .book-index a::after {
+        content: leader('.') target-counter(attr(href), page);
+    }
+}
+"""
+
+
 def get_syntax_highlight_css(theme: str = "github") -> str:
     """Get Pygments CSS for the specified theme"""
-    if not HAS_PYGMENTS:
+    if not has_pygments():
         return ""
     
     # Map friendly names to pygments style names
@@ -510,19 +737,61 @@ def get_syntax_highlight_css(theme: str = "github") -> str:
 # HTML CONVERSION FUNCTIONS
 # =============================================================================
 
+HIGHLIGHT_CACHE_SIZE = 4096
+_highlight_cache = OrderedDict()
+
+
+@lru_cache(maxsize=None)
+def get_lexer(language: str):
+    """Pygments lexer for language (Python if unknown), created once per process"""
+    lexers = load_optional('pygments.lexers')
+    try:
+        return lexers.get_lexer_by_name(language, stripall=True)
+    except Exception:
+        return lexers.PythonLexer()
+
+
+@lru_cache(maxsize=None)
+def get_formatter():
+    """
+    Shared HtmlFormatter, created once per process.
+    
+    Token colours come from get_syntax_highlight_css, so the markup is the
+    same for every theme.
+    """
+    return load_optional('pygments.formatters').HtmlFormatter(nowrap=True, cssclass="highlight")
+
+
+def get_notebook_language(metadata: dict) -> str:
+    """Kernel language from notebook metadata (language_info, then kernelspec)"""
+    language_info = metadata.get('language_info') or {}
+    kernelspec = metadata.get('kernelspec') or {}
+    return (language_info.get('name') or kernelspec.get('language') or "python").lower()
+
+
 def highlight_code(code: str, language: str = "python") -> str:
-    """Apply syntax highlighting to code"""
-    if not HAS_PYGMENTS:
+    """
+    Apply syntax highlighting to code.
+    
+    Results are memoized by a hash of (language, source), so cells repeated
+    within or across notebooks (in any theme) are only lexed once per process.
+    """
+    if not has_pygments():
         return f'<pre><code>{escape_html(code)}</code></pre>'
     
-    try:
-        lexer = get_lexer_by_name(language, stripall=True)
-    except:
-        lexer = PythonLexer()
+    key = hashlib.sha1(f"{language}\0{code}".encode('utf-8')).digest()
+    cached = _highlight_cache.get(key)
+    if cached is not None:
+        _highlight_cache.move_to_end(key)
+        return cached
     
-    formatter = HtmlFormatter(nowrap=True, cssclass="highlight")
-    highlighted = highlight(code, lexer, formatter)
-    return f'<pre><code class="highlight">{highlighted}</code></pre>'
+    highlighted = load_optional('pygments').highlight(code, get_lexer(language), get_formatter())
+    result = f'<pre><code class="highlight">{highlighted}</code></pre>'
+    
+    _highlight_cache[key] = result
+    if len(_highlight_cache) > HIGHLIGHT_CACHE_SIZE:
+        _highlight_cache.popitem(last=False)
+    return result
 
 
 def escape_html(text: str) -> str:
@@ -534,110 +803,476 @@ def escape_html(text: str) -> str:
             .replace('"', "&quot;"))
 
 
-def convert_markdown_to_html(md_text: str) -> str:
-    """Convert markdown to HTML (basic conversion)"""
-    # This is a simplified markdown converter
-    # For full markdown support, you'd want to use a library like markdown or mistune
-    
-    html = md_text
-    
-    # Headers
-    html = re.sub(r'^######\s+(.+)$', r'<h6>\1</h6>', html, flags=re.MULTILINE)
-    html = re.sub(r'^#####\s+(.+)$', r'<h5>\1</h5>', html, flags=re.MULTILINE)
-    html = re.sub(r'^####\s+(.+)$', r'<h4>\1</h4>', html, flags=re.MULTILINE)
-    html = re.sub(r'^###\s+(.+)$', r'<h3>\1</h3>', html, flags=re.MULTILINE)
-    html = re.sub(r'^##\s+(.+)$', r'<h2>\1</h2>', html, flags=re.MULTILINE)
-    html = re.sub(r'^#\s+(.+)$', r'<h1>\1</h1>', html, flags=re.MULTILINE)
-    
-    # Bold and italic
-    html = re.sub(r'\*\*\*(.+?)\*\*\*', r'<strong><em>\1</em></strong>', html)
-    html = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', html)
-    html = re.sub(r'\*(.+?)\*', r'<em>\1</em>', html)
-    
-    # Inline code
-    html = re.sub(r'`([^`]+)`', r'<code>\1</code>', html)
-    
-    # Links
-    html = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', r'<a href="\2">\1</a>', html)
-    
-    # Images (markdown style)
-    html = re.sub(r'!\[([^\]]*)\]\(([^)]+)\)', r'<img src="\2" alt="\1">', html)
-    
-    # Horizontal rules
-    html = re.sub(r'^---+$', r'<hr>', html, flags=re.MULTILINE)
-    html = re.sub(r'^\*\*\*+$', r'<hr>', html, flags=re.MULTILINE)
-    
-    # Unordered lists (simple)
-    lines = html.split('\n')
-    in_list = False
-    result = []
-    for line in lines:
-        if re.match(r'^\s*[\*\-]\s+', line):
-            if not in_list:
-                result.append('<ul>')
-                in_list = True
-            content = re.sub(r'^\s*[\*\-]\s+', '', line)
-            result.append(f'<li>{content}</li>')
+# Markdown block patterns (matched once per line)
+_MD_HEADING = re.compile(r'^(#{1,6})\s+(.+?)(?:\s+#+)?\s*$')
+_MD_HR = re.compile(r'^(?:-{3,}|\*{3,}|_{3,})\s*$')
+_MD_FENCE = re.compile(r'^\s{0,3}(`{3,}|~{3,})\s*([\w+#.-]*)')
+_MD_UL_ITEM = re.compile(r'^\s*[*+-]\s+(.*)$')
+_MD_OL_ITEM = re.compile(r'^\s*\d+[.)]\s+(.*)$')
+_MD_QUOTE = re.compile(r'^\s{0,3}>\s?(.*)$')
+_MD_TABLE_SEP = re.compile(r'^\s*\|?\s*:?-+:?\s*(?:\|\s*:?-+:?\s*)*\|?\s*$')
+_MD_HTML_BLOCK = re.compile(
+    r'^\s{0,3}<(?:h[1-6]|ul|ol|li|blockquote|hr|table|div|pre|img|p|center|details|figure|iframe|!--)\b',
+    re.IGNORECASE)
+
+# Markdown inline patterns
+_MD_INLINE_SPECIAL = re.compile(r'[\\`*_!\[<&>$]')
+_MD_INLINE_HTML = re.compile(r'<!--.*?-->|</?[A-Za-z][A-Za-z0-9-]*(?:\s[^<>]*)?/?>', re.DOTALL)
+_MD_AUTOLINK = re.compile(r'<(https?://[^\s<>]+)>')
+_MD_ENTITY = re.compile(r'&(?:#\d+|#[xX][0-9a-fA-F]+|[A-Za-z][A-Za-z0-9]*);')
+_MD_ESCAPABLE = set('\\`*_{}[]()#+-.!|<>$')
+
+
+def _run_length(text: str, pos: int) -> int:
+    """Length of the run of identical characters starting at pos"""
+    ch = text[pos]
+    end = pos
+    while end < len(text) and text[end] == ch:
+        end += 1
+    return end - pos
+
+
+def _find_run(text: str, start: int, ch: str, length: int) -> int:
+    """Position of the next run of exactly `length` ch characters, or -1"""
+    pos = start
+    while True:
+        pos = text.find(ch * length, pos)
+        if pos < 0:
+            return -1
+        run = _run_length(text, pos)
+        if run == length:
+            return pos
+        pos += run
+
+
+def _find_emphasis_close(text: str, start: int, ch: str, length: int) -> int:
+    """
+    Find the closing delimiter run for emphasis opened at start.
+    
+    Code spans and backslash escapes are skipped, so `*` inside `code`
+    never closes emphasis opened outside it.
+    """
+    n = len(text)
+    pos = start
+    while pos < n:
+        c = text[pos]
+        if c == '\\':
+            pos += 2
+            continue
+        if c == '`':
+            run = _run_length(text, pos)
+            close = _find_run(text, pos + run, '`', run)
+            pos = close + run if close >= 0 else pos + run
+            continue
+        if c == ch:
+            run = _run_length(text, pos)
+            if (run == length and not text[pos - 1].isspace()
+                    and not (ch == '_' and pos + run < n and text[pos + run].isalnum())):
+                return pos
+            pos += run
+            continue
+        pos += 1
+    return -1
+
+
+def _find_bracket_close(text: str, start: int, open_ch: str, close_ch: str) -> int:
+    """Matching close bracket for text[start] == open_ch, skipping code spans"""
+    depth = 0
+    pos = start
+    n = len(text)
+    while pos < n:
+        c = text[pos]
+        if c == '\\':
+            pos += 2
+            continue
+        if c == '`' and open_ch == '[':
+            run = _run_length(text, pos)
+            close = _find_run(text, pos + run, '`', run)
+            pos = close + run if close >= 0 else pos + run
+            continue
+        if c == open_ch:
+            depth += 1
+        elif c == close_ch:
+            depth -= 1
+            if depth == 0:
+                return pos
+        pos += 1
+    return -1
+
+
+def _parse_link(text: str, start: int) -> Optional[tuple]:
+    """Parse [label](target "title") at start, returning (label, url, end) or None"""
+    label_end = _find_bracket_close(text, start, '[', ']')
+    if label_end < 0 or label_end + 1 >= len(text) or text[label_end + 1] != '(':
+        return None
+    target_end = _find_bracket_close(text, label_end + 1, '(', ')')
+    if target_end < 0:
+        return None
+    target = text[label_end + 2:target_end].strip()
+    url = target.split()[0] if target else ''
+    return text[start + 1:label_end], url, target_end + 1
+
+
+def render_markdown_inline(text: str) -> str:
+    """
+    Render inline markdown (code, emphasis, links, images, raw HTML) in one scan.
+    
+    Plain text between special characters is copied in slices; each special
+    character is handled where it occurs instead of by a separate regex pass.
+    """
+    out = []
+    pos = 0
+    n = len(text)
+    while pos < n:
+        m = _MD_INLINE_SPECIAL.search(text, pos)
+        if m is None:
+            out.append(text[pos:])
+            break
+        j = m.start()
+        if j > pos:
+            out.append(text[pos:j])
+        c = text[j]
+        pos = j + 1
+        
+        if c == '\\':
+            if j + 1 < n and text[j + 1] in _MD_ESCAPABLE:
+                out.append(escape_html(text[j + 1]))
+                pos = j + 2
+            else:
+                out.append('\\')
+        
+        elif c == '`':
+            run = _run_length(text, j)
+            close = _find_run(text, j + run, '`', run)
+            if close < 0:
+                out.append('`' * run)
+                pos = j + run
+            else:
+                code = text[j + run:close]
+                if len(code) > 1 and code[0] == ' ' and code[-1] == ' ':
+                    code = code[1:-1]
+                out.append(f'<code>{escape_html(code)}</code>')
+                pos = close + run
+        
+        elif c == '$':
+            # Math spans are copied literally so _ and * inside stay untouched
+            run = min(_run_length(text, j), 2)
+            close = text.find('$' * run, j + run)
+            if close > j + run:
+                out.append(escape_html(text[j:close + run]))
+                pos = close + run
+            else:
+                out.append('$' * run)
+                pos = j + run
+        
+        elif c in '*_':
+            run = _run_length(text, j)
+            can_open = (run <= 3 and j + run < n and not text[j + run].isspace()
+                        and not (c == '_' and j > 0 and text[j - 1].isalnum()))
+            close = _find_emphasis_close(text, j + run, c, run) if can_open else -1
+            if close < 0:
+                out.append(c * run)
+                pos = j + run
+            else:
+                inner = render_markdown_inline(text[j + run:close])
+                if run == 1:
+                    out.append(f'<em>{inner}</em>')
+                elif run == 2:
+                    out.append(f'<strong>{inner}</strong>')
+                else:
+                    out.append(f'<strong><em>{inner}</em></strong>')
+                pos = close + run
+        
+        elif c == '!' and j + 1 < n and text[j + 1] == '[':
+            link = _parse_link(text, j + 1)
+            if link is None:
+                out.append('!')
+            else:
+                alt, url, pos = link
+                out.append(f'<img src="{escape_html(url)}" alt="{escape_html(alt)}">')
+        
+        elif c == '[':
+            link = _parse_link(text, j)
+            if link is None:
+                out.append('[')
+            else:
+                label, url, pos = link
+                out.append(f'<a href="{escape_html(url)}">{render_markdown_inline(label)}</a>')
+        
+        elif c == '<':
+            m = _MD_AUTOLINK.match(text, j) or _MD_INLINE_HTML.match(text, j)
+            if m is None:
+                out.append('&lt;')
+            elif m.re is _MD_AUTOLINK:
+                url = escape_html(m.group(1))
+                out.append(f'<a href="{url}">{url}</a>')
+                pos = m.end()
+            else:
+                out.append(m.group(0))
+                pos = m.end()
+        
+        elif c == '&':
+            m = _MD_ENTITY.match(text, j)
+            if m is None:
+                out.append('&amp;')
+            else:
+                out.append(m.group(0))
+                pos = m.end()
+        
+        elif c == '>':
+            out.append('&gt;')
+        
         else:
-            if in_list:
-                result.append('</ul>')
-                in_list = False
-            result.append(line)
-    if in_list:
-        result.append('</ul>')
-    html = '\n'.join(result)
-    
-    # Ordered lists (simple)
-    lines = html.split('\n')
-    in_list = False
-    result = []
-    for line in lines:
-        if re.match(r'^\s*\d+\.\s+', line):
-            if not in_list:
-                result.append('<ol>')
-                in_list = True
-            content = re.sub(r'^\s*\d+\.\s+', '', line)
-            result.append(f'<li>{content}</li>')
+            out.append(c)
+    
+    return ''.join(out)
+
+
+def _split_table_row(line: str) -> list:
+    """Split a pipe table row into cell strings (escaped \\| stays in the cell)"""
+    line = line.strip()
+    if line.startswith('|'):
+        line = line[1:]
+    if line.endswith('|') and not line.endswith('\\|'):
+        line = line[:-1]
+    return [cell.strip().replace('\\|', '|') for cell in re.split(r'(?<!\\)\|', line)]
+
+
+def _render_table(header: str, separator: str, rows: list) -> str:
+    """Render a pipe table; column alignment comes from the separator row"""
+    aligns = []
+    for spec in _split_table_row(separator):
+        if spec.startswith(':') and spec.endswith(':'):
+            aligns.append(' style="text-align: center"')
+        elif spec.endswith(':'):
+            aligns.append(' style="text-align: right"')
+        elif spec.startswith(':'):
+            aligns.append(' style="text-align: left"')
         else:
-            if in_list:
-                result.append('</ol>')
-                in_list = False
-            result.append(line)
-    if in_list:
-        result.append('</ol>')
-    html = '\n'.join(result)
-    
-    # Paragraphs (wrap loose text)
-    # Split by double newlines for paragraphs
-    parts = re.split(r'\n\n+', html)
-    wrapped = []
-    for part in parts:
-        part = part.strip()
-        if not part:
+            aligns.append('')
+    
+    def render_row(line: str, tag: str) -> str:
+        cells = _split_table_row(line)
+        cells += [''] * (len(aligns) - len(cells))
+        return '<tr>' + ''.join(
+            f'<{tag}{align}>{render_markdown_inline(cell)}</{tag}>'
+            for cell, align in zip(cells, aligns)
+        ) + '</tr>'
+    
+    body = '\n'.join(render_row(row, 'td') for row in rows)
+    return f'<table>\n<thead>\n{render_row(header, "th")}\n</thead>\n<tbody>\n{body}\n</tbody>\n</table>'
+
+
+def convert_markdown_to_html(md_text: str) -> str:
+    """
+    Convert markdown to HTML in a single pass over the lines.
+    
+    Supports ATX headings, paragraphs, emphasis, inline code, links, images,
+    horizontal rules, flat bullet/numbered lists, blockquotes, fenced code
+    blocks, pipe tables and raw HTML blocks. Each block is rendered as soon
+    as it ends, with inline markup handled by render_markdown_inline.
+    """
+    lines = md_text.replace('\r\n', '\n').split('\n')
+    n = len(lines)
+    out = []
+    paragraph = []
+    list_tag = None
+    list_item = []
+    
+    def flush_paragraph():
+        if paragraph:
+            out.append(f'<p>{render_markdown_inline(chr(10).join(paragraph))}</p>')
+            paragraph.clear()
+    
+    def flush_list_item():
+        if list_item:
+            out.append(f'<li>{render_markdown_inline(chr(10).join(list_item))}</li>')
+            list_item.clear()
+    
+    def close_list():
+        nonlocal list_tag
+        if list_tag:
+            flush_list_item()
+            out.append(f'</{list_tag}>')
+            list_tag = None
+    
+    def close_blocks():
+        flush_paragraph()
+        close_list()
+    
+    i = 0
+    while i < n:
+        line = lines[i]
+        stripped = line.strip()
+        i += 1
+        
+        if not stripped:
+            close_blocks()
             continue
-        # Don't wrap if already has block-level element
-        if re.match(r'^<(h[1-6]|ul|ol|li|blockquote|hr|table|div|pre|img)', part):
-            wrapped.append(part)
-        else:
-            wrapped.append(f'<p>{part}</p>')
+        
+        # Fenced code block: everything up to the matching fence is literal
+        m = _MD_FENCE.match(line)
+        if m:
+            close_blocks()
+            fence, lang = m.group(1), m.group(2)
+            code_lines = []
+            while i < n and not lines[i].strip().startswith(fence):
+                code_lines.append(lines[i])
+                i += 1
+            i += 1  # skip closing fence
+            code = '\n'.join(code_lines)
+            if lang:
+                out.append(highlight_code(code, lang))
+            else:
+                out.append(f'<pre><code>{escape_html(code)}</code></pre>')
+            continue
+        
+        m = _MD_HEADING.match(line)
+        if m:
+            close_blocks()
+            level = len(m.group(1))
+            out.append(f'<h{level}>{render_markdown_inline(m.group(2))}</h{level}>')
+            continue
+        
+        if _MD_HR.match(line):
+            close_blocks()
+            out.append('<hr>')
+            continue
+        
+        # Pipe table: a row containing | followed by a separator row
+        if '|' in line and i < n and _MD_TABLE_SEP.match(lines[i]) and '-' in lines[i]:
+            close_blocks()
+            separator = lines[i]
+            i += 1
+            rows = []
+            while i < n and lines[i].strip() and '|' in lines[i]:
+                rows.append(lines[i])
+                i += 1
+            out.append(_render_table(line, separator, rows))
+            continue
+        
+        m = _MD_QUOTE.match(line)
+        if m:
+            close_blocks()
+            quoted = [m.group(1)]
+            while i < n and lines[i].strip():
+                m = _MD_QUOTE.match(lines[i])
+                quoted.append(m.group(1) if m else lines[i])
+                i += 1
+            out.append(f'<blockquote>{convert_markdown_to_html(chr(10).join(quoted))}</blockquote>')
+            continue
+        
+        if _MD_HTML_BLOCK.match(line) and not paragraph:
+            close_list()
+            block = [line]
+            while (i < n and lines[i].strip() and not _MD_HEADING.match(lines[i])
+                   and not _MD_UL_ITEM.match(lines[i]) and not _MD_OL_ITEM.match(lines[i])):
+                block.append(lines[i])
+                i += 1
+            out.append('\n'.join(block))
+            continue
+        
+        m = _MD_UL_ITEM.match(line)
+        tag = 'ul'
+        if m is None:
+            m = _MD_OL_ITEM.match(line)
+            tag = 'ol'
+        if m:
+            flush_paragraph()
+            if list_tag != tag:
+                close_list()
+                out.append(f'<{tag}>')
+                list_tag = tag
+            flush_list_item()
+            list_item.append(m.group(1))
+            continue
+        
+        # Indented line right after a list item continues that item
+        if list_tag and line[:1].isspace():
+            list_item.append(stripped)
+            continue
+        
+        close_list()
+        paragraph.append(line)
+    
+    close_blocks()
+    return '\n'.join(out)
+
+
+# JPEG start-of-frame markers (baseline, progressive, lossless, arithmetic);
+# C4 (DHT), C8 (JPG) and CC (DAC) share the range but carry no dimensions
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+IMAGE_PROBE_CHARS = 512
+
+
+def probe_image_dimensions(header: bytes) -> Optional[tuple]:
+    """
+    (width, height) from the first bytes of a PNG, JPEG, GIF or WebP file.
     
-    return '\n'.join(wrapped)
+    Only the header is parsed, so a prefix of the file is enough. Returns
+    None if the format is unknown or the prefix ends before the dimensions
+    (for JPEG the SOF segment can follow large EXIF/ICC segments).
+    """
+    if header[:8] == b'\x89PNG\r\n\x1a\n' and header[12:16] == b'IHDR' and len(header) >= 24:
+        return struct.unpack('>II', header[16:24])
+    if header[:6] in (b'GIF87a', b'GIF89a') and len(header) >= 10:
+        return struct.unpack('<HH', header[6:10])
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP' and len(header) >= 30:
+        chunk = header[12:16]
+        if chunk == b'VP8 ':
+            width, height = struct.unpack('<HH', header[26:30])
+            return width & 0x3FFF, height & 0x3FFF
+        if chunk == b'VP8L':
+            bits = struct.unpack('<I', header[21:25])[0]
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b'VP8X':
+            return (int.from_bytes(header[24:27], 'little') + 1,
+                    int.from_bytes(header[27:30], 'little') + 1)
+        return None
+    if header[:2] == b'\xff\xd8':
+        # Walk the segments until a start-of-frame marker
+        pos = 2
+        while pos + 4 <= len(header):
+            if header[pos] != 0xFF:
+                return None
+            marker = header[pos + 1]
+            if marker == 0xFF:  # fill byte
+                pos += 1
+                continue
+            if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:  # standalone markers
+                pos += 2
+                continue
+            if marker in JPEG_SOF_MARKERS:
+                if pos + 9 > len(header):
+                    return None
+                height, width = struct.unpack('>HH', header[pos + 5:pos + 9])
+                return width, height
+            pos += 2 + struct.unpack('>H', header[pos + 2:pos + 4])[0]
+    return None
 
 
 def get_image_dimensions_from_base64(data: str) -> tuple:
-    """Try to get image dimensions from base64 PNG data"""
-    try:
-        import struct
-        img_data = base64.b64decode(data)
-        # PNG header check
-        if img_data[:8] == b'\x89PNG\r\n\x1a\n':
-            # IHDR chunk contains dimensions
-            width = struct.unpack('>I', img_data[16:20])[0]
-            height = struct.unpack('>I', img_data[20:24])[0]
-            return width, height
-    except:
-        pass
-    return None, None
+    """
+    Image dimensions from base64 data, decoding only as much as the header needs.
+    
+    Starts with the first IMAGE_PROBE_CHARS characters; only JPEGs whose
+    frame header sits further in get a longer prefix. Returns (None, None)
+    if the dimensions can't be read.
+    """
+    length = IMAGE_PROBE_CHARS
+    while True:
+        # Notebook base64 may contain line breaks; keep whole 4-char groups
+        prefix = ''.join(data[:length].split())
+        try:
+            header = base64.b64decode(prefix[:len(prefix) - len(prefix) % 4])
+        except ValueError:
+            return None, None
+        dimensions = probe_image_dimensions(header)
+        if dimensions is not None:
+            return dimensions
+        if length >= len(data) or header[:2] != b'\xff\xd8':
+            return None, None
+        length *= 8
 
 
 def get_image_class(width: Optional[int], height: Optional[int]) -> str:
@@ -654,24 +1289,205 @@ def get_image_class(width: Optional[int], height: Optional[int]) -> str:
         return "img-square"
 
 
-def process_html_output(html_content: str) -> str:
-    """Clean up HTML output from notebook (remove Colab widgets, etc.)"""
-    if not HAS_BS4:
-        # Basic cleanup without BeautifulSoup
-        # Remove Colab-specific button elements
-        html_content = re.sub(r'<button[^>]*class="[^"]*colab-df[^"]*"[^>]*>.*?</button>', '', html_content, flags=re.DOTALL)
-        html_content = re.sub(r'<script[^>]*>.*?</script>', '', html_content, flags=re.DOTALL)
-        html_content = re.sub(r'<style[^>]*>.*?</style>', '', html_content, flags=re.DOTALL)
-        return html_content
+# Serialization rules mirrored from BeautifulSoup's html.parser builder so
+# the streaming sanitizer below produces byte-identical output
+VOID_ELEMENTS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link',
+    'menuitem', 'meta', 'param', 'source', 'track', 'wbr', 'basefont', 'bgsound',
+    'command', 'frame', 'image', 'isindex', 'nextid', 'spacer',
+])
+LIST_ATTRIBUTES = {
+    '*': ('class', 'accesskey', 'dropzone'),
+    'a': ('rel', 'rev'), 'link': ('rel', 'rev'), 'area': ('rel',),
+    'td': ('headers',), 'th': ('headers',), 'form': ('accept-charset',),
+    'object': ('archive',), 'icon': ('sizes',), 'iframe': ('sandbox',), 'output': ('for',),
+}
+PRESERVE_WHITESPACE_ELEMENTS = ('pre', 'textarea')
+COLAB_CLASS_PATTERN = re.compile(r'colab-df-buttons|colab-df-convert')
+
+
+class MalformedHtmlError(Exception):
+    """Raised by HtmlOutputSanitizer when tags don't nest cleanly"""
+
+
+def _escape_minimal(text: str) -> str:
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+class HtmlOutputSanitizer(HTMLParser):
+    """
+    One-pass, tree-free equivalent of the BeautifulSoup cleanup in
+    process_html_output.
+    
+    Parser events are serialized straight into the output, skipping Colab
+    button containers, <script> and non-dataframe <style> elements. Every
+    <table> also gets its own buffer so the tables can be returned on their
+    own. Markup BeautifulSoup would have to repair (mismatched or unclosed
+    tags) raises MalformedHtmlError so the caller can fall back to it.
+    """
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.parts = []
+        self.tables = []         # serialized tables, in start-tag order
+        self.open_tables = []    # (slot in self.tables, parts) for unclosed tables
+        self.stack = []          # names of open elements
+        self.skip_depth = 0      # stack depth of the element being removed, 0 if none
+        self.style = None        # [start_tag, content...] while inside a <style>
+        self.text = []           # pending text node, flushed at the next tag
+        self.has_tables = False  # any <table>, including ones later removed
+    
+    def _emit(self, text: str) -> None:
+        self.parts.append(text)
+        for _, table_parts in self.open_tables:
+            table_parts.append(text)
+    
+    def _flush_text(self) -> None:
+        """Emit the pending text node; whitespace-only nodes collapse as in bs4"""
+        if not self.text:
+            return
+        text = ''.join(self.text)
+        self.text = []
+        if not text.strip(' \t\n\r\f') and not any(tag in self.stack for tag in PRESERVE_WHITESPACE_ELEMENTS):
+            text = '\n' if '\n' in text else ' '
+        self._emit(_escape_minimal(text))
+    
+    @staticmethod
+    def _format_start_tag(tag: str, attrs: dict) -> str:
+        list_attrs = LIST_ATTRIBUTES['*'] + LIST_ATTRIBUTES.get(tag, ())
+        formatted = []
+        for name in sorted(attrs):
+            value = attrs[name]
+            if name in list_attrs:
+                value = ' '.join(value.split())
+            value = _escape_minimal(value)
+            quote = '"'
+            if '"' in value:
+                if "'" in value:
+                    value = value.replace('"', '&quot;')
+                else:
+                    quote = "'"
+            formatted.append(f' {name}={quote}{value}{quote}')
+        slash = '/' if tag in VOID_ELEMENTS else ''
+        return f"<{tag}{''.join(formatted)}{slash}>"
+    
+    def _start(self, tag: str, attr_list: list, self_closing: bool) -> None:
+        self._flush_text()
+        void = tag in VOID_ELEMENTS
+        if tag == 'table':
+            self.has_tables = True
+        if self.skip_depth:
+            if not void and not self_closing:
+                self.stack.append(tag)
+            return
+        
+        attrs = {}
+        for name, value in attr_list:
+            attrs[name] = '' if value is None else value
+        
+        if tag == 'script' or COLAB_CLASS_PATTERN.search(attrs.get('class', '')):
+            if not void and not self_closing:
+                self.stack.append(tag)
+                self.skip_depth = len(self.stack)
+            return
+        
+        start_tag = self._format_start_tag(tag, attrs)
+        if void:
+            self._emit(start_tag)
+            return
+        if tag == 'style' and not self_closing:
+            self.stack.append(tag)
+            self.style = [start_tag]
+            return
+        if tag == 'table':
+            self.open_tables.append((len(self.tables), []))
+            self.tables.append('')
+        self._emit(start_tag)
+        self.stack.append(tag)
+        if self_closing:
+            self.handle_endtag(tag)
+    
+    def handle_starttag(self, tag, attrs):
+        self._start(tag, attrs, self_closing=False)
+    
+    def handle_startendtag(self, tag, attrs):
+        self._start(tag, attrs, self_closing=True)
+    
+    def handle_endtag(self, tag):
+        self._flush_text()
+        if tag in VOID_ELEMENTS or not self.stack or self.stack[-1] != tag:
+            raise MalformedHtmlError(tag)
+        self.stack.pop()
+        
+        if self.skip_depth:
+            if len(self.stack) < self.skip_depth:
+                self.skip_depth = 0
+            return
+        
+        if self.style is not None:
+            content = ''.join(self.style[1:])
+            if 'dataframe' in content:
+                self._emit(f'{self.style[0]}{content}</style>')
+            self.style = None
+            return
+        
+        self._emit(f'</{tag}>')
+        if tag == 'table':
+            slot, table_parts = self.open_tables.pop()
+            self.tables[slot] = ''.join(table_parts)
     
-    soup = BeautifulSoup(html_content, 'html.parser')
+    def handle_data(self, data):
+        if self.skip_depth:
+            return
+        if self.style is not None:
+            self.style.append(data)
+            return
+        self.text.append(data)
+    
+    def handle_entityref(self, name):
+        # Unknown entities keep their text minus the ';', as BeautifulSoup does
+        self.handle_data(html_entities.html5.get(f'{name};', f'&{name}'))
+    
+    def handle_charref(self, name):
+        self.handle_data(html_unescape(f'&#{name};'))
+    
+    def handle_comment(self, data):
+        self._flush_text()
+        if not self.skip_depth and self.style is None:
+            self._emit(f'<!--{data}-->')
+    
+    def handle_decl(self, decl):
+        self._flush_text()
+        if not self.skip_depth and self.style is None:
+            self._emit(f'<!{decl}>\n')
+    
+    def handle_pi(self, data):
+        raise MalformedHtmlError('processing instruction')
+    
+    def unknown_decl(self, data):
+        raise MalformedHtmlError('unknown declaration')
+    
+    def sanitize(self, html_content: str) -> str:
+        self.feed(html_content)
+        self.close()
+        self._flush_text()
+        if self.stack:
+            raise MalformedHtmlError(self.stack[-1])
+        if self.has_tables:
+            return '\n'.join(self.tables)
+        return ''.join(self.parts)
+
+
+def process_html_output_bs4(html_content: str) -> str:
+    """BeautifulSoup implementation of process_html_output (fallback path)"""
+    soup = load_optional('bs4').BeautifulSoup(html_content, 'html.parser')
     
     # First, extract and preserve tables
     tables = soup.find_all('table')
     
     # Remove Colab interactive elements (buttons, not containers with tables)
     # Only remove elements that don't contain tables
-    for element in soup.find_all(class_=re.compile(r'colab-df-buttons|colab-df-convert')):
+    for element in soup.find_all(class_=COLAB_CLASS_PATTERN):
         element.decompose()
     
     # Remove script tags
@@ -696,105 +1512,781 @@ def process_html_output(html_content: str) -> str:
     return str(soup)
 
 
-def embed_external_image(url: str) -> Optional[str]:
-    """Download external image and convert to base64 data URI"""
-    if not HAS_REQUESTS:
-        return None
+def process_html_output(html_content: str) -> str:
+    """
+    Clean up HTML output from notebook (remove Colab widgets, etc.)
     
+    Uses the streaming HtmlOutputSanitizer; markup it can't handle goes
+    through BeautifulSoup, or a basic regex cleanup if bs4 isn't installed.
+    """
     try:
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            content_type = response.headers.get('content-type', 'image/png')
-            if 'image' in content_type:
-                b64 = base64.b64encode(response.content).decode('utf-8')
-                return f"data:{content_type};base64,{b64}"
-    except:
+        return HtmlOutputSanitizer().sanitize(html_content)
+    except MalformedHtmlError:
         pass
-    return None
+    
+    if not has_bs4():
+        # Basic cleanup without BeautifulSoup
+        # Remove Colab-specific button elements
+        html_content = re.sub(r'<button[^>]*class="[^"]*colab-df[^"]*"[^>]*>.*?</button>', '', html_content, flags=re.DOTALL)
+        html_content = re.sub(r'<script[^>]*>.*?</script>', '', html_content, flags=re.DOTALL)
+        html_content = re.sub(r'<style[^>]*>.*?</style>', '', html_content, flags=re.DOTALL)
+        return html_content
+    
+    return process_html_output_bs4(html_content)
 
 
-def convert_cell_to_html(cell: dict, show_code: bool = True, embed_images: bool = True, syntax_theme: str = "github") -> str:
-    """Convert a single notebook cell to HTML"""
-    cell_type = cell.get('cell_type', '')
-    source = cell.get('source', [])
-    if isinstance(source, list):
-        source = ''.join(source)
+# Output budgets: oversized outputs keep their head and tail around an
+# elision marker so the HTML stays printable. 0 disables a budget.
+DEFAULT_MAX_TABLE_ROWS = 500
+DEFAULT_MAX_STREAM_LINES = 2000
+DEFAULT_MAX_OUTPUT_BYTES = 2 * 1024 * 1024
+
+_TABLE_ROW_TAG_PATTERN = re.compile(r'<(/?)(tbody|tr)\b', re.IGNORECASE)
+
+
+def iter_output_lines(text) -> Iterator[str]:
+    """Lines of a notebook text field (a string or list of strings), keeping newlines"""
+    partial = ''
+    for piece in ([text] if isinstance(text, str) else text):
+        lines = piece.splitlines(keepends=True)
+        if not lines:
+            continue
+        lines[0] = partial + lines[0]
+        # A piece may end mid-line (print(..., end='')); join it with the next
+        last = lines[-1]
+        partial = lines.pop() if len(last.splitlines()[0]) == len(last) else ''
+        yield from lines
+    if partial:
+        yield partial
+
+
+def bound_text_output(text, max_lines: int = DEFAULT_MAX_STREAM_LINES,
+                      max_bytes: int = DEFAULT_MAX_OUTPUT_BYTES) -> str:
+    """
+    Join a text output, keeping at most max_lines lines / max_bytes bytes.
     
-    html_parts = []
+    Works line by line: lines are kept as they arrive until half the budget
+    is used, then the rest of the budget holds the most recent lines in a
+    bounded deque, so an oversized output is never joined in full. A first
+    line bigger than the whole byte budget is cut.
+    """
+    max_lines = max_lines or sys.maxsize
+    max_bytes = max_bytes or sys.maxsize
+    head_lines, head_bytes = -(-max_lines // 2), -(-max_bytes // 2)
     
-    if cell_type == 'markdown':
-        # Process markdown cell
-        md_html = convert_markdown_to_html(source)
-        
-        # Embed external images if requested
-        if embed_images and HAS_REQUESTS:
-            # Find all image URLs
-            img_pattern = r'<img[^>]+src="(https?://[^"]+)"'
-            for match in re.finditer(img_pattern, md_html):
-                url = match.group(1)
-                embedded = embed_external_image(url)
-                if embedded:
-                    md_html = md_html.replace(f'src="{url}"', f'src="{embedded}"')
-        
-        html_parts.append(f'<div class="markdown-cell">{md_html}</div>')
+    head, tail = [], deque()
+    head_size = tail_size = 0
+    total_lines = 0
+    truncated = cut = False
+    tail_lines = tail_bytes = 0
+    for line in iter_output_lines(text):
+        total_lines += 1
+        size = len(line.encode('utf-8'))
+        if not truncated:
+            if len(head) < head_lines and head_size + size <= head_bytes:
+                head.append(line)
+                head_size += size
+                continue
+            truncated = True
+            cut = not head and size > max_bytes
+            if cut:
+                # First line alone is over the whole budget: keep its start
+                head.append(line.encode('utf-8')[:head_bytes].decode('utf-8', 'ignore') + '\n')
+                head_size = len(head[0].encode('utf-8'))
+            # Whatever the head left unused goes to the tail
+            tail_lines, tail_bytes = max_lines - len(head), max_bytes - head_size
+            if cut:
+                continue
+        tail.append(line)
+        tail_size += size
+        while tail and (len(tail) > tail_lines or tail_size > tail_bytes):
+            tail_size -= len(tail.popleft().encode('utf-8'))
     
-    elif cell_type == 'code':
-        # Code input
-        if show_code and source.strip():
-            highlighted = highlight_code(source.strip())
-            html_parts.append(f'<div class="code-cell"><div class="code-input">{highlighted}</div>')
+    omitted = total_lines - len(head) - len(tail)
+    if not omitted and not cut:
+        return ''.join(head) + ''.join(tail)
+    marker = f"… {omitted:,} line{'s' if omitted != 1 else ''} omitted …\n" if omitted else "… line truncated …\n"
+    if head and not head[-1].endswith('\n'):
+        head[-1] += '\n'
+    return ''.join(head) + marker + ''.join(tail)
+
+
+def _split_between_tags(pieces) -> list:
+    """
+    The pieces of an output re-cut so no tag starts in one piece and ends in the next.
+    
+    A trailing "<..." short enough to be an unfinished <tr> or </tbody> is
+    carried over to the next piece, so row counting doesn't depend on how
+    the output happened to be chunked.
+    """
+    out, carry = [], ''
+    for piece in pieces:
+        piece = carry + piece
+        cut = piece.rfind('<', max(0, len(piece) - len('</tbody')))
+        if cut >= 0 and '>' not in piece[cut:]:
+            piece, carry = piece[:cut], piece[cut:]
         else:
-            html_parts.append('<div class="code-cell hidden">')
-        
-        # Code outputs
-        outputs = cell.get('outputs', [])
-        for output in outputs:
-            output_type = output.get('output_type', '')
-            
-            if output_type == 'stream':
-                # Text output (stdout/stderr)
-                text = output.get('text', [])
-                if isinstance(text, list):
-                    text = ''.join(text)
-                stream_name = output.get('name', 'stdout')
-                css_class = 'output-stderr' if stream_name == 'stderr' else ''
-                html_parts.append(f'<div class="code-output"><pre class="{css_class}">{escape_html(text)}</pre></div>')
-            
-            elif output_type in ('execute_result', 'display_data'):
-                data = output.get('data', {})
-                
-                # Prefer HTML output (for DataFrames)
-                if 'text/html' in data:
-                    html_out = data['text/html']
-                    if isinstance(html_out, list):
-                        html_out = ''.join(html_out)
-                    html_out = process_html_output(html_out)
-                    html_parts.append(f'<div class="code-output">{html_out}</div>')
-                
-                # Image output (plots)
-                elif 'image/png' in data:
+            carry = ''
+        out.append(piece)
+    if carry:
+        out.append(carry)
+    return out
+
+
+def bound_table_rows(html, max_rows: int = DEFAULT_MAX_TABLE_ROWS) -> str:
+    """
+    Join a text/html output, keeping the first and last rows of each <tbody>.
+    
+    Rows past the budget are dropped as they stream by (only the tail half
+    is buffered) and replaced by one elided-rows marker row.
+    """
+    pieces = _split_between_tags([html] if isinstance(html, str) else html)
+    if not max_rows or sum(
+            1 for piece in pieces for m in _TABLE_ROW_TAG_PATTERN.finditer(piece)
+            if not m.group(1) and m.group(2).lower() == 'tr') <= max_rows:
+        return ''.join(pieces)
+    
+    head_rows, tail_rows = -(-max_rows // 2), max_rows // 2
+    out = []
+    depth = 0           # <tbody> nesting, rows only counted at depth 1
+    rows_seen = 0
+    row = None          # segments of the current tail-region row
+    tail = deque()
+    dropped = 0
+    
+    def finish_row():
+        nonlocal row, dropped
+        if row is not None:
+            tail.append(''.join(row))
+            if len(tail) > tail_rows:
+                tail.popleft()
+                dropped += 1
+            row = None
+    
+    for piece in pieces:
+        pos = 0
+        for m in _TABLE_ROW_TAG_PATTERN.finditer(piece):
+            (row if row is not None else out).append(piece[pos:m.start()])
+            pos = m.start()
+            closing_tag, tag = m.group(1), m.group(2).lower()
+            if tag == 'tbody':
+                if not closing_tag:
+                    depth += 1
+                    if depth == 1:
+                        rows_seen = 0
+                elif depth == 1:
+                    finish_row()
+                    if dropped:
+                        out.append(f'<tr class="elided-rows"><td colspan="100">… {dropped:,} row{"s" if dropped != 1 else ""} omitted …</td></tr>\n')
+                    out.extend(tail)
+                    tail.clear()
+                    dropped = 0
+                    depth -= 1
+                else:
+                    depth = max(depth - 1, 0)
+            elif tag == 'tr' and not closing_tag and depth == 1:
+                rows_seen += 1
+                if rows_seen > head_rows:
+                    finish_row()
+                    row = []
+        (row if row is not None else out).append(piece[pos:])
+    
+    # Unclosed <tbody>: keep what was buffered
+    finish_row()
+    out.extend(tail)
+    return ''.join(out)
+
+
+# On-disk cache for downloaded markdown images
+IMAGE_CACHE_DIR = Path.home() / ".cache" / "notebook_to_html" / "images"
+IMAGE_CACHE_MAX_BYTES = 500 * 1024 * 1024
+IMAGE_FETCH_WORKERS = 8
+# Downloaded bytes kept in memory for the notebook being rendered
+IMAGE_MEMO_MAX_BYTES = 64 * 1024 * 1024
+
+
+class ImageFetcher:
+    """
+    Concurrent external-image downloader backed by an on-disk HTTP cache.
+    
+    Each URL is stored as <sha256(url)>.bin plus a .json sidecar holding the
+    content type and ETag/Last-Modified validators. Cached entries are
+    revalidated with a conditional GET (a 304 reuses the stored bytes) and
+    served stale if the host is unreachable. The cache is capped at
+    max_bytes, evicting least-recently-used entries (by file mtime).
+    
+    Fetched images are also kept in memory (up to memo_bytes) until clear()
+    is called after each notebook, so prefetched images are memory hits
+    while rendering but later renders revalidate them and retry failures.
+    With cache_dir=None nothing is read from or written to disk.
+    """
+    
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = IMAGE_CACHE_DIR,
+        max_bytes: int = IMAGE_CACHE_MAX_BYTES,
+        max_workers: int = IMAGE_FETCH_WORKERS,
+        timeout: float = 10,
+        memo_bytes: int = IMAGE_MEMO_MAX_BYTES,
+    ):
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.max_bytes = max_bytes
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.memo_bytes = memo_bytes
+        self._results = {}  # url -> (bytes, content_type), for the current notebook
+        self._results_bytes = 0
+        self._failed = set()  # urls that failed for the current notebook
+        self._lock = threading.Lock()
+        self._session = None
+    
+    def _get_session(self):
+        """One pooled session shared by all fetch threads"""
+        if self._session is None:
+            requests = load_optional('requests')
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=self.max_workers,
+                                                    pool_maxsize=self.max_workers)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._session = session
+        return self._session
+    
+    def _entry_paths(self, url: str) -> tuple:
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return self.cache_dir / f"{key}.bin", self.cache_dir / f"{key}.json"
+    
+    def _read_cache(self, url: str) -> Optional[tuple]:
+        """Return (bytes, meta) for a cached URL, marking it recently used"""
+        if self.cache_dir is None:
+            return None
+        data_path, meta_path = self._entry_paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding='utf-8'))
+            data = data_path.read_bytes()
+            os.utime(data_path)
+            return data, meta
+        except (OSError, ValueError):
+            return None
+    
+    def _write_cache(self, url: str, data: bytes, meta: dict) -> None:
+        if self.cache_dir is None:
+            return
+        data_path, meta_path = self._entry_paths(url)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+            for path, payload in ((data_path, data), (meta_path, json.dumps(meta).encode('utf-8'))):
+                tmp_path = path.with_name(path.name + suffix)
+                tmp_path.write_bytes(payload)
+                os.replace(tmp_path, path)
+        except OSError:
+            pass
+    
+    def _download(self, url: str) -> Optional[tuple]:
+        cached = self._read_cache(url)
+        headers = {}
+        if cached:
+            _, meta = cached
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        
+        try:
+            response = self._get_session().get(url, headers=headers, timeout=self.timeout)
+        except load_optional('requests').RequestException:
+            response = None
+        
+        if response is not None and response.status_code == 304 and cached:
+            data, meta = cached
+            return data, meta['content_type']
+        if response is not None and response.status_code == 200:
+            content_type = response.headers.get('content-type', 'image/png')
+            if 'image' not in content_type:
+                return None
+            self._write_cache(url, response.content, {
+                'url': url,
+                'content_type': content_type,
+                'etag': response.headers.get('etag'),
+                'last_modified': response.headers.get('last-modified'),
+            })
+            return response.content, content_type
+        if response is None and cached:
+            # Host unreachable: serve the stale copy rather than nothing
+            data, meta = cached
+            return data, meta['content_type']
+        return None
+    
+    def get(self, url: str) -> Optional[tuple]:
+        """(bytes, content_type) for url, downloading at most once per notebook"""
+        with self._lock:
+            if url in self._results:
+                return self._results[url]
+            if url in self._failed:
+                return None
+        result = self._download(url)
+        with self._lock:
+            if result is None:
+                self._failed.add(url)
+            elif url not in self._results and self._results_bytes + len(result[0]) <= self.memo_bytes:
+                self._results[url] = result
+                self._results_bytes += len(result[0])
+        return result
+    
+    def clear(self) -> None:
+        """Forget this notebook's images (the disk cache keeps them)"""
+        with self._lock:
+            self._results.clear()
+            self._results_bytes = 0
+            self._failed.clear()
+    
+    def prefetch(self, urls) -> None:
+        """Fetch all urls concurrently so later get() calls are memory hits"""
+        pending = [url for url in dict.fromkeys(urls) if url not in self._results and url not in self._failed]
+        if not pending:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as pool:
+            list(pool.map(self.get, pending))
+        self.evict()
+    
+    def evict(self) -> None:
+        """Delete least-recently-used entries until the cache fits in max_bytes"""
+        if self.cache_dir is None:
+            return
+        try:
+            entries = [(p.stat(), p) for p in self.cache_dir.glob('*.bin')]
+        except OSError:
+            return
+        total = sum(st.st_size for st, _ in entries)
+        for st, data_path in sorted(entries, key=lambda e: e[0].st_mtime):
+            if total <= self.max_bytes:
+                break
+            try:
+                data_path.unlink()
+                data_path.with_suffix('.json').unlink(missing_ok=True)
+                total -= st.st_size
+            except OSError:
+                pass
+
+
+_image_fetcher = None
+
+
+def get_image_fetcher(cache_dir: Optional[str] = None, disk_cache: bool = True) -> ImageFetcher:
+    """
+    Process-wide ImageFetcher; passing a different cache_dir replaces it.
+    
+    disk_cache=False switches to a fetcher without an on-disk cache.
+    """
+    global _image_fetcher
+    if not disk_cache:
+        if _image_fetcher is None or _image_fetcher.cache_dir is not None:
+            _image_fetcher = ImageFetcher(None)
+    elif cache_dir is None:
+        if _image_fetcher is None:
+            _image_fetcher = ImageFetcher(IMAGE_CACHE_DIR)
+    elif _image_fetcher is None or _image_fetcher.cache_dir != Path(cache_dir):
+        _image_fetcher = ImageFetcher(Path(cache_dir))
+    return _image_fetcher
+
+
+def clear_fetched_images() -> None:
+    """Release the images held for the notebook just rendered"""
+    if _image_fetcher is not None:
+        _image_fetcher.clear()
+
+
+def find_image_urls(source: str) -> list:
+    """
+    External image URLs in one markdown source, in order.
+    
+    These are the URLs convert_cell_to_html fetches: a markdown image's
+    target without its "title", and raw <img> sources with entities decoded.
+    """
+    urls = re.findall(r'!\[[^\]]*\]\(\s*(https?://[^)\s]+)', source)
+    urls.extend(html_unescape(url) for url in re.findall(r'<img[^>]+src="(https?://[^"]+)"', source))
+    return urls
+
+
+def collect_image_urls(cells) -> list:
+    """All external image URLs referenced by markdown cells, in order"""
+    urls = []
+    for cell in cells:
+        if cell.get('cell_type') != 'markdown':
+            continue
+        source = cell.get('source', [])
+        if isinstance(source, list):
+            source = ''.join(source)
+        urls.extend(find_image_urls(source))
+    return list(dict.fromkeys(urls))
+
+
+def fetch_external_image(url: str) -> Optional[tuple]:
+    """Download external image, returning (bytes, content_type) or None"""
+    if not has_requests():
+        return None
+    return get_image_fetcher().get(url)
+
+
+def embed_external_image(url: str) -> Optional[str]:
+    """Download external image and convert to base64 data URI"""
+    fetched = fetch_external_image(url)
+    if fetched is None:
+        return None
+    content, content_type = fetched
+    b64 = base64.b64encode(content).decode('utf-8')
+    return f"data:{content_type};base64,{b64}"
+
+
+def store_image_asset(data: bytes, content_type: str, assets_dir: Path) -> str:
+    """
+    Write image bytes to assets_dir under a content-hash name and return the name.
+    
+    Identical images map to the same file, so each one is stored only once
+    no matter how many cells or notebooks reference it.
+    """
+    mime = content_type.split(';')[0].strip()
+    ext = '.jpg' if mime == 'image/jpeg' else (mimetypes.guess_extension(mime) or '.bin')
+    name = hashlib.sha256(data).hexdigest()[:20] + ext
+    asset_path = assets_dir / name
+    if not asset_path.exists():
+        assets_dir.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so parallel workers never see a partial file
+        tmp_path = assets_dir / f".{name}.{os.getpid()}.tmp"
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, asset_path)
+    return name
+
+
+# Plot optimization: images are downscaled to the printable page width at
+# the target DPI and re-encoded; results are cached by content hash
+OPTIMIZED_IMAGE_CACHE_DIR = Path.home() / ".cache" / "notebook_to_html" / "optimized"
+OPTIMIZED_IMAGE_MEMO_MAX_BYTES = 64 * 1024 * 1024
+IMAGE_OPTIMIZE_WORKERS = os.cpu_count() or 4
+DEFAULT_IMAGE_DPI = 150
+PAGE_WIDTHS_MM = {"A4": 210, "A3": 297}
+IMAGE_FORMATS = {
+    "png": ("PNG", "image/png"),
+    "jpeg": ("JPEG", "image/jpeg"),
+    "webp": ("WEBP", "image/webp"),
+}
+
+
+def get_print_width_px(page_size: str = "A4", margins: str = "narrow", dpi: int = DEFAULT_IMAGE_DPI) -> int:
+    """Printable page width in pixels at dpi (matches the @page margins in get_base_css)"""
+    margin_mm = 10 if margins == "narrow" else 20
+    return round((PAGE_WIDTHS_MM.get(page_size, 210) - 2 * margin_mm) / 25.4 * dpi)
+
+
+def sniff_image_type(data: bytes) -> Optional[str]:
+    """Content type from the file signature, or None if unrecognised"""
+    if data[:8] == b'\x89PNG\r\n\x1a\n':
+        return 'image/png'
+    if data[:3] == b'\xff\xd8\xff':
+        return 'image/jpeg'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    return None
+
+
+class ImageOptimizer:
+    """
+    Downscales and re-encodes plot images for print, caching by content hash.
+    
+    Images wider than max_width are resized (Lanczos) and every image is
+    re-encoded as image_format; the result is used only if it is smaller
+    than the original. Results are kept on disk as <sha256>-<settings>.bin,
+    where an empty file means "the original is already the smallest"
+    (cache_dir=None disables this), and in memory up to memo_bytes, least
+    recently used first out. Pillow releases the GIL while resampling and
+    encoding, so prefetch() spreads the work over a thread pool.
+    """
+    
+    def __init__(
+        self,
+        max_width: int,
+        image_format: str = "png",
+        quality: int = 85,
+        cache_dir: Optional[Path] = OPTIMIZED_IMAGE_CACHE_DIR,
+        max_workers: int = IMAGE_OPTIMIZE_WORKERS,
+        memo_bytes: int = OPTIMIZED_IMAGE_MEMO_MAX_BYTES,
+    ):
+        self.max_width = max_width
+        self.image_format = image_format
+        self.quality = quality
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.max_workers = max_workers
+        self.memo_bytes = memo_bytes
+        self.settings = f"{image_format}-{max_width}-q{quality}"
+        self._results = OrderedDict()  # sha256 -> (bytes, content_type) or None, LRU order
+        self._results_bytes = 0
+        self._lock = threading.Lock()
+    
+    def _encode(self, data: bytes) -> bytes:
+        Image = load_optional('PIL.Image')
+        with Image.open(BytesIO(data)) as image:
+            image.load()
+            if image.width > self.max_width:
+                height = max(1, round(image.height * self.max_width / image.width))
+                image = image.resize((self.max_width, height), Image.LANCZOS)
+            pil_format, _ = IMAGE_FORMATS[self.image_format]
+            if pil_format == "JPEG" and image.mode != "RGB":
+                # JPEG has no alpha: flatten onto the white page background
+                rgba = image.convert("RGBA")
+                image = Image.new("RGB", rgba.size, (255, 255, 255))
+                image.paste(rgba, mask=rgba.getchannel("A"))
+            out = BytesIO()
+            if pil_format == "PNG":
+                image.save(out, "PNG", optimize=True)
+            elif pil_format == "JPEG":
+                image.save(out, "JPEG", quality=self.quality, optimize=True, progressive=True)
+            else:
+                image.save(out, "WEBP", quality=self.quality, method=4)
+            return out.getvalue()
+    
+    def _optimize(self, key: str, data: bytes) -> Optional[tuple]:
+        cache_path = self.cache_dir / f"{key}-{self.settings}.bin" if self.cache_dir is not None else None
+        if cache_path is not None:
+            try:
+                cached = cache_path.read_bytes()
+                return (cached, IMAGE_FORMATS[self.image_format][1]) if cached else None
+            except OSError:
+                pass
+        
+        try:
+            encoded = self._encode(data)
+        except Exception:
+            # Not an image Pillow can read: keep the original
+            return None
+        result = encoded if len(encoded) < len(data) else b''
+        if cache_path is not None:
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+                tmp_path.write_bytes(result)
+                os.replace(tmp_path, cache_path)
+            except OSError:
+                pass
+        return (result, IMAGE_FORMATS[self.image_format][1]) if result else None
+    
+    def optimize(self, data: bytes, content_type: str = 'image/png') -> tuple:
+        """(bytes, content_type) for the optimized image, or the original if that is smaller"""
+        key = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                result = self._results[key]
+                return result if result else (data, content_type)
+        result = self._optimize(key, data)
+        with self._lock:
+            if key not in self._results:
+                self._results[key] = result
+                self._results_bytes += self._memo_size(key, result)
+                while self._results_bytes > self.memo_bytes and self._results:
+                    old_key, old_result = self._results.popitem(last=False)
+                    self._results_bytes -= self._memo_size(old_key, old_result)
+        return result if result else (data, content_type)
+    
+    @staticmethod
+    def _memo_size(key: str, result: Optional[tuple]) -> int:
+        """Bytes charged to the memo for one entry ("keep the original" entries count their key)"""
+        return len(key) + (len(result[0]) if result else 0)
+    
+    def prefetch(self, images) -> None:
+        """Optimize all images (raw bytes) concurrently so later optimize() calls are memory hits"""
+        images = list(images)
+        if not images:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(images))) as pool:
+            list(pool.map(self.optimize, images))
+
+
+_image_optimizer = None
+
+
+def get_image_optimizer(max_width: int, image_format: str = "png", disk_cache: bool = True) -> ImageOptimizer:
+    """Process-wide ImageOptimizer; different settings replace it"""
+    global _image_optimizer
+    if (_image_optimizer is None or _image_optimizer.max_width != max_width
+            or _image_optimizer.image_format != image_format
+            or (_image_optimizer.cache_dir is not None) != disk_cache):
+        _image_optimizer = ImageOptimizer(max_width, image_format,
+                                          cache_dir=OPTIMIZED_IMAGE_CACHE_DIR if disk_cache else None)
+    return _image_optimizer
+
+
+def collect_output_images(cells) -> list:
+    """Decoded image/png outputs of code cells, in order"""
+    images = []
+    for cell in cells:
+        if cell.get('cell_type') != 'code':
+            continue
+        for output in cell.get('outputs', []):
+            img_data = output.get('data', {}).get('image/png')
+            if img_data is None or 'text/html' in output.get('data', {}):
+                continue
+            if isinstance(img_data, list):
+                img_data = ''.join(img_data)
+            images.append(base64.b64decode(img_data))
+    return images
+
+
+_DATA_IMAGE_PATTERN = re.compile(r'src="data:(image/[\w.+-]+);base64,([A-Za-z0-9+/=\s]+)"')
+
+
+def externalize_data_images(html: str, assets_dir: Path, assets_url: str) -> str:
+    """Move inline data-URI images in html into assets_dir (see store_image_asset)"""
+    if 'src="data:image/' not in html:
+        return html
+    return _DATA_IMAGE_PATTERN.sub(
+        lambda m: f'src="{assets_url}/{store_image_asset(base64.b64decode(m.group(2)), m.group(1), assets_dir)}"',
+        html,
+    )
+
+
+def convert_cell_to_html(
+    cell: dict,
+    show_code: bool = True,
+    embed_images: bool = True,
+    syntax_theme: str = "github",
+    assets_dir: Optional[Path] = None,
+    assets_url: str = "assets",
+    language: str = "python",
+    image_optimizer: Optional[ImageOptimizer] = None,
+    max_table_rows: int = DEFAULT_MAX_TABLE_ROWS,
+    max_stream_lines: int = DEFAULT_MAX_STREAM_LINES,
+    max_output_bytes: int = DEFAULT_MAX_OUTPUT_BYTES,
+) -> str:
+    """
+    Convert a single notebook cell to HTML.
+    
+    If assets_dir is given, images are written there (see store_image_asset)
+    and referenced as assets_url/<hash>.<ext> instead of inlined data URIs.
+    If image_optimizer is given, plot images go through it first.
+    Text and table outputs are cut to the max_* budgets (0 = unlimited).
+    """
+    cell_type = cell.get('cell_type', '')
+    source = cell.get('source', [])
+    if isinstance(source, list):
+        source = ''.join(source)
+    
+    html_parts = []
+    
+    if cell_type == 'markdown':
+        # Process markdown cell
+        with profile_stage('markdown'):
+            md_html = convert_markdown_to_html(source)
+        
+        # Images pasted into markdown as data URIs go to the assets folder too
+        if assets_dir is not None:
+            md_html = externalize_data_images(md_html, assets_dir, assets_url)
+        
+        # Embed external images if requested
+        if embed_images and has_requests():
+            with profile_stage('embed external images'):
+                # Find all image URLs
+                img_pattern = r'<img[^>]+src="(https?://[^"]+)"'
+                for match in re.finditer(img_pattern, md_html):
+                    src = match.group(1)
+                    url = html_unescape(src)
+                    if assets_dir is not None:
+                        fetched = fetch_external_image(url)
+                        embedded = None
+                        if fetched:
+                            content, content_type = fetched
+                            embedded = f"{assets_url}/{store_image_asset(content, content_type, assets_dir)}"
+                    else:
+                        embedded = embed_external_image(url)
+                    if embedded:
+                        md_html = md_html.replace(f'src="{src}"', f'src="{embedded}"')
+        
+        html_parts.append(f'<div class="markdown-cell">{md_html}</div>')
+    
+    elif cell_type == 'code':
+        # Code input
+        if show_code and source.strip():
+            with profile_stage('highlight'):
+                highlighted = highlight_code(source.strip(), language)
+            html_parts.append(f'<div class="code-cell"><div class="code-input">{highlighted}</div>')
+        else:
+            html_parts.append('<div class="code-cell hidden">')
+        
+        # Code outputs
+        outputs = cell.get('outputs', [])
+        for output in outputs:
+            output_type = output.get('output_type', '')
+            
+            if output_type == 'stream':
+                # Text output (stdout/stderr)
+                text = bound_text_output(output.get('text', []), max_stream_lines, max_output_bytes)
+                stream_name = output.get('name', 'stdout')
+                css_class = 'output-stderr' if stream_name == 'stderr' else ''
+                html_parts.append(f'<div class="code-output"><pre class="{css_class}">{escape_html(text)}</pre></div>')
+            
+            elif output_type in ('execute_result', 'display_data'):
+                data = output.get('data', {})
+                
+                # Prefer HTML output (for DataFrames)
+                if 'text/html' in data:
+                    html_out = bound_table_rows(data['text/html'], max_table_rows)
+                    if max_output_bytes and len(html_out.encode('utf-8')) > max_output_bytes:
+                        # Still too big to cut safely: fall back to the plain-text repr
+                        size_mb = len(html_out.encode('utf-8')) / (1024 * 1024)
+                        text = bound_text_output(data.get('text/plain', ''), max_stream_lines, max_output_bytes)
+                        if text and not text.endswith('\n'):
+                            text += '\n'
+                        html_parts.append(f'<div class="code-output"><pre>{escape_html(text)}'
+                                          f'… HTML output omitted ({size_mb:.1f} MB) …</pre></div>')
+                    else:
+                        with profile_stage('html output'):
+                            html_out = process_html_output(html_out)
+                        if assets_dir is not None:
+                            html_out = externalize_data_images(html_out, assets_dir, assets_url)
+                        html_parts.append(f'<div class="code-output">{html_out}</div>')
+                
+                # Image output (plots)
+                elif 'image/png' in data:
                     img_data = data['image/png']
                     if isinstance(img_data, list):
                         img_data = ''.join(img_data)
                     
-                    # Get dimensions for aspect-ratio class
-                    width, height = get_image_dimensions_from_base64(img_data)
-                    img_class = get_image_class(width, height)
+                    with profile_stage('png output'):
+                        # Get dimensions for aspect-ratio class
+                        width, height = get_image_dimensions_from_base64(img_data)
+                        img_class = get_image_class(width, height)
+                        
+                        content_type = 'image/png'
+                        if image_optimizer is not None:
+                            raw = base64.b64decode(img_data)
+                            optimized, content_type = image_optimizer.optimize(raw)
+                            if optimized is not raw:
+                                img_data = base64.b64encode(optimized).decode('ascii')
+                        
+                        if assets_dir is not None:
+                            name = store_image_asset(base64.b64decode(img_data), content_type, assets_dir)
+                            src = f"{assets_url}/{name}"
+                        else:
+                            src = f"data:{content_type};base64,{img_data}"
                     
-                    html_parts.append(f'<div class="plot-output"><img class="notebook-image {img_class}" src="data:image/png;base64,{img_data}"></div>')
+                    html_parts.append(f'<div class="plot-output"><img class="notebook-image {img_class}" src="{src}"></div>')
                 
                 # Plain text fallback
                 elif 'text/plain' in data:
-                    text = data['text/plain']
-                    if isinstance(text, list):
-                        text = ''.join(text)
+                    text = bound_text_output(data['text/plain'], max_stream_lines, max_output_bytes)
                     html_parts.append(f'<div class="code-output"><pre>{escape_html(text)}</pre></div>')
             
             elif output_type == 'error':
                 # Error output
                 traceback = output.get('traceback', [])
                 if isinstance(traceback, list):
-                    traceback = '\n'.join(traceback)
+                    # Frames are newline-joined; bound them without joining first
+                    frames = (frame + '\n' for frame in traceback)
+                    traceback = bound_text_output(frames, max_stream_lines, max_output_bytes).removesuffix('\n')
+                else:
+                    traceback = bound_text_output(traceback, max_stream_lines, max_output_bytes)
                 # Remove ANSI color codes
                 traceback = re.sub(r'\x1b\[[0-9;]*m', '', traceback)
                 html_parts.append(f'<div class="code-output"><pre class="output-stderr">{escape_html(traceback)}</pre></div>')
@@ -804,6 +2296,470 @@ def convert_cell_to_html(cell: dict, show_code: bool = True, embed_images: bool
     return '\n'.join(html_parts)
 
 
+# =============================================================================
+# NOTEBOOK READING / DOCUMENT WRITING
+# =============================================================================
+
+def iter_notebook_cells(input_path: Path, stream: bool = False) -> Iterator[dict]:
+    """
+    Yield notebook cells in order.
+    
+    With stream=True (and ijson installed) cells are parsed one at a time
+    from disk, so only the current cell is held in memory. Otherwise the
+    whole notebook is loaded with json.load.
+    """
+    if stream and has_ijson():
+        with open(input_path, 'rb') as f:
+            yield from load_optional('ijson').items(f, 'cells.item')
+    else:
+        with open(input_path, 'r', encoding='utf-8') as f:
+            notebook = json.load(f)
+        yield from notebook.get('cells', [])
+
+
+def find_markdown_title(source: str) -> Optional[str]:
+    """The first H1 in a markdown source, or None"""
+    match = re.search(r'^#\s+(.+)$', source, re.MULTILINE)
+    return match.group(1).strip() if match else None
+
+
+def get_notebook_title(cells, default: str) -> str:
+    """Return the first markdown H1 in the cells, or default"""
+    for cell in cells:
+        if cell.get('cell_type') == 'markdown':
+            source = cell.get('source', [])
+            if isinstance(source, list):
+                source = ''.join(source)
+            title = find_markdown_title(source)
+            if title is not None:
+                return title
+    return default
+
+
+def scan_notebook(input_path: Path) -> tuple:
+    """
+    (title, metadata, image_urls) in one streaming pass (needs ijson).
+    
+    Only the current cell's source is held while its markdown is searched
+    for a title and image URLs; the top-level metadata object (written
+    after the cells by nbformat) is built from the events as they go by.
+    title is None if no markdown cell has an H1.
+    """
+    ijson = load_optional('ijson')
+    title, metadata, urls = None, {}, []
+    cell_type, source = None, []
+    builder = None
+    with open(input_path, 'rb') as f:
+        for prefix, event, value in ijson.parse(f):
+            if prefix == 'cells.item.source' and event == 'string' or prefix == 'cells.item.source.item':
+                source.append(value)
+            elif prefix == 'cells.item.cell_type':
+                cell_type = value
+            elif prefix == 'cells.item' and event == 'end_map':
+                if cell_type == 'markdown':
+                    text = ''.join(source)
+                    if title is None:
+                        title = find_markdown_title(text)
+                    urls.extend(find_image_urls(text))
+                cell_type, source = None, []
+            elif prefix == 'metadata' or prefix.startswith('metadata.'):
+                if builder is None:
+                    builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+                if prefix == 'metadata' and event == 'end_map':
+                    metadata = builder.value
+    return title, metadata, list(dict.fromkeys(urls))
+
+
+def load_notebook(input_path: Path, stream: bool = False) -> tuple:
+    """
+    (title, language, cells, image_urls) for a notebook.
+    
+    The title is the first markdown H1, or the file name; image_urls are
+    the external images its markdown references (see collect_image_urls).
+    When streaming, cells is a lazy iterator and everything else comes
+    from a single pre-pass (see scan_notebook), so nothing is retained.
+    """
+    if stream:
+        with profile_stage('scan notebook'):
+            title, metadata, image_urls = scan_notebook(input_path)
+        if title is None:
+            title = input_path.stem
+        cells = iter_notebook_cells(input_path, stream=True)
+    else:
+        with profile_stage('load notebook'), open(input_path, 'r', encoding='utf-8') as f:
+            notebook = json.load(f)
+        metadata = notebook.get('metadata', {})
+        cells = notebook.get('cells', [])
+        title = get_notebook_title(cells, input_path.stem)
+        image_urls = collect_image_urls(cells)
+    return title, get_notebook_language(metadata), cells, image_urls
+
+
+def prepare_images(
+    image_urls: list,
+    cells,
+    stream: bool,
+    embed_images: bool,
+    image_cache_dir: Optional[str],
+    optimize_images: Optional[str],
+    max_width: int,
+    disk_cache: bool = True,
+) -> Optional[ImageOptimizer]:
+    """
+    Prefetch a notebook's external images and optimize its plots up front.
+    
+    Both run across thread pools before rendering starts. Streaming mode
+    skips the plot prefetch (it would hold every image at once) and plots
+    are optimized cell by cell. image_urls comes from load_notebook (or
+    collect_image_urls). With disk_cache=False neither the downloads nor
+    the optimized plots touch the on-disk caches. Returns the
+    ImageOptimizer to render with, or None when optimization is off or
+    Pillow is missing.
+    """
+    if embed_images and has_requests():
+        with profile_stage('prefetch images'):
+            get_image_fetcher(image_cache_dir or IMAGE_CACHE_DIR, disk_cache).prefetch(image_urls)
+    
+    if not optimize_images:
+        return None
+    if not has_pil():
+        print("• Image optimization skipped: Pillow not installed (pip install pillow)")
+        return None
+    image_optimizer = get_image_optimizer(max_width, optimize_images, disk_cache)
+    if not stream:
+        with profile_stage('optimize images'):
+            image_optimizer.prefetch(collect_output_images(cells))
+    return image_optimizer
+
+
+def get_document_css(page_size: str, margins: str, syntax_theme: str) -> str:
+    """All CSS for a rendered document"""
+    return '\n'.join([
+        get_google_fonts_css(),
+        get_base_css(page_size, margins),
+        get_table_css(),
+        get_code_css(syntax_theme),
+        get_image_css(),
+        get_markdown_css(),
+        get_syntax_highlight_css(syntax_theme),
+    ])
+
+
+def get_document_head(title: str, all_css: str) -> str:
+    """Everything up to and including the opening notebook container"""
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{escape_html(title)}</title>
+    <style>
+{all_css}
+    </style>
+</head>
+<body>
+    <div class="notebook-container">
+"""
+
+
+def get_document_tail() -> str:
+    """Closing tags matching get_document_head"""
+    return """
+    </div>
+</body>
+</html>
+"""
+
+
+def write_html_document(output_path: Path, head: str, body_parts, tail: str) -> None:
+    """
+    Write head, each body part and tail straight to disk.
+    
+    Parts are written as they are produced (body_parts may be a generator),
+    into a temporary file that replaces output_path only once complete.
+    """
+    tmp_path = output_path.with_name(output_path.name + '.tmp')
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(head)
+            first = True
+            for part in body_parts:
+                if not first:
+                    f.write('\n')
+                f.write(part)
+                first = False
+            f.write(tail)
+        os.replace(tmp_path, output_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+# =============================================================================
+# IN-MEMORY CONVERSION
+# =============================================================================
+
+def parse_notebook(notebook) -> dict:
+    """Notebook JSON as a dict, given a dict, JSON text or encoded bytes"""
+    if isinstance(notebook, dict):
+        return notebook
+    return json.loads(notebook)
+
+
+def iter_notebook_html(
+    notebook,
+    default_title: str = "Notebook",
+    page_size: Literal["A4", "A3"] = "A4",
+    margins: Literal["narrow", "normal"] = "narrow",
+    show_code: bool = True,
+    embed_images: bool = True,
+    syntax_theme: Literal["github", "friendly", "monokai"] = "github",
+    optimize_images: Optional[Literal["png", "jpeg", "webp"]] = None,
+    image_dpi: int = DEFAULT_IMAGE_DPI,
+    max_table_rows: int = DEFAULT_MAX_TABLE_ROWS,
+    max_stream_lines: int = DEFAULT_MAX_STREAM_LINES,
+    max_output_bytes: int = DEFAULT_MAX_OUTPUT_BYTES,
+    image_cache_dir: Optional[str] = None,
+    encoding: Optional[str] = None,
+) -> Iterator:
+    """
+    Render a notebook held in memory, yielding the HTML document in pieces.
+    
+    Images are always embedded, so the document is self-contained. By
+    default there is no filesystem I/O at all: downloaded images and
+    optimized plots are kept in memory for this render only. Joined, the
+    pieces equal the file convert_notebook writes for the same options.
+    
+    Args:
+        notebook: Notebook as a dict, JSON text or bytes
+        default_title: Title when the notebook has no markdown H1
+                       (convert_notebook uses the file name)
+        image_cache_dir: Use the on-disk caches for downloaded images (in this
+                         folder) and optimized plots, so repeated renders reuse them
+        encoding: Yield bytes in this encoding instead of str
+        (other arguments as for convert_notebook)
+    
+    Returns:
+        Iterator over the document's str (or bytes) pieces, rendered lazily
+    """
+    notebook = parse_notebook(notebook)
+    cells = notebook.get('cells', [])
+    language = get_notebook_language(notebook.get('metadata', {}))
+    title = get_notebook_title(cells, default_title)
+    
+    image_optimizer = prepare_images(collect_image_urls(cells), cells, False, embed_images, image_cache_dir,
+                                     optimize_images, get_print_width_px(page_size, margins, image_dpi),
+                                     disk_cache=image_cache_dir is not None)
+    
+    def render_parts():
+        try:
+            yield get_document_head(title, get_document_css(page_size, margins, syntax_theme))
+            first = True
+            for cell in cells:
+                cell_html = convert_cell_to_html(cell, show_code, embed_images, syntax_theme, None, "assets",
+                                                 language, image_optimizer, max_table_rows, max_stream_lines,
+                                                 max_output_bytes)
+                if not cell_html:
+                    continue
+                if not first:
+                    yield '\n'
+                yield cell_html
+                first = False
+            yield get_document_tail()
+        finally:
+            clear_fetched_images()
+    
+    if encoding is None:
+        return render_parts()
+    return (part.encode(encoding) for part in render_parts())
+
+
+def render_notebook_html(notebook, default_title: str = "Notebook", **options) -> str:
+    """
+    Render a notebook held in memory to a complete HTML document string.
+    
+    For chaining into html_to_word / html_to_pdf in one process without a
+    write/read round trip. Accepts the same options as iter_notebook_html.
+    """
+    return ''.join(iter_notebook_html(notebook, default_title, **options))
+
+
+# =============================================================================
+# BUILD CACHE
+# =============================================================================
+
+BUILD_CACHE_NAME = ".notebook_to_html_cache.sqlite"
+BUILD_CACHE_VERSION = 1
+
+
+def get_render_options(
+    page_size: str,
+    margins: str,
+    show_code: bool,
+    syntax_theme: str,
+    embed_images: bool,
+    assets: str = "embed",
+    optimize_images: Optional[str] = None,
+    image_dpi: int = DEFAULT_IMAGE_DPI,
+    max_table_rows: int = DEFAULT_MAX_TABLE_ROWS,
+    max_stream_lines: int = DEFAULT_MAX_STREAM_LINES,
+    max_output_bytes: int = DEFAULT_MAX_OUTPUT_BYTES,
+) -> str:
+    """Serialize the options that affect the rendered HTML into a cache key"""
+    return json.dumps({
+        "version": BUILD_CACHE_VERSION,
+        "page_size": page_size,
+        "margins": margins,
+        "show_code": show_code,
+        "theme": syntax_theme,
+        "embed_images": embed_images,
+        "assets": assets,
+        "optimize_images": optimize_images,
+        "image_dpi": image_dpi if optimize_images else None,
+        "budgets": [max_table_rows, max_stream_lines, max_output_bytes],
+    }, sort_keys=True)
+
+
+def hash_notebook_file(input_path: Path) -> str:
+    """SHA-256 of the notebook file, read in chunks so large files aren't held in memory"""
+    digest = hashlib.sha256()
+    with open(input_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _open_build_cache(out_dir: Path) -> sqlite3.Connection:
+    """Open (creating if needed) the build manifest stored next to the outputs"""
+    conn = sqlite3.connect(str(out_dir / BUILD_CACHE_NAME), timeout=30)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS builds ("
+        "output TEXT PRIMARY KEY, content_hash TEXT NOT NULL, options TEXT NOT NULL)"
+    )
+    return conn
+
+
+def is_build_cached(output_path: Path, content_hash: str, options: str, generate_pdf: bool = False) -> bool:
+    """True if output_path was built from this exact notebook content and options"""
+    output_path = Path(output_path)
+    if not output_path.exists():
+        return False
+    if generate_pdf and not output_path.with_suffix('.pdf').exists():
+        return False
+    try:
+        with closing(_open_build_cache(output_path.parent)) as conn:
+            row = conn.execute(
+                "SELECT content_hash, options FROM builds WHERE output = ?",
+                (output_path.name,),
+            ).fetchone()
+    except sqlite3.Error:
+        return False
+    return row == (content_hash, options)
+
+
+def get_cell_cache_key(cell: dict, cell_options: str) -> str:
+    """Hash of a cell's JSON plus the options that affect its HTML"""
+    cell_json = json.dumps(cell, sort_keys=True, default=str)
+    return hashlib.sha256(f"{cell_options}\0{cell_json}".encode('utf-8')).hexdigest()
+
+
+def record_build(output_path: Path, content_hash: str, options: str) -> None:
+    """Store the content hash and options used to build output_path"""
+    output_path = Path(output_path)
+    try:
+        with closing(_open_build_cache(output_path.parent)) as conn:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO builds (output, content_hash, options) VALUES (?, ?, ?)",
+                    (output_path.name, content_hash, options),
+                )
+    except sqlite3.Error as e:
+        print(f"✗ Could not update build cache: {e}")
+
+
+# =============================================================================
+# PDF RENDERING
+# =============================================================================
+
+def render_pdf(html: Optional[str], html_path: str) -> str:
+    """
+    Render a PDF next to html_path with weasyprint and return its path.
+    
+    Uses the HTML string when given (relative asset paths resolve against
+    html_path), otherwise reads html_path. Module-level so it can run in a
+    PDF worker process.
+    """
+    weasyprint = load_optional('weasyprint')
+    pdf_path = Path(html_path).with_suffix('.pdf')
+    if html is None:
+        weasyprint.HTML(filename=str(html_path)).write_pdf(str(pdf_path))
+    else:
+        weasyprint.HTML(string=html, base_url=str(html_path)).write_pdf(str(pdf_path))
+    return str(pdf_path)
+
+
+class PdfPipeline:
+    """
+    PDF rendering stage backed by a bounded process pool.
+    
+    HTML generation carries on while earlier notebooks render to PDF. At most
+    two jobs per worker are queued at once so finished HTML strings don't pile
+    up in memory. Nothing is printed on submit (it may run inside a notebook's
+    log); report() prints finished results in submission order.
+    """
+    
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self.pool = ProcessPoolExecutor(max_workers=max_workers)
+        self.jobs = []  # (html_path, future) in submission order
+        self.reported = 0
+    
+    def submit(self, html: Optional[str], html_path: str) -> None:
+        while True:
+            running = [future for _, future in self.jobs[self.reported:] if not future.done()]
+            if len(running) < self.max_workers * 2:
+                break
+            wait(running, return_when=FIRST_COMPLETED)
+        self.jobs.append((html_path, self.pool.submit(render_pdf, html, str(html_path))))
+    
+    def report(self) -> None:
+        """Print the PDFs finished so far, in submission order, without waiting"""
+        while self.reported < len(self.jobs) and self.jobs[self.reported][1].done():
+            self._report_next()
+    
+    def _report_next(self) -> None:
+        html_path, future = self.jobs[self.reported]
+        self.reported += 1
+        try:
+            print(f"✓ PDF generated: {future.result()}")
+        except Exception as e:
+            print(f"✗ PDF generation failed for {Path(html_path).name}: {e}")
+    
+    def finish(self) -> None:
+        """Wait for all queued PDFs, report them and shut the pool down"""
+        with profile_stage('pdf (wait for pool)'):
+            while self.reported < len(self.jobs):
+                self._report_next()
+        self.pool.shutdown()
+
+
+class PdfHandoff:
+    """
+    Stand-in for PdfPipeline inside a batch worker process.
+    
+    Keeps the (html, html_path) jobs convert_notebook submits so the worker
+    can return them and the parent queues them on its PdfPipeline, without
+    weasyprint reading the HTML back from disk.
+    """
+    
+    def __init__(self):
+        self.queued = []
+    
+    def submit(self, html: Optional[str], html_path: str) -> None:
+        self.queued.append((html, str(html_path)))
+
+
 def convert_notebook(
     input_path: str,
     output_path: Optional[str] = None,
@@ -813,6 +2769,19 @@ def convert_notebook(
     embed_images: bool = True,
     syntax_theme: Literal["github", "friendly", "monokai"] = "github",
     generate_pdf: bool = False,
+    force: bool = False,
+    stream: bool = False,
+    assets: Literal["embed", "external"] = "embed",
+    assets_dir: Optional[str] = None,
+    image_cache_dir: Optional[str] = None,
+    cell_cache: Optional[dict] = None,
+    pdf_pipeline: Optional[PdfPipeline] = None,
+    optimize_images: Optional[Literal["png", "jpeg", "webp"]] = None,
+    image_dpi: int = DEFAULT_IMAGE_DPI,
+    max_table_rows: int = DEFAULT_MAX_TABLE_ROWS,
+    max_stream_lines: int = DEFAULT_MAX_STREAM_LINES,
+    max_output_bytes: int = DEFAULT_MAX_OUTPUT_BYTES,
+    content_hash: Optional[str] = None,
 ) -> str:
     """
     Convert a Jupyter notebook to print-ready HTML.
@@ -826,6 +2795,22 @@ def convert_notebook(
         embed_images: Whether to download and embed external images as base64
         syntax_theme: Code syntax highlighting theme ("github", "friendly", "monokai")
         generate_pdf: Whether to also generate PDF using weasyprint (if available)
+        force: Rebuild even if the build cache says the output is up to date
+        stream: Parse cells incrementally (needs ijson) to keep memory flat
+        assets: "embed" inlines images as base64, "external" writes them to assets_dir
+        assets_dir: Folder for external assets (default: "assets" next to the HTML)
+        image_cache_dir: On-disk cache for downloaded images (default: ~/.cache/notebook_to_html/images)
+        cell_cache: Rendered cell HTML keyed by cell hash, reused across calls
+                    (see get_cell_cache_key); updated in place to this render's cells
+        pdf_pipeline: Queue the PDF on this pipeline (or PdfHandoff) instead of
+                      rendering it here; its owner has checked for weasyprint
+        optimize_images: Re-encode plots as "png", "jpeg" or "webp", downscaled to
+                         the printable width at image_dpi (needs Pillow; None = as-is)
+        image_dpi: Target print resolution for optimize_images
+        max_table_rows: DataFrame rows kept per table body, head and tail (0 = all)
+        max_stream_lines: Lines kept per text output, head and tail (0 = all)
+        max_output_bytes: Size budget per text/HTML output (0 = unlimited)
+        content_hash: hash_notebook_file(input_path), if the caller already has it
     
     Returns:
         Path to the generated HTML file
@@ -833,8 +2818,11 @@ def convert_notebook(
     
     # Read notebook
     input_path = Path(input_path)
-    with open(input_path, 'r', encoding='utf-8') as f:
-        notebook = json.load(f)
+    if _profiler is not None:
+        _profiler.notebook = input_path.name
+    if content_hash is None:
+        with profile_stage('hash notebook'):
+            content_hash = hash_notebook_file(input_path)
     
     # Determine output path
     if output_path is None:
@@ -843,68 +2831,86 @@ def convert_notebook(
         output_path = out_dir / input_path.with_suffix('.html').name
     output_path = Path(output_path)
     
-    # Get notebook title from first H1 or filename
-    title = input_path.stem
-    cells = notebook.get('cells', [])
-    for cell in cells:
-        if cell.get('cell_type') == 'markdown':
-            source = cell.get('source', [])
-            if isinstance(source, list):
-                source = ''.join(source)
-            match = re.search(r'^#\s+(.+)$', source, re.MULTILINE)
-            if match:
-                title = match.group(1).strip()
-                break
+    # Skip unchanged notebooks
+    options = get_render_options(page_size, margins, show_code, syntax_theme, embed_images, assets,
+                                 optimize_images, image_dpi, max_table_rows, max_stream_lines, max_output_bytes)
+    if not force and is_build_cached(output_path, content_hash, options, generate_pdf):
+        print(f"• Up to date: {output_path}")
+        return str(output_path)
     
-    # Build CSS
-    all_css = '\n'.join([
-        get_google_fonts_css(),
-        get_base_css(page_size, margins),
-        get_table_css(),
-        get_code_css(syntax_theme),
-        get_image_css(),
-        get_markdown_css(),
-        get_syntax_highlight_css(syntax_theme),
-    ])
+    if stream and not has_ijson():
+        print("• Streaming unavailable (pip install ijson), loading notebook in memory")
+        stream = False
     
-    # Convert cells
-    body_parts = []
-    for cell in cells:
-        cell_html = convert_cell_to_html(cell, show_code, embed_images, syntax_theme)
-        if cell_html:
-            body_parts.append(cell_html)
+    title, language, cells, image_urls = load_notebook(input_path, stream)
+    all_css = get_document_css(page_size, margins, syntax_theme)
     
-    # Build full HTML document
-    html_document = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{escape_html(title)}</title>
-    <style>
-{all_css}
-    </style>
-</head>
-<body>
-    <div class="notebook-container">
-{chr(10).join(body_parts)}
-    </div>
-</body>
-</html>
-"""
+    # Images go to a shared assets folder, referenced relative to the HTML
+    if assets == "external":
+        assets_dir = Path(assets_dir) if assets_dir else output_path.parent / "assets"
+        assets_url = Path(os.path.relpath(assets_dir, output_path.parent)).as_posix()
+    else:
+        assets_dir, assets_url = None, "assets"
     
-    # Write HTML
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(html_document)
+    image_optimizer = prepare_images(image_urls, cells, stream, embed_images, image_cache_dir,
+                                     optimize_images, get_print_width_px(page_size, margins, image_dpi))
     
-    print(f"✓ HTML generated: {output_path}")
+    # Convert cells, writing each one as soon as it is rendered
+    rendered_cells = {}
+    stats = {'cells': 0, 'rendered': 0}
+    cell_options = f"{options}|{language}|{assets_url}"
+    
+    def render_cells():
+        for index, cell in enumerate(cells):
+            stats['cells'] += 1
+            cell_html = None
+            if cell_cache is not None:
+                key = get_cell_cache_key(cell, cell_options)
+                cell_html = cell_cache.get(key)
+            if cell_html is None:
+                stats['rendered'] += 1
+                with profile_cell(index, cell.get('cell_type', '')):
+                    cell_html = convert_cell_to_html(cell, show_code, embed_images, syntax_theme, assets_dir, assets_url,
+                                                     language, image_optimizer, max_table_rows, max_stream_lines,
+                                                     max_output_bytes)
+            if cell_cache is not None:
+                rendered_cells[key] = cell_html
+            if cell_html:
+                yield cell_html
+    
+    # Keep the rendered parts for the PDF so weasyprint doesn't re-read the
+    # file (not in streaming mode, which exists to avoid holding them)
+    head, tail = get_document_head(title, all_css), get_document_tail()
+    body_parts = None
+    if generate_pdf and not stream:
+        body_parts = []
+        def render_cells(render_cells=render_cells):
+            for cell_html in render_cells():
+                body_parts.append(cell_html)
+                yield cell_html
+    
+    try:
+        write_html_document(output_path, head, render_cells(), tail)
+    finally:
+        clear_fetched_images()
+    
+    if cell_cache is not None:
+        # Keep only this render's cells so the cache tracks the current notebook
+        cell_cache.clear()
+        cell_cache.update(rendered_cells)
+        print(f"✓ HTML generated: {output_path} ({stats['rendered']} of {stats['cells']} cells re-rendered)")
+    else:
+        print(f"✓ HTML generated: {output_path}")
     
     # Generate PDF if requested
     if generate_pdf:
-        if HAS_WEASYPRINT:
-            pdf_path = output_path.with_suffix('.pdf')
+        html_document = head + '\n'.join(body_parts) + tail if body_parts is not None else None
+        if pdf_pipeline is not None:
+            pdf_pipeline.submit(html_document, str(output_path))
+        elif has_weasyprint():
             try:
-                WeasyHTML(filename=str(output_path)).write_pdf(str(pdf_path))
+                with profile_stage('pdf'):
+                    pdf_path = render_pdf(html_document, str(output_path))
                 print(f"✓ PDF generated: {pdf_path}")
             except Exception as e:
                 print(f"✗ PDF generation failed: {e}")
@@ -913,9 +2919,51 @@ def convert_notebook(
             print("  Install with: pip install weasyprint")
             print("  Or open the HTML in a browser and print to PDF")
     
+    record_build(output_path, content_hash, options)
+    
     return str(output_path)
 
 
+def _convert_notebook_worker(kwargs: dict, capture: bool = True) -> tuple:
+    """Run convert_notebook in a pool worker, capturing its console output.
+
+    Returns (result_path, captured_log, error_message, pdf_jobs) so the parent
+    process can print each notebook's messages in a stable order and keep one
+    failing notebook from aborting the rest of the batch. pdf_jobs are the
+    (html, html_path) pairs queued when pdf_pipeline is a PdfHandoff. With
+    capture=False (serial runs) messages go straight to the console and the
+    log is empty.
+    """
+    log = StringIO()
+    try:
+        with redirect_stdout(log) if capture else nullcontext():
+            result = convert_notebook(**kwargs)
+        handoff = kwargs.get('pdf_pipeline')
+        pdf_jobs = handoff.queued if isinstance(handoff, PdfHandoff) else []
+        return result, log.getvalue(), None, pdf_jobs
+    except Exception as e:
+        return None, log.getvalue(), str(e), []
+
+
+def get_pool_sizes(jobs: Optional[int], pdf_jobs: Optional[int], generate_pdf: bool) -> tuple:
+    """
+    (HTML workers, PDF workers) for a batch, sharing the CPU cores.
+    
+    HTML and PDF pools run at the same time, so with generate_pdf the
+    defaults split the cores: PDFs get half (or whatever an explicit jobs
+    leaves) and HTML the rest, each at least one. Explicit values are kept.
+    """
+    cores = os.cpu_count() or 1
+    if not generate_pdf:
+        return max(1, cores if jobs is None else jobs), 0
+    if pdf_jobs is None:
+        pdf_jobs = cores - jobs if jobs is not None else cores // 2
+    pdf_jobs = max(1, pdf_jobs)
+    if jobs is None:
+        jobs = cores - pdf_jobs
+    return max(1, jobs), pdf_jobs
+
+
 def batch_convert(
     input_dir: str,
     output_dir: Optional[str] = None,
@@ -925,6 +2973,17 @@ def batch_convert(
     embed_images: bool = True,
     syntax_theme: Literal["github", "friendly", "monokai"] = "github",
     generate_pdf: bool = False,
+    jobs: Optional[int] = None,
+    force: bool = False,
+    stream: bool = False,
+    assets: Literal["embed", "external"] = "embed",
+    image_cache_dir: Optional[str] = None,
+    pdf_jobs: Optional[int] = None,
+    optimize_images: Optional[Literal["png", "jpeg", "webp"]] = None,
+    image_dpi: int = DEFAULT_IMAGE_DPI,
+    max_table_rows: int = DEFAULT_MAX_TABLE_ROWS,
+    max_stream_lines: int = DEFAULT_MAX_STREAM_LINES,
+    max_output_bytes: int = DEFAULT_MAX_OUTPUT_BYTES,
 ) -> list:
     """
     Batch convert all .ipynb files in a directory to HTML.
@@ -938,6 +2997,18 @@ def batch_convert(
         embed_images: Whether to download and embed external images as base64
         syntax_theme: Code syntax highlighting theme ("github", "friendly", "monokai")
         generate_pdf: Whether to also generate PDF using weasyprint (if available)
+        jobs: Number of worker processes (default: CPU count, less the PDF
+              workers when generating PDFs; 1 = serial)
+        force: Rebuild every notebook, ignoring the build cache
+        stream: Parse cells incrementally (needs ijson) to keep memory flat
+        assets: "embed" inlines images, "external" stores them once in output_dir/assets
+        image_cache_dir: On-disk cache for downloaded images (default: ~/.cache/notebook_to_html/images)
+        pdf_jobs: PDF worker processes (default: half the CPU count; see get_pool_sizes)
+        optimize_images: Re-encode plots as "png", "jpeg" or "webp" (see convert_notebook)
+        image_dpi: Target print resolution for optimize_images
+        max_table_rows: DataFrame rows kept per table body (0 = all)
+        max_stream_lines: Lines kept per text output (0 = all)
+        max_output_bytes: Size budget per text/HTML output (0 = unlimited)
     
     Returns:
         List of generated HTML file paths
@@ -950,38 +3021,756 @@ def batch_convert(
         output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    # Find all .ipynb files
-    notebook_files = list(input_dir.glob("*.ipynb"))
+    # Find all .ipynb files (sorted so output order is stable)
+    notebook_files = sorted(input_dir.glob("*.ipynb"))
     
     if not notebook_files:
         print(f"No .ipynb files found in {input_dir}")
         return []
     
     print(f"Found {len(notebook_files)} notebook(s) to convert...")
+    
+    if generate_pdf and not has_weasyprint():
+        print("✗ PDF generation skipped: weasyprint not installed")
+        print("  Install with: pip install weasyprint")
+        print("  Or open the HTML in a browser and print to PDF")
+        generate_pdf = False
+    
+    tasks = [
+        dict(
+            input_path=str(notebook_path),
+            output_path=str(output_dir / notebook_path.with_suffix('.html').name),
+            page_size=page_size,
+            margins=margins,
+            show_code=show_code,
+            embed_images=embed_images,
+            syntax_theme=syntax_theme,
+            generate_pdf=generate_pdf,
+            force=force,
+            stream=stream,
+            assets=assets,
+            image_cache_dir=image_cache_dir,
+            optimize_images=optimize_images,
+            image_dpi=image_dpi,
+            max_table_rows=max_table_rows,
+            max_stream_lines=max_stream_lines,
+            max_output_bytes=max_output_bytes,
+        )
+        for notebook_path in notebook_files
+    ]
+    
+    # Check the build cache up front so cache hits never reach the pool
+    options = get_render_options(page_size, margins, show_code, syntax_theme, embed_images, assets,
+                                 optimize_images, image_dpi, max_table_rows, max_stream_lines, max_output_bytes)
+    cached = []
+    for task in tasks:
+        try:
+            # Passed on so convert_notebook doesn't hash the file again
+            task['content_hash'] = hash_notebook_file(Path(task['input_path']))
+            hit = not force and is_build_cached(Path(task['output_path']), task['content_hash'], options, generate_pdf)
+        except OSError:
+            hit = False
+        cached.append(hit)
+    pending = [task for task, hit in zip(tasks, cached) if not hit]
+    
+    jobs, pdf_jobs = get_pool_sizes(jobs, pdf_jobs, generate_pdf)
+    jobs = min(jobs, max(1, len(pending)))
+    if jobs > 1:
+        print(f"Using {jobs} worker processes")
     print("-" * 50)
     
+    # PDFs render in their own pool while HTML generation moves on. Serial
+    # runs queue the HTML string directly; pool workers return theirs through
+    # a PdfHandoff and this process queues it, so weasyprint never re-reads
+    # the file (except in streaming mode, which doesn't keep the HTML).
+    pdf_pipeline = PdfPipeline(pdf_jobs) if generate_pdf else None
+    
     converted_files = []
-    for notebook_path in notebook_files:
-        output_path = output_dir / notebook_path.with_suffix('.html').name
+    cache_hits = 0
+    with ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else nullcontext() as pool:
+        if pool is not None:
+            # map() yields in submission order, so logs and the returned
+            # list match the serial path exactly
+            outcomes = pool.map(_convert_notebook_worker,
+                                [{**task, 'pdf_pipeline': PdfHandoff() if generate_pdf else None} for task in pending])
+        else:
+            outcomes = (_convert_notebook_worker({**task, 'pdf_pipeline': pdf_pipeline}, capture=False)
+                        for task in pending)
+        
+        for notebook_path, task, hit in zip(notebook_files, tasks, cached):
+            if hit:
+                print(f"• Up to date: {task['output_path']}")
+                converted_files.append(task['output_path'])
+                cache_hits += 1
+                continue
+            result, log, error, worker_pdf_jobs = next(outcomes)
+            print(log, end='')
+            if error is None:
+                converted_files.append(result)
+            else:
+                print(f"✗ Failed to convert {notebook_path.name}: {error}")
+            if pdf_pipeline is not None:
+                for html, html_path in worker_pdf_jobs:
+                    pdf_pipeline.submit(html, html_path)
+                pdf_pipeline.report()
+    
+    if pdf_pipeline is not None:
+        pdf_pipeline.finish()
+    
+    print("-" * 50)
+    print(f"Converted {len(converted_files)} of {len(notebook_files)} notebooks ({cache_hits} cache hits)")
+    
+    return converted_files
+
+
+# Folders never scanned by --recursive (matched by name at any depth)
+DEFAULT_IGNORE_DIRS = ('.ipynb_checkpoints', 'Temp', 'Old', 'HTML_Outputs', '.git')
+SCAN_WORKERS = 8
+
+
+def _scan_directory(directory: Path, ignore: frozenset) -> tuple:
+    """(subdirectories, notebooks) directly inside directory"""
+    subdirs, notebooks = [], []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name in ignore:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(Path(entry.path))
+                elif entry.name.endswith('.ipynb') and entry.is_file():
+                    notebooks.append(Path(entry.path))
+    except OSError as e:
+        print(f"✗ Cannot scan {directory}: {e}")
+    return subdirs, sorted(notebooks)
+
+
+def scan_notebooks(root: Path, ignore=DEFAULT_IGNORE_DIRS, workers: int = SCAN_WORKERS) -> Iterator[Path]:
+    """
+    Yield every .ipynb under root as soon as its folder has been listed.
+    
+    Folders are listed concurrently on a thread pool (os.scandir releases
+    the GIL, which pays off most on network drives); folders named in
+    ignore are skipped together with everything below them.
+    """
+    ignore = frozenset(ignore)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(_scan_directory, Path(root), ignore)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                subdirs, notebooks = future.result()
+                pending.update(pool.submit(_scan_directory, subdir, ignore) for subdir in subdirs)
+                yield from notebooks
+
+
+def convert_tree(
+    input_dir: str,
+    output_dir: Optional[str] = None,
+    page_size: Literal["A4", "A3"] = "A4",
+    margins: Literal["narrow", "normal"] = "narrow",
+    show_code: bool = True,
+    embed_images: bool = True,
+    syntax_theme: Literal["github", "friendly", "monokai"] = "github",
+    generate_pdf: bool = False,
+    jobs: Optional[int] = None,
+    force: bool = False,
+    stream: bool = False,
+    assets: Literal["embed", "external"] = "embed",
+    image_cache_dir: Optional[str] = None,
+    pdf_jobs: Optional[int] = None,
+    optimize_images: Optional[Literal["png", "jpeg", "webp"]] = None,
+    image_dpi: int = DEFAULT_IMAGE_DPI,
+    max_table_rows: int = DEFAULT_MAX_TABLE_ROWS,
+    max_stream_lines: int = DEFAULT_MAX_STREAM_LINES,
+    max_output_bytes: int = DEFAULT_MAX_OUTPUT_BYTES,
+    ignore=DEFAULT_IGNORE_DIRS,
+) -> list:
+    """
+    Convert every .ipynb in a folder tree, mirroring the folders under output_dir.
+    
+    A scanner thread walks the tree (see scan_notebooks) and queues notebooks
+    as it finds them; conversion starts on the first one instead of waiting
+    for the scan. With jobs > 1 notebooks go to a process pool and each log
+    is printed as its notebook finishes. External assets are shared by the
+    whole tree in output_dir/assets.
+    
+    Args:
+        input_dir: Root of the notebook tree
+        output_dir: Root of the mirrored output tree (default: input_dir/HTML_Outputs)
+        ignore: Folder names to skip at any depth
+        Other options are as for batch_convert
+    
+    Returns:
+        List of generated HTML file paths, sorted
+    """
+    input_dir = Path(input_dir).resolve()
+    output_dir = Path(output_dir).resolve() if output_dir else input_dir / "HTML_Outputs"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    if generate_pdf and not has_weasyprint():
+        print("✗ PDF generation skipped: weasyprint not installed")
+        print("  Install with: pip install weasyprint")
+        print("  Or open the HTML in a browser and print to PDF")
+        generate_pdf = False
+    
+    common = dict(
+        page_size=page_size,
+        margins=margins,
+        show_code=show_code,
+        embed_images=embed_images,
+        syntax_theme=syntax_theme,
+        generate_pdf=generate_pdf,
+        force=force,
+        stream=stream,
+        assets=assets,
+        assets_dir=str(output_dir / "assets") if assets == "external" else None,
+        image_cache_dir=image_cache_dir,
+        optimize_images=optimize_images,
+        image_dpi=image_dpi,
+        max_table_rows=max_table_rows,
+        max_stream_lines=max_stream_lines,
+        max_output_bytes=max_output_bytes,
+    )
+    options = get_render_options(page_size, margins, show_code, syntax_theme, embed_images, assets,
+                                 optimize_images, image_dpi, max_table_rows, max_stream_lines, max_output_bytes)
+    
+    # Producer: the scanner thread feeds notebooks to this thread
+    found = queue.Queue()
+    
+    def produce():
         try:
-            result = convert_notebook(
-                input_path=str(notebook_path),
-                output_path=str(output_path),
-                page_size=page_size,
-                margins=margins,
-                show_code=show_code,
-                embed_images=embed_images,
-                syntax_theme=syntax_theme,
-                generate_pdf=generate_pdf,
-            )
+            for notebook_path in scan_notebooks(input_dir, ignore):
+                found.put(notebook_path)
+        finally:
+            found.put(None)
+    
+    threading.Thread(target=produce, daemon=True).start()
+    
+    jobs, pdf_jobs = get_pool_sizes(jobs, pdf_jobs, generate_pdf)
+    print(f"Scanning {input_dir} ({jobs} worker process{'es' if jobs > 1 else ''})...")
+    print("-" * 50)
+    
+    pdf_pipeline = PdfPipeline(pdf_jobs) if generate_pdf else None
+    
+    converted_files = []
+    found_count = 0
+    cache_hits = 0
+    
+    def report(notebook_path: Path, outcome: tuple) -> None:
+        result, log, error, worker_pdf_jobs = outcome
+        print(log, end='')
+        if error is None:
             converted_files.append(result)
-        except Exception as e:
-            print(f"✗ Failed to convert {notebook_path.name}: {e}")
+        else:
+            print(f"✗ Failed to convert {notebook_path.relative_to(input_dir)}: {error}")
+        if pdf_pipeline is not None:
+            for html, html_path in worker_pdf_jobs:
+                pdf_pipeline.submit(html, html_path)
+            pdf_pipeline.report()
+    
+    # Consumer: convert (or hand to the pool) each notebook as it arrives
+    with ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else nullcontext() as pool:
+        running = {}
+        for notebook_path in iter(found.get, None):
+            found_count += 1
+            output_path = output_dir / notebook_path.relative_to(input_dir).with_suffix('.html')
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                content_hash = hash_notebook_file(notebook_path)
+                hit = not force and is_build_cached(output_path, content_hash, options, generate_pdf)
+            except OSError:
+                content_hash, hit = None, False
+            if hit:
+                print(f"• Up to date: {output_path}")
+                converted_files.append(str(output_path))
+                cache_hits += 1
+                continue
+            
+            task = dict(common, input_path=str(notebook_path), output_path=str(output_path), content_hash=content_hash)
+            if pool is None:
+                report(notebook_path, _convert_notebook_worker({**task, 'pdf_pipeline': pdf_pipeline}, capture=False))
+                continue
+            running[pool.submit(_convert_notebook_worker,
+                                {**task, 'pdf_pipeline': PdfHandoff() if generate_pdf else None})] = notebook_path
+            # Report whatever has finished meanwhile, without blocking the scan
+            for future in [f for f in running if f.done()]:
+                report(running.pop(future), future.result())
+        
+        for future in list(running):
+            report(running.pop(future), future.result())
+    
+    if pdf_pipeline is not None:
+        pdf_pipeline.finish()
     
     print("-" * 50)
-    print(f"Converted {len(converted_files)} of {len(notebook_files)} notebooks")
+    print(f"Converted {len(converted_files)} of {found_count} notebooks ({cache_hits} cache hits)")
+    return sorted(converted_files)
+
+
+def natural_sort_key(path) -> list:
+    """Sort key that orders "2. Intro.ipynb" before "10. Advanced.ipynb" """
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r'(\d+)', Path(path).name)]
+
+
+def convert_book(
+    input_dir: str,
+    output_path: Optional[str] = None,
+    title: Optional[str] = None,
+    page_size: Literal["A4", "A3"] = "A4",
+    margins: Literal["narrow", "normal"] = "narrow",
+    show_code: bool = True,
+    embed_images: bool = True,
+    syntax_theme: Literal["github", "friendly", "monokai"] = "github",
+    generate_pdf: bool = False,
+    force: bool = False,
+    stream: bool = False,
+    assets: Literal["embed", "external"] = "external",
+    image_cache_dir: Optional[str] = None,
+    optimize_images: Optional[Literal["png", "jpeg", "webp"]] = None,
+    image_dpi: int = DEFAULT_IMAGE_DPI,
+    max_table_rows: int = DEFAULT_MAX_TABLE_ROWS,
+    max_stream_lines: int = DEFAULT_MAX_STREAM_LINES,
+    max_output_bytes: int = DEFAULT_MAX_OUTPUT_BYTES,
+) -> Optional[str]:
+    """
+    Convert every .ipynb in a folder into one HTML "book".
     
-    return converted_files
+    Notebooks are taken in natural sort order and written one cell at a
+    time into a single document: the CSS is emitted once, a chapter index
+    (linking to each notebook's section) comes first, and each notebook
+    starts on a new printed page. With assets="external" (the default here)
+    identical images across chapters are stored once in the assets folder.
+    
+    Args:
+        input_dir: Folder of notebooks, one chapter each
+        output_path: Output HTML file (default: HTML_Outputs/<folder name>.html)
+        title: Book title (default: the folder name)
+        Other options are as for convert_notebook
+    
+    Returns:
+        Path to the generated HTML file, or None if there were no notebooks
+    """
+    input_dir = Path(input_dir).resolve()
+    notebook_files = sorted(input_dir.glob("*.ipynb"), key=natural_sort_key)
+    if not notebook_files:
+        print(f"No .ipynb files found in {input_dir}")
+        return None
+    
+    title = title or input_dir.name
+    if output_path is None:
+        out_dir = input_dir / "HTML_Outputs"
+        out_dir.mkdir(parents=True, exist_ok=True)
+        output_path = out_dir / f"{input_dir.name}.html"
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    # The book is up to date if every chapter and the chapter list are
+    options = get_render_options(page_size, margins, show_code, syntax_theme, embed_images, assets,
+                                 optimize_images, image_dpi, max_table_rows, max_stream_lines, max_output_bytes)
+    options = f"{options}|book|{title}"
+    digest = hashlib.sha256()
+    for notebook_path in notebook_files:
+        digest.update(f"{notebook_path.name}\0{hash_notebook_file(notebook_path)}\0".encode('utf-8'))
+    content_hash = digest.hexdigest()
+    if not force and is_build_cached(output_path, content_hash, options, generate_pdf):
+        print(f"• Up to date: {output_path}")
+        return str(output_path)
+    
+    if stream and not has_ijson():
+        print("• Streaming unavailable (pip install ijson), loading notebooks in memory")
+        stream = False
+    
+    if assets == "external":
+        assets_dir = output_path.parent / "assets"
+        assets_url = "assets"
+    else:
+        assets_dir, assets_url = None, "assets"
+    max_width = get_print_width_px(page_size, margins, image_dpi)
+    
+    # Chapter titles for the index (with ijson this stops at each first H1)
+    def chapter_title(path: Path) -> str:
+        try:
+            with closing(iter_notebook_cells(path, stream=has_ijson())) as cells:
+                return get_notebook_title(cells, path.stem)
+        except Exception:
+            return path.stem  # unreadable; reported when the chapter is rendered
+    
+    chapters = [chapter_title(path) for path in notebook_files]
+    failed = []
+    print(f"Building book from {len(notebook_files)} notebook(s)...")
+    print("-" * 50)
+    
+    def render_book():
+        index = ''.join(
+            f'<li><a href="#chapter-{number}">{escape_html(chapter)}</a></li>'
+            for number, chapter in enumerate(chapters, 1)
+        )
+        yield f'<nav class="book-index"><h1>{escape_html(title)}</h1><ol>{index}</ol></nav>'
+        
+        for number, notebook_path in enumerate(notebook_files, 1):
+            if _profiler is not None:
+                _profiler.notebook = notebook_path.name
+            yield f'<section class="book-chapter" id="chapter-{number}">'
+            try:
+                _, language, cells, image_urls = load_notebook(notebook_path, stream)
+                image_optimizer = prepare_images(image_urls, cells, stream, embed_images, image_cache_dir,
+                                                 optimize_images, max_width)
+                for cell_index, cell in enumerate(cells):
+                    with profile_cell(cell_index, cell.get('cell_type', '')):
+                        cell_html = convert_cell_to_html(cell, show_code, embed_images, syntax_theme, assets_dir,
+                                                         assets_url, language, image_optimizer, max_table_rows,
+                                                         max_stream_lines, max_output_bytes)
+                    if cell_html:
+                        yield cell_html
+                print(f"✓ Chapter {number}: {notebook_path.name}")
+            except Exception as e:
+                failed.append(notebook_path)
+                print(f"✗ Failed to convert {notebook_path.name}: {e}")
+            finally:
+                clear_fetched_images()
+            yield '</section>'
+    
+    head = get_document_head(title, get_document_css(page_size, margins, syntax_theme) + get_book_css())
+    write_html_document(output_path, head, render_book(), get_document_tail())
+    print("-" * 50)
+    if failed:
+        print(f"✗ Book generated with {len(failed)} failed chapter(s): {output_path}")
+    else:
+        print(f"✓ Book generated: {output_path}")
+    
+    # One PDF pass over the whole book
+    if generate_pdf:
+        if has_weasyprint():
+            try:
+                with profile_stage('pdf'):
+                    pdf_path = render_pdf(None, str(output_path))
+                print(f"✓ PDF generated: {pdf_path}")
+            except Exception as e:
+                print(f"✗ PDF generation failed: {e}")
+        else:
+            print("✗ PDF generation skipped: weasyprint not installed")
+            print("  Install with: pip install weasyprint")
+            print("  Or open the HTML in a browser and print to PDF")
+    
+    # A book with failed chapters is rebuilt next time, like a failed notebook
+    if not failed:
+        record_build(output_path, content_hash, options)
+    return str(output_path)
+
+
+def watch_notebooks(
+    input_path: str,
+    output: Optional[str] = None,
+    interval: float = 1.0,
+    **convert_options,
+) -> None:
+    """
+    Re-render a notebook (or every .ipynb in a folder) whenever it changes.
+    
+    Files are polled by modification time. Each notebook keeps a per-cell
+    render cache across runs, so an edit only re-renders the changed cells;
+    the output file is replaced atomically (see write_html_document). A
+    notebook's first render (including notebooks added while watching)
+    ignores the build cache to warm its cell cache. Stops on Ctrl+C.
+    
+    Args:
+        input_path: Notebook file or folder of notebooks to watch
+        output: Output HTML file (single notebook) or folder (folder input)
+        interval: Seconds between polls
+        **convert_options: Passed through to convert_notebook
+    """
+    input_path = Path(input_path)
+    if input_path.is_dir():
+        out_dir = Path(output) if output else input_path / "HTML_Outputs"
+        out_dir.mkdir(parents=True, exist_ok=True)
+    
+    cell_caches = {}
+    mtimes = {}
+    print(f"Watching {input_path} for changes (Ctrl+C to stop)...")
+    
+    try:
+        while True:
+            notebooks = sorted(input_path.glob("*.ipynb")) if input_path.is_dir() else [input_path]
+            for notebook_path in notebooks:
+                try:
+                    mtime = notebook_path.stat().st_mtime_ns
+                except OSError:
+                    continue
+                if mtimes.get(notebook_path) == mtime:
+                    continue
+                mtimes[notebook_path] = mtime
+                
+                if input_path.is_dir():
+                    output_path = str(out_dir / notebook_path.with_suffix('.html').name)
+                else:
+                    output_path = output
+                # A build-cache hit would leave the cell cache empty and the next
+                # edit would re-render every cell, so render until one succeeds
+                cell_cache = cell_caches.get(notebook_path, {})
+                force = notebook_path not in cell_caches or convert_options.get('force', False)
+                try:
+                    convert_notebook(
+                        input_path=str(notebook_path),
+                        output_path=output_path,
+                        cell_cache=cell_cache,
+                        **{**convert_options, 'force': force},
+                    )
+                    cell_caches[notebook_path] = cell_cache
+                except Exception as e:
+                    # Usually a half-saved notebook; the next save retries
+                    print(f"✗ Failed to convert {notebook_path.name}: {e}")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+
+
+# =============================================================================
+# RENDER SERVER
+# =============================================================================
+
+DEFAULT_SERVE_PORT = 8765
+DEFAULT_SERVE_CACHE_BYTES = 256 * 1024 * 1024
+
+# Query parameters a preview URL may override, e.g. ?theme=monokai&code=0
+SERVE_QUERY_OPTIONS = {
+    'theme': ('syntax_theme', ('github', 'friendly', 'monokai')),
+    'page-size': ('page_size', ('A4', 'A3')),
+    'margins': ('margins', ('narrow', 'normal')),
+    'code': ('show_code', ('0', '1')),
+}
+
+
+class RenderCache:
+    """
+    LRU cache of rendered pages, stored gzip-compressed.
+    
+    Keys are (path, mtime_ns, options), so saving a notebook or changing an
+    option misses naturally; older renders of the same page are dropped as
+    soon as a newer one is stored. Entries are evicted least-recently-used
+    once the compressed bodies exceed max_bytes.
+    """
+    
+    def __init__(self, max_bytes: int = DEFAULT_SERVE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # (path, mtime_ns, options) -> (gzip body, etag)
+        self._lock = threading.Lock()
+    
+    def get(self, key: tuple) -> Optional[tuple]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+    
+    def put(self, key: tuple, body: bytes, etag: str) -> None:
+        path, _, options = key
+        with self._lock:
+            for stale in [k for k in self._entries if k[0] == path and k[2] == options]:
+                self.size -= len(self._entries.pop(stale)[0])
+            if len(body) > self.max_bytes:
+                return
+            self._entries[key] = (body, etag)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+class NotebookServer:
+    """
+    Renders notebooks below a root folder on request, for browser previews.
+    
+    The process stays up, so imports, pygments lexers and the highlight and
+    image caches stay warm between previews. Pages are rendered in memory
+    (images embedded), gzip-compressed once and kept in a RenderCache;
+    unchanged pages are served from it, or as 304 when the browser already
+    has them. Renders run one at a time since the highlight cache is not
+    thread-safe; cache hits are served concurrently.
+    """
+    
+    def __init__(self, root: Path, cache_bytes: int = DEFAULT_SERVE_CACHE_BYTES, **render_options):
+        self.root = Path(root).resolve()
+        self.render_options = render_options
+        self.cache = RenderCache(cache_bytes)
+        self._render_lock = threading.Lock()
+    
+    def warm_up(self) -> None:
+        """Import the optional dependencies and build the lexer/formatter now"""
+        if has_pygments():
+            get_lexer('python')
+            get_formatter()
+        has_bs4()
+        has_requests()
+    
+    def resolve(self, url_path: str) -> Optional[Path]:
+        """File or folder under root for a URL path, or None if outside it"""
+        path = (self.root / url_path.lstrip('/')).resolve()
+        if path != self.root and self.root not in path.parents:
+            return None
+        return path
+    
+    def get_options(self, query: dict) -> dict:
+        """Server-wide render options with any valid query overrides applied"""
+        options = dict(self.render_options)
+        for name, (option, allowed) in SERVE_QUERY_OPTIONS.items():
+            value = query.get(name, [None])[-1]
+            if value in allowed:
+                options[option] = value == '1' if option == 'show_code' else value
+        return options
+    
+    def render(self, path: Path, options: dict) -> tuple:
+        """(gzip body, etag, cache hit) for a notebook, rendering on a miss"""
+        options_key = get_render_options(
+            options.get('page_size', 'A4'), options.get('margins', 'narrow'),
+            options.get('show_code', True), options.get('syntax_theme', 'github'),
+            options.get('embed_images', True), 'embed', options.get('optimize_images'),
+            options.get('image_dpi', DEFAULT_IMAGE_DPI),
+            options.get('max_table_rows', DEFAULT_MAX_TABLE_ROWS),
+            options.get('max_stream_lines', DEFAULT_MAX_STREAM_LINES),
+            options.get('max_output_bytes', DEFAULT_MAX_OUTPUT_BYTES),
+        )
+        key = (str(path), path.stat().st_mtime_ns, options_key)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached[0], cached[1], True
+        
+        with self._render_lock:
+            # Another request may have rendered it while this one waited
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached[0], cached[1], True
+            html = render_notebook_html(path.read_bytes(), default_title=path.stem, **options)
+            body = gzip.compress(html.encode('utf-8'), compresslevel=6, mtime=0)
+            etag = 'W/"' + hashlib.sha256(repr(key).encode('utf-8')).hexdigest()[:32] + '"'
+            self.cache.put(key, body, etag)
+        return body, etag, False
+    
+    def render_index(self, directory: Path, url_path: str) -> bytes:
+        """Listing of the notebooks and subfolders in a folder"""
+        base = url_path.rstrip('/') + '/'
+        items = []
+        if directory != self.root:
+            items.append('<li><a href="../">../</a></li>')
+        for entry in sorted(directory.iterdir(), key=natural_sort_key):
+            if entry.is_dir() and entry.name not in DEFAULT_IGNORE_DIRS:
+                name = entry.name + '/'
+            elif entry.suffix.lower() == '.ipynb':
+                name = entry.name
+            else:
+                continue
+            items.append(f'<li><a href="{escape_html(urllib.parse.quote(base + name))}">{escape_html(name)}</a></li>')
+        title = escape_html(url_path)
+        return (f'<!DOCTYPE html>\n<html lang="en">\n<head><meta charset="UTF-8"><title>{title}</title></head>\n'
+                f'<body>\n<h1>{title}</h1>\n<ul>\n' + '\n'.join(items) + '\n</ul>\n</body>\n</html>\n').encode('utf-8')
+    
+    def make_handler(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            
+            def do_GET(self):
+                start = time.perf_counter()
+                url = urllib.parse.urlsplit(self.path)
+                url_path = urllib.parse.unquote(url.path)
+                path = server.resolve(url_path)
+                if path is None or not path.exists():
+                    return self.send_body(404, f'Not found: {url_path}'.encode('utf-8'), 'text/plain')
+                if path.is_dir():
+                    if not url_path.endswith('/'):
+                        return self.redirect(url.path + '/')
+                    return self.send_body(200, server.render_index(path, url_path), 'text/html')
+                if path.suffix.lower() != '.ipynb':
+                    return self.send_body(404, f'Not a notebook: {url_path}'.encode('utf-8'), 'text/plain')
+                
+                try:
+                    body, etag, hit = server.render(path, server.get_options(urllib.parse.parse_qs(url.query)))
+                except Exception as e:
+                    print(f"✗ Failed to render {url_path}: {e}")
+                    return self.send_body(500, f'Failed to render {url_path}: {e}'.encode('utf-8'), 'text/plain')
+                
+                status = 304 if etag in self.headers.get('If-None-Match', '') else 200
+                self.send_response(status)
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', 'no-cache')
+                self.send_header('Vary', 'Accept-Encoding')
+                if status == 304:
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                else:
+                    if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                        self.send_header('Content-Encoding', 'gzip')
+                    else:
+                        body = gzip.decompress(body)
+                    self.send_header('Content-Type', 'text/html; charset=utf-8')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                elapsed = (time.perf_counter() - start) * 1000
+                print(f"• {status} {url_path} ({'cached' if hit else 'rendered'}, {elapsed:.0f} ms)")
+            
+            def send_body(self, status: int, body: bytes, content_type: str):
+                self.send_response(status)
+                self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def redirect(self, location: str):
+                self.send_response(301)
+                self.send_header('Location', location)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+            
+            def log_message(self, format, *args):
+                pass  # notebook requests print their own line
+        
+        return Handler
+
+
+def serve_notebooks(
+    root: str,
+    port: int = DEFAULT_SERVE_PORT,
+    cache_bytes: int = DEFAULT_SERVE_CACHE_BYTES,
+    **render_options,
+) -> None:
+    """
+    Serve rendered previews of the notebooks below root on localhost.
+    
+    Open http://127.0.0.1:<port>/ for a folder listing; notebook URLs render
+    on request and are cached until the file changes. Render options can be
+    overridden per URL with ?theme=, ?page-size=, ?margins= and ?code=0/1.
+    Stops on Ctrl+C.
+    
+    Args:
+        root: Folder to serve (a notebook serves its folder)
+        port: Local port to listen on
+        cache_bytes: Memory cap for cached (gzip-compressed) pages
+        **render_options: Passed through to render_notebook_html
+    """
+    root = Path(root)
+    page = ''
+    if root.is_file():
+        root, page = root.parent, urllib.parse.quote(root.name)
+    server = NotebookServer(root, cache_bytes, **render_options)
+    server.warm_up()
+    httpd = ThreadingHTTPServer(('127.0.0.1', port), server.make_handler())
+    print(f"Serving {server.root} at http://127.0.0.1:{port}/{page} (Ctrl+C to stop)...")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        cache = server.cache
+        print(f"\nStopped serving ({cache.hits} cached, {cache.misses} rendered, "
+              f"{cache.size / (1024 * 1024):.1f} MB in cache)")
+    finally:
+        httpd.server_close()
 
 
 # =============================================================================
@@ -1002,11 +3791,30 @@ Examples:
     python notebook_to_html.py notebook.ipynb -o output.html --page-size A3
     python notebook_to_html.py notebook.ipynb --theme monokai --no-code
     python notebook_to_html.py notebook.ipynb --pdf
+    python notebook_to_html.py huge_notebook.ipynb --stream
+    python notebook_to_html.py notebook.ipynb --watch
+    python notebook_to_html.py notebook.ipynb --optimize-images webp --image-dpi 200
+    python notebook_to_html.py notebook.ipynb --force --profile --profile-trace cells.jsonl
     
     # Batch conversion (all .ipynb files in a directory)
     python notebook_to_html.py --batch /path/to/notebooks/
     python notebook_to_html.py --batch /path/to/notebooks/ -o /path/to/output/
     python notebook_to_html.py --batch . --theme friendly
+    python notebook_to_html.py --batch . --jobs 4
+    python notebook_to_html.py --batch . --pdf --pdf-jobs 2
+    python notebook_to_html.py --batch . --force
+    python notebook_to_html.py --batch . --assets external
+    
+    # Whole course tree, output folders mirror the input folders
+    python notebook_to_html.py /path/to/courses/ --recursive -o /path/to/output/ --jobs 4
+    python notebook_to_html.py . --recursive --ignore Drafts
+    
+    # Book: every notebook in a folder as one HTML with a chapter index
+    python notebook_to_html.py /path/to/course/ --book -o course.html --pdf
+    
+    # Live previews at http://127.0.0.1:8765/ (renders cached until the notebook changes)
+    python notebook_to_html.py /path/to/notebooks/ --serve
+    python notebook_to_html.py . --serve --port 9000 --serve-cache-mb 512
         """
     )
     
@@ -1014,6 +3822,12 @@ Examples:
     parser.add_argument('-o', '--output', help='Output HTML file or directory (for --batch)')
     parser.add_argument('--batch', action='store_true',
                         help='Batch convert all .ipynb files in the input directory')
+    parser.add_argument('--recursive', '-r', action='store_true',
+                        help='Convert every .ipynb below the input directory, mirroring folders in the output')
+    parser.add_argument('--ignore', action='append', metavar='NAME', default=[],
+                        help=f'Folder name to skip with --recursive (repeatable; always skipped: {", ".join(DEFAULT_IGNORE_DIRS)})')
+    parser.add_argument('--book', action='store_true',
+                        help='Combine all .ipynb files in the input directory into one HTML with a chapter index')
     parser.add_argument('--page-size', choices=['A4', 'A3'], default='A4',
                         help='Page size for printing (default: A4)')
     parser.add_argument('--margins', choices=['narrow', 'normal'], default='narrow',
@@ -1026,11 +3840,143 @@ Examples:
                         help='Syntax highlighting theme (default: github)')
     parser.add_argument('--pdf', action='store_true',
                         help='Also generate PDF (requires weasyprint)')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='Worker processes for batch conversion (default: CPU count, '
+                             'shared with --pdf-jobs when --pdf is set; 1 = serial)')
+    parser.add_argument('--pdf-jobs', type=int, default=None,
+                        help='Worker processes for batch PDF rendering (default: half the CPU count, '
+                             'or what --jobs leaves)')
+    parser.add_argument('--force', action='store_true',
+                        help='Rebuild all notebooks, ignoring the build cache')
+    parser.add_argument('--stream', action='store_true',
+                        help='Parse and write cells one at a time to keep memory flat (requires ijson)')
+    parser.add_argument('--assets', choices=['embed', 'external'], default=None,
+                        help='Inline images as base64 or write them once to a shared assets/ folder '
+                             '(default: embed, external with --book)')
+    parser.add_argument('--image-cache', metavar='DIR',
+                        help='Cache folder for downloaded images (default: ~/.cache/notebook_to_html/images)')
+    parser.add_argument('--optimize-images', choices=['png', 'jpeg', 'webp'], default=None,
+                        help='Downscale plots to the printable width and re-encode them (requires Pillow)')
+    parser.add_argument('--image-dpi', type=int, default=DEFAULT_IMAGE_DPI,
+                        help=f'Target print DPI for --optimize-images (default: {DEFAULT_IMAGE_DPI})')
+    parser.add_argument('--max-table-rows', type=int, default=DEFAULT_MAX_TABLE_ROWS,
+                        help=f'DataFrame rows kept per table, first and last halves (default: {DEFAULT_MAX_TABLE_ROWS}, 0 = all)')
+    parser.add_argument('--max-stream-lines', type=int, default=DEFAULT_MAX_STREAM_LINES,
+                        help=f'Lines kept per text output, first and last halves (default: {DEFAULT_MAX_STREAM_LINES}, 0 = all)')
+    parser.add_argument('--max-output-bytes', type=int, default=DEFAULT_MAX_OUTPUT_BYTES,
+                        help=f'Size budget per text/HTML output (default: {DEFAULT_MAX_OUTPUT_BYTES}, 0 = unlimited)')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and re-render the input file or folder whenever it changes')
+    parser.add_argument('--serve', action='store_true',
+                        help='Serve rendered previews of the notebooks in the input folder over local HTTP')
+    parser.add_argument('--port', type=int, default=DEFAULT_SERVE_PORT,
+                        help=f'Port for --serve (default: {DEFAULT_SERVE_PORT})')
+    parser.add_argument('--serve-cache-mb', type=int, default=DEFAULT_SERVE_CACHE_BYTES // (1024 * 1024),
+                        help=f'Memory cap for pages cached by --serve, gzip-compressed '
+                             f'(default: {DEFAULT_SERVE_CACHE_BYTES // (1024 * 1024)})')
+    parser.add_argument('--profile', action='store_true',
+                        help='Print wall time, call counts and peak RSS per stage and cell type (batch runs serially)')
+    parser.add_argument('--profile-trace', metavar='FILE',
+                        help='With --profile, also write one JSON line per rendered cell to FILE')
+    parser.add_argument('--timing', action='store_true',
+                        help='Print import cost versus render cost (imports in --jobs workers are not included)')
     
     args = parser.parse_args()
+    start = time.perf_counter()
+    
+    assets = args.assets or ('external' if args.book else 'embed')
     
+    if args.profile or args.profile_trace:
+        # Stages are recorded in this process, so batch runs go serial
+        set_profiler(RenderProfiler(args.profile_trace))
+        args.jobs = 1
+    
+    if args.watch:
+        watch_notebooks(
+            input_path=args.input or str(Path.cwd()),
+            output=args.output,
+            page_size=args.page_size,
+            margins=args.margins,
+            show_code=not args.no_code,
+            embed_images=not args.no_embed,
+            syntax_theme=args.theme,
+            generate_pdf=args.pdf,
+            stream=args.stream,
+            assets=assets,
+            image_cache_dir=args.image_cache,
+            optimize_images=args.optimize_images,
+            image_dpi=args.image_dpi,
+            max_table_rows=args.max_table_rows,
+            max_stream_lines=args.max_stream_lines,
+            max_output_bytes=args.max_output_bytes,
+        )
+        if _profiler is not None:
+            _profiler.close()
+            _profiler.print_summary()
+        return
+    
+    if args.serve:
+        serve_notebooks(
+            root=args.input or str(Path.cwd()),
+            port=args.port,
+            cache_bytes=args.serve_cache_mb * 1024 * 1024,
+            page_size=args.page_size,
+            margins=args.margins,
+            show_code=not args.no_code,
+            embed_images=not args.no_embed,
+            syntax_theme=args.theme,
+            optimize_images=args.optimize_images,
+            image_dpi=args.image_dpi,
+            max_table_rows=args.max_table_rows,
+            max_stream_lines=args.max_stream_lines,
+            max_output_bytes=args.max_output_bytes,
+            image_cache_dir=args.image_cache or str(IMAGE_CACHE_DIR),
+        )
+    elif args.book:
+        convert_book(
+            input_dir=args.input or str(Path.cwd()),
+            output_path=args.output,
+            page_size=args.page_size,
+            margins=args.margins,
+            show_code=not args.no_code,
+            embed_images=not args.no_embed,
+            syntax_theme=args.theme,
+            generate_pdf=args.pdf,
+            force=args.force,
+            stream=args.stream,
+            assets=assets,
+            image_cache_dir=args.image_cache,
+            optimize_images=args.optimize_images,
+            image_dpi=args.image_dpi,
+            max_table_rows=args.max_table_rows,
+            max_stream_lines=args.max_stream_lines,
+            max_output_bytes=args.max_output_bytes,
+        )
+    elif args.recursive:
+        convert_tree(
+            input_dir=args.input or str(Path.cwd()),
+            output_dir=args.output,
+            page_size=args.page_size,
+            margins=args.margins,
+            show_code=not args.no_code,
+            embed_images=not args.no_embed,
+            syntax_theme=args.theme,
+            generate_pdf=args.pdf,
+            jobs=args.jobs,
+            pdf_jobs=args.pdf_jobs,
+            force=args.force,
+            stream=args.stream,
+            assets=assets,
+            image_cache_dir=args.image_cache,
+            optimize_images=args.optimize_images,
+            image_dpi=args.image_dpi,
+            max_table_rows=args.max_table_rows,
+            max_stream_lines=args.max_stream_lines,
+            max_output_bytes=args.max_output_bytes,
+            ignore=DEFAULT_IGNORE_DIRS + tuple(args.ignore),
+        )
     # If no input provided, auto-batch convert all .ipynb in script's directory
-    if not args.input:
+    elif not args.input:
         script_dir = Path(__file__).parent.resolve()
         work_dir = Path.cwd()
         if work_dir != script_dir:
@@ -1047,6 +3993,17 @@ Examples:
             embed_images=not args.no_embed,
             syntax_theme=args.theme,
             generate_pdf=args.pdf,
+            jobs=args.jobs,
+            pdf_jobs=args.pdf_jobs,
+            force=args.force,
+            stream=args.stream,
+            assets=assets,
+            image_cache_dir=args.image_cache,
+            optimize_images=args.optimize_images,
+            image_dpi=args.image_dpi,
+            max_table_rows=args.max_table_rows,
+            max_stream_lines=args.max_stream_lines,
+            max_output_bytes=args.max_output_bytes,
         )
     elif args.batch:
         batch_convert(
@@ -1058,6 +4015,17 @@ Examples:
             embed_images=not args.no_embed,
             syntax_theme=args.theme,
             generate_pdf=args.pdf,
+            jobs=args.jobs,
+            pdf_jobs=args.pdf_jobs,
+            force=args.force,
+            stream=args.stream,
+            assets=assets,
+            image_cache_dir=args.image_cache,
+            optimize_images=args.optimize_images,
+            image_dpi=args.image_dpi,
+            max_table_rows=args.max_table_rows,
+            max_stream_lines=args.max_stream_lines,
+            max_output_bytes=args.max_output_bytes,
         )
     else:
         convert_notebook(
@@ -1069,7 +4037,22 @@ Examples:
             embed_images=not args.no_embed,
             syntax_theme=args.theme,
             generate_pdf=args.pdf,
+            force=args.force,
+            stream=args.stream,
+            assets=assets,
+            image_cache_dir=args.image_cache,
+            optimize_images=args.optimize_images,
+            image_dpi=args.image_dpi,
+            max_table_rows=args.max_table_rows,
+            max_stream_lines=args.max_stream_lines,
+            max_output_bytes=args.max_output_bytes,
         )
+    
+    if _profiler is not None:
+        _profiler.close()
+        _profiler.print_summary()
+    if args.timing:
+        print_timing_summary(start - MODULE_START, time.perf_counter() - start)
 
 
 if __name__ == '__main__':
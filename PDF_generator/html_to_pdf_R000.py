@@ -13,6 +13,7 @@ Usage:
     python html_to_pdf.py *.html                         # → batch convert all
     python html_to_pdf.py input.html --landscape         # → landscape orientation
     python html_to_pdf.py input.html --format Letter     # → Letter instead of A4
+    python html_to_pdf.py notebook.ipynb                 # → rendered in memory via notebook_to_html
 
 Requirements:
     pip install playwright
@@ -20,9 +21,13 @@ Requirements:
 """
 
 import argparse
+import importlib.util
 import sys
 from pathlib import Path
 
+# notebook_to_html lives in the sibling HTML_generator folder
+NOTEBOOK_TO_HTML = Path(__file__).resolve().parent.parent / "HTML_generator" / "notebook_to_html_R010.py"
+
 
 def convert_html_to_pdf(
     html_path: str,
@@ -38,10 +43,14 @@ def convert_html_to_pdf(
     header_template: str = "",
     footer_template: str = "",
     display_header_footer: bool = False,
+    html: str = None,
 ):
     """
     Convert a local HTML file to PDF using headless Chrome via Playwright.
 
+    With html given, that markup is loaded into the page directly and
+    html_path only names the output (and is never read).
+
     Args:
         html_path:       Path to the HTML file
         output_path:     Output PDF path (default: same name with .pdf extension)
@@ -53,11 +62,12 @@ def convert_html_to_pdf(
         header_template: HTML for page header (use classes: date, title, url, pageNumber, totalPages)
         footer_template: HTML for page footer
         display_header_footer: Show header/footer
+        html:            HTML document to render instead of reading html_path
     """
     from playwright.sync_api import sync_playwright
 
     html_path = Path(html_path).resolve()
-    if not html_path.exists():
+    if html is None and not html_path.exists():
         print(f"Error: File not found: {html_path}")
         return None
 
@@ -79,8 +89,11 @@ def convert_html_to_pdf(
         browser = p.chromium.launch()
         page = browser.new_page()
 
-        # Navigate and wait for full render
-        page.goto(file_url, wait_until="networkidle")
+        # Navigate (or load the in-memory document) and wait for full render
+        if html is None:
+            page.goto(file_url, wait_until="networkidle")
+        else:
+            page.set_content(html, wait_until="networkidle")
 
         # Optional: wait for any lazy-loaded content
         page.wait_for_timeout(500)
@@ -115,12 +128,45 @@ def convert_html_to_pdf(
     return str(output_path)
 
 
+def load_notebook_to_html():
+    """Import notebook_to_html from HTML_generator (only needed for .ipynb input)."""
+    module = sys.modules.get("notebook_to_html_R010")
+    if module is None:
+        spec = importlib.util.spec_from_file_location("notebook_to_html_R010", NOTEBOOK_TO_HTML)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+def convert_notebook_to_pdf(notebook_path: str, output_path: str = None, **kwargs):
+    """
+    Convert a .ipynb to PDF in one process: notebook_to_html renders the HTML
+    in memory and Chrome loads it directly, with no .html written or re-read.
+    """
+    notebook_path = Path(notebook_path)
+    if not notebook_path.exists():
+        print(f"Error: File not found: {notebook_path.resolve()}")
+        return None
+    html = load_notebook_to_html().render_notebook_html(
+        notebook_path.read_bytes(), default_title=notebook_path.stem
+    )
+    return convert_html_to_pdf(notebook_path, output_path=output_path, html=html, **kwargs)
+
+
+def convert_to_pdf(input_path: str, output_path: str = None, **kwargs):
+    """Convert an .html or .ipynb file, picking the converter by extension."""
+    if Path(input_path).suffix.lower() == ".ipynb":
+        return convert_notebook_to_pdf(input_path, output_path=output_path, **kwargs)
+    return convert_html_to_pdf(input_path, output_path=output_path, **kwargs)
+
+
 def batch_convert(
     html_files: list,
     output_dir: str = None,
     **kwargs,
 ):
-    """Convert multiple HTML files to PDF."""
+    """Convert multiple HTML (or .ipynb) files to PDF."""
     results = []
     for html_file in html_files:
         html_path = Path(html_file)
@@ -128,7 +174,7 @@ def batch_convert(
             out = Path(output_dir) / html_path.with_suffix(".pdf").name
         else:
             out = None
-        result = convert_html_to_pdf(html_file, output_path=out, **kwargs)
+        result = convert_to_pdf(html_file, output_path=out, **kwargs)
         if result:
             results.append(result)
         print()
@@ -150,9 +196,10 @@ Examples:
   %(prog)s notes.html --scale 0.9            Slightly shrink content
   %(prog)s notes.html --margin 7mm           Set all margins to 7mm
   %(prog)s notes.html --page-numbers         Add page numbers in footer
+  %(prog)s notebook.ipynb                    Notebook → PDF, HTML rendered in memory
         """,
     )
-    parser.add_argument("files", nargs="*", help="HTML file(s) to convert")
+    parser.add_argument("files", nargs="*", help="HTML or .ipynb file(s) to convert")
     parser.add_argument("-o", "--output", help="Output PDF path (single file only)")
     parser.add_argument("--output-dir", help="Output directory (batch mode)")
     parser.add_argument("--format", default="A4",
@@ -224,7 +271,7 @@ Examples:
     )
 
     if len(args.files) == 1 and not args.output_dir:
-        convert_html_to_pdf(args.files[0], output_path=args.output, **common_kwargs)
+        convert_to_pdf(args.files[0], output_path=args.output, **common_kwargs)
     else:
         if args.output:
             print("Warning: -o/--output ignored in batch mode. Use --output-dir instead.")
@@ -0,0 +1,185 @@
+"""
+DOCX Post-Processing Benchmark
+==============================
+Compares the single-pass DocxPostProcessor in html_to_word_R002.py against
+the separate fix functions it replaced (one walk over the document each),
+on the same DOCX, and checks both produce identical XML.
+
+Documents:
+  - DOCX files given on the command line (e.g. raw Pandoc output, before
+    html_to_word's post-processing)
+  - Otherwise a synthetic notebook-like document: headings with anchors,
+    long code paragraphs, matplotlib artifacts, tables and images
+
+Usage:
+    python docx_postprocess_benchmark_R000.py
+    python docx_postprocess_benchmark_R000.py raw1.docx raw2.docx
+    python docx_postprocess_benchmark_R000.py --sections 400 --repeat 3
+
+Requirements:
+    - pip install python-docx
+    - Pandoc installed (html_to_word_R002 checks for it on import)
+"""
+
+import sys
+import time
+import zlib
+import struct
+import argparse
+from io import BytesIO
+from pathlib import Path
+
+from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
+from docx.shared import Pt, Inches
+from docx.oxml import OxmlElement
+
+from html_to_word_R002 import (
+    build_post_processor,
+    set_margins,
+    fix_style_spacing,
+    apply_heading_styles,
+    remove_duplicate_title,
+    remove_unwanted_paragraphs,
+    clean_heading_anchors,
+    split_large_code_paragraphs,
+    reduce_paragraph_spacing,
+    format_tables,
+    process_images,
+)
+
+
+# ======================================================================
+# LEGACY PASSES (convert_html_to_docx before DocxPostProcessor)
+# ======================================================================
+
+def legacy_post_process(doc):
+    """Each fix walks the document separately, in the original order."""
+    set_margins(doc)
+    fix_style_spacing(doc)
+    apply_heading_styles(doc)
+    remove_duplicate_title(doc)
+    remove_unwanted_paragraphs(doc)
+    clean_heading_anchors(doc)
+    split_large_code_paragraphs(doc)
+    reduce_paragraph_spacing(doc)
+    format_tables(doc)
+    process_images(doc)
+
+
+def single_pass_post_process(doc):
+    build_post_processor().run(doc)
+
+
+# ======================================================================
+# DOCUMENTS
+# ======================================================================
+
+def make_png(width, height):
+    """A solid grey PNG, built without Pillow."""
+    def chunk(kind, data):
+        return (struct.pack('>I', len(data)) + kind + data +
+                struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF))
+    raw = b''.join(b'\x00' + b'\x80' * width * 3 for _ in range(height))
+    return (b'\x89PNG\r\n\x1a\n' +
+            chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)) +
+            chunk(b'IDAT', zlib.compress(raw)) +
+            chunk(b'IEND', b''))
+
+
+def add_code_paragraph(doc, lines):
+    """A Source Code paragraph with one run per line, joined by w:br like Pandoc."""
+    para = doc.add_paragraph(style='Source Code')
+    for i, line in enumerate(lines):
+        run = para.add_run(line)
+        if i < len(lines) - 1:
+            run._r.append(OxmlElement('w:br'))
+    return para
+
+
+def synthetic_document(sections):
+    """DOCX bytes resembling Pandoc output for a long notebook."""
+    doc = Document()
+    doc.styles.add_style('Source Code', WD_STYLE_TYPE.PARAGRAPH)
+    png = make_png(900, 600)
+
+    doc.add_paragraph('Course Notes', style='Title')
+    doc.add_paragraph('Course Notes', style='Title')
+    for i in range(sections):
+        doc.add_paragraph('{}. Section¶'.format(i), style='Heading 1')
+        para = doc.add_paragraph('Explanation for section {} with enough text to be a real paragraph.'.format(i))
+        para.paragraph_format.space_before = Pt(24)
+        para.paragraph_format.space_after = Pt(12)
+        add_code_paragraph(doc, ['x = {}'.format(i), 'y = x * 2'])
+        add_code_paragraph(doc, ['row {}: value {}'.format(n, n * i) for n in range(20)])
+        doc.add_paragraph('<Axes: xlabel="x", ylabel="y">')
+        table = doc.add_table(rows=8, cols=4)
+        for r, row in enumerate(table.rows):
+            for c, cell in enumerate(row.cells):
+                cell.text = 'col{}'.format(c) if r == 0 else str(r * c)
+        doc.add_picture(BytesIO(png), width=Inches(9))
+
+    out = BytesIO()
+    doc.save(out)
+    return out.getvalue()
+
+
+def document_xml(doc):
+    """Body plus styles XML, what the post-processors change."""
+    return doc.element.xml + doc.styles.element.xml
+
+
+# ======================================================================
+# BENCHMARK
+# ======================================================================
+
+def time_post_process(post_process, docx_bytes, repeat):
+    """Best-of-repeat seconds for post_process, excluding load time."""
+    best = float('inf')
+    for _ in range(repeat):
+        doc = Document(BytesIO(docx_bytes))
+        start = time.perf_counter()
+        post_process(doc)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark single-pass DOCX post-processing against the separate passes')
+    parser.add_argument('documents', nargs='*', help='Raw (un-post-processed) DOCX files to benchmark on')
+    parser.add_argument('--sections', type=int, default=200,
+                        help='Sections in the synthetic document when none are given (default: 200)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repetitions, best is kept (default: 5)')
+    args = parser.parse_args()
+
+    if args.documents:
+        documents = [(Path(path).name, Path(path).read_bytes()) for path in args.documents]
+    else:
+        documents = [('synthetic ({} sections)'.format(args.sections), synthetic_document(args.sections))]
+
+    mismatched = 0
+    for name, docx_bytes in documents:
+        legacy_doc = Document(BytesIO(docx_bytes))
+        legacy_post_process(legacy_doc)
+        single_doc = Document(BytesIO(docx_bytes))
+        counts = build_post_processor().run(single_doc)
+        identical = document_xml(legacy_doc) == document_xml(single_doc)
+        mismatched += not identical
+
+        before = time_post_process(legacy_post_process, docx_bytes, args.repeat)
+        after = time_post_process(single_pass_post_process, docx_bytes, args.repeat)
+
+        print("{} ({:.0f} KB, {} body elements)".format(
+            name, len(docx_bytes) / 1024, len(legacy_doc.element.body)))
+        print("  separate passes: {:8.1f} ms".format(before * 1000))
+        print("  single pass:     {:8.1f} ms   ({:.2f}x)".format(after * 1000, before / after))
+        print("  output identical: {}".format('yes' if identical else 'NO'))
+        changes = " | ".join("{}: {}".format(k, v) for k, v in counts.items() if v)
+        print("  " + (changes or "no changes"))
+        print("-" * 60)
+
+    sys.exit(1 if mismatched else 0)
+
+
+if __name__ == '__main__':
+    main()
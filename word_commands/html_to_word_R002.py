@@ -13,6 +13,10 @@ Features:
   - Tables with dark headers + zebra stripes
   - Matplotlib artifacts removed
   - Heading styles with colors
+  - One long-lived pandoc-server per run (DOCX kept in memory), per-file pandoc fallback
+  - All DOCX fixes applied in a single walk over the document (DocxPostProcessor)
+  - --jobs N: batch split across worker processes; Pandoc for the next file
+    overlaps post-processing of the current one, output stays in file order
 
 Usage:
     # Auto-convert all .html in script's folder (double-click to run)
@@ -26,19 +30,38 @@ Usage:
     python html_to_word.py --batch /path/to/html/
     python html_to_word.py --batch /path/to/html/ -o /path/to/output/
 
+    # Straight from notebooks (HTML rendered in memory by notebook_to_html)
+    python html_to_word.py notebook.ipynb
+    python html_to_word.py --batch /path/to/notebooks/ --notebooks
+
 Requirements:
     - pip install python-docx
-    - Pandoc installed (https://pandoc.org)
+    - Pandoc installed (https://pandoc.org); with pandoc 3.x one pandoc-server
+      process converts the whole batch, older versions run pandoc per file
 """
 
 import sys
 import re
 import os
 import copy
+import json
+import time
+import hashlib
+import atexit
+import base64
+import socket
 import subprocess
 import shutil
 import argparse
+import importlib.util
 import tempfile
+import urllib.parse
+import urllib.request
+import urllib.error
+from collections import deque
+from io import BytesIO, StringIO
+from contextlib import redirect_stdout, nullcontext
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from html import unescape
 
@@ -51,8 +74,11 @@ try:
     from docx import Document
     from docx.shared import Pt, RGBColor, Inches, Emu, Cm
     from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.enum.style import WD_STYLE_TYPE
     from docx.oxml.ns import qn
     from docx.oxml import OxmlElement
+    from docx.table import Table
+    from docx.text.paragraph import Paragraph
 except ImportError:
     print("ERROR: pip install python-docx")
     sys.exit(1)
@@ -66,6 +92,10 @@ MARGIN = Inches(0.5)
 MAX_IMAGE_WIDTH = Inches(6.5)
 MAX_IMAGE_HEIGHT = Inches(4.5)
 IMAGE_SCALE = 0.80
+TABLE_WIDTH = Inches(7.27)  # page width minus margins: 8.27 - 2*0.5
+MAX_CODE_BREAKS = 6  # split Source Code paragraphs with more line breaks
+MAX_SPACE_BEFORE = Pt(14)
+MAX_SPACE_AFTER = Pt(6)
 
 CODE_FONT = 'Consolas'
 CODE_INPUT_SIZE = Pt(9)
@@ -94,6 +124,12 @@ STYLE_SPACING = {
     'Normal':          {'before': 2,  'after': 2,  'line': 1.0},
 }
 
+PANDOC_SERVER_START_TIMEOUT = 10  # seconds to wait for pandoc-server to answer
+PANDOC_SERVER_TIMEOUT = 120       # seconds per conversion request
+
+# notebook_to_html lives in the sibling HTML_generator folder
+NOTEBOOK_TO_HTML = Path(__file__).resolve().parent.parent / 'HTML_generator' / 'notebook_to_html_R010.py'
+
 UNWANTED_PATTERNS = [
     r'<Axes:.*?>',
     r'<AxesSubplot:.*?>',
@@ -132,6 +168,20 @@ def extract_color_map(css_text):
     return color_map
 
 
+# Colour maps by CSS hash: every file from notebook_to_html carries the same
+# <style> block, so a batch extracts it once (once per worker with --jobs)
+_color_map_cache = {}
+
+
+def get_color_map(css_text):
+    """extract_color_map, memoized by the CSS text's hash."""
+    key = hashlib.sha1(css_text.encode('utf-8')).hexdigest()
+    color_map = _color_map_cache.get(key)
+    if color_map is None:
+        color_map = _color_map_cache[key] = extract_color_map(css_text)
+    return color_map
+
+
 def parse_spans(block_html, color_map):
     """Parse code block HTML into [(text, hex_color, bold, italic), ...]."""
     fragments = []
@@ -164,14 +214,39 @@ def parse_spans(block_html, color_map):
     return fragments
 
 
-def extract_ordered_blocks(html_text, color_map):
-    """Extract ALL code blocks (input + output) from HTML in document order."""
+# The <style> block and every code block, matched in one pass
+HTML_SCAN_PATTERN = re.compile(
+    r'<style>(.*?)</style>|<div class="(code-input|code-output)">(.*?)</div>', re.DOTALL)
+
+
+def scan_html(html_text):
+    """
+    One pass over the HTML: (CSS of the first <style> block, code blocks).
+
+    Code blocks are (block_type, inner HTML) in document order, block_type
+    being 'input' or 'output'.
+    """
+    css_text = None
+    raw_blocks = []
+    for m in HTML_SCAN_PATTERN.finditer(html_text):
+        if m.group(2):
+            raw_blocks.append(('input' if m.group(2) == 'code-input' else 'output', m.group(3)))
+        elif css_text is None:
+            css_text = m.group(1)
+    return css_text or "", raw_blocks
+
+
+def extract_ordered_blocks(html_text, color_map, raw_blocks=None):
+    """
+    Extract ALL code blocks (input + output) from HTML in document order.
+
+    raw_blocks (from scan_html) saves scanning html_text again.
+    """
+    if raw_blocks is None:
+        raw_blocks = scan_html(html_text)[1]
     blocks = []
-    pattern = r'<div class="(code-input|code-output)">(.*?)</div>'
 
-    for m in re.finditer(pattern, html_text, re.DOTALL):
-        block_type = 'input' if m.group(1) == 'code-input' else 'output'
-        content = m.group(2)
+    for block_type, content in raw_blocks:
 
         if block_type == 'input':
             inner = re.sub(r'<pre>\s*<code[^>]*>(.*?)</code>\s*</pre>',
@@ -250,24 +325,40 @@ def normalize(text):
     return re.sub(r'\s+', ' ', text.strip())
 
 
+def build_block_index(blocks):
+    """Normalized block text -> deque of block positions, in document order."""
+    index = {}
+    for pos, block in enumerate(blocks):
+        index.setdefault(normalize(block['text']), deque()).append(pos)
+    return index
+
+
 def apply_syntax_colors(doc, html_text):
     """
     Post-process: apply syntax highlighting colors from HTML to docx.
     Matches Source Code paragraphs 1:1 with HTML code blocks.
+
+    Blocks are normalized once into a hash index, so each paragraph is one
+    lookup: the nearest block at or after the cursor with the same text.
+    If Pandoc drops or merges a block the cursor jumps straight to the next
+    match instead of losing every block after the drift.
+
+    Returns (colored inputs, styled outputs, HTML code blocks).
     """
-    css_match = re.search(r'<style>(.*?)</style>', html_text, re.DOTALL)
-    css_text = css_match.group(1) if css_match else ""
-    color_map = extract_color_map(css_text)
+    css_text, raw_blocks = scan_html(html_text)
+    color_map = get_color_map(css_text)
 
     if not color_map:
-        return 0, 0
+        return 0, 0, 0
 
-    blocks = extract_ordered_blocks(html_text, color_map)
+    blocks = extract_ordered_blocks(html_text, color_map, raw_blocks)
     if not blocks:
-        return 0, 0
+        return 0, 0, 0
+    index = build_block_index(blocks)
 
+    style_names, default_style = get_paragraph_style_names(doc)
     sc_paras = [p for p in doc.paragraphs
-                if p.style and p.style.name == 'Source Code']
+                if (style_names.get(p._p.style) or default_style) == 'Source Code']
 
     colored_inputs = 0
     styled_outputs = 0
@@ -282,35 +373,25 @@ def apply_syntax_colors(doc, html_text):
             block_idx += 1
             continue
 
-        block = blocks[block_idx]
-
-        if normalize(para_text) == normalize(block['text']):
-            if block['type'] == 'input':
-                rebuild_para_with_colors(para, block['fragments'], is_input=True)
-                colored_inputs += 1
-            else:
-                rebuild_para_with_colors(para, block['fragments'], is_input=False)
-                styled_outputs += 1
+        positions = index.get(normalize(para_text))
+        # Positions behind the cursor can never match again
+        while positions and positions[0] < block_idx:
+            positions.popleft()
+        if not positions:
             block_idx += 1
+            continue
+
+        pos = positions.popleft()
+        block = blocks[pos]
+        if block['type'] == 'input':
+            rebuild_para_with_colors(para, block['fragments'], is_input=True)
+            colored_inputs += 1
         else:
-            # Lookahead to find match
-            found = False
-            for j in range(block_idx, min(block_idx + 5, len(blocks))):
-                if normalize(para_text) == normalize(blocks[j]['text']):
-                    block = blocks[j]
-                    if block['type'] == 'input':
-                        rebuild_para_with_colors(para, block['fragments'], is_input=True)
-                        colored_inputs += 1
-                    else:
-                        rebuild_para_with_colors(para, block['fragments'], is_input=False)
-                        styled_outputs += 1
-                    block_idx = j + 1
-                    found = True
-                    break
-            if not found:
-                block_idx += 1
-
-    return colored_inputs, styled_outputs
+            rebuild_para_with_colors(para, block['fragments'], is_input=False)
+            styled_outputs += 1
+        block_idx = pos + 1
+
+    return colored_inputs, styled_outputs, len(blocks)
 
 
 # ======================================================================
@@ -353,27 +434,57 @@ def apply_heading_styles(doc):
             pass
 
 
+def get_style_name(para):
+    """Name of a paragraph's style, or None."""
+    return para.style.name if para.style else None
+
+
+def get_paragraph_style_names(doc):
+    """
+    (styleId -> name for paragraph styles, default paragraph style name).
+
+    Resolves w:pStyle the way Paragraph.style does, without its scan over
+    every style per call.
+    """
+    names = {}
+    for style in doc.styles:
+        # Like styles.get_by_id: the first style with the id wins, and one
+        # that is not a paragraph style means the default
+        if style.style_id not in names:
+            names[style.style_id] = style.name if style.element.type == WD_STYLE_TYPE.PARAGRAPH else None
+    default = doc.styles.default(WD_STYLE_TYPE.PARAGRAPH)
+    return names, default.name if default is not None else None
+
+
+def is_duplicate_title(first, second, first_style, second_style):
+    """True if first is a Title paragraph repeated by the paragraph after it."""
+    return bool(first_style and second_style and
+                first.text.strip().rstrip('\u00b6') == second.text.strip().rstrip('\u00b6') and
+                'Title' in first_style)
+
+
 def remove_duplicate_title(doc):
     if len(doc.paragraphs) < 2:
         return 0
     first, second = doc.paragraphs[0], doc.paragraphs[1]
-    if (first.style and second.style and
-        first.text.strip().rstrip('\u00b6') == second.text.strip().rstrip('\u00b6') and
-        'Title' in first.style.name):
+    if is_duplicate_title(first, second, get_style_name(first), get_style_name(second)):
         first._element.getparent().remove(first._element)
         return 1
     return 0
 
 
+def is_unwanted_paragraph(para):
+    """True for matplotlib repr artifacts such as '<Axes: ...>'."""
+    text = para.text.strip()
+    if text:
+        for pattern in UNWANTED_PATTERNS:
+            if re.fullmatch(pattern, text):
+                return True
+    return False
+
+
 def remove_unwanted_paragraphs(doc):
-    to_remove = []
-    for para in doc.paragraphs:
-        text = para.text.strip()
-        if text:
-            for pattern in UNWANTED_PATTERNS:
-                if re.fullmatch(pattern, text):
-                    to_remove.append(para)
-                    break
+    to_remove = [para for para in doc.paragraphs if is_unwanted_paragraph(para)]
     for para in to_remove:
         try:
             para._element.getparent().remove(para._element)
@@ -382,60 +493,74 @@ def remove_unwanted_paragraphs(doc):
     return len(to_remove)
 
 
+def clean_heading_anchor(para, style_name):
+    """Strip the trailing pilcrow anchor from a heading; True if it had one."""
+    cleaned = False
+    if style_name and 'Heading' in style_name:
+        for run in para.runs:
+            if run.text and run.text.endswith('\u00b6'):
+                run.text = run.text.rstrip('\u00b6').rstrip()
+                cleaned = True
+        for hl in para._element.findall(qn('w:hyperlink')):
+            hl_text = ''.join(r.text or '' for r in hl.findall('.//' + qn('w:t')))
+            if hl_text.strip() == '\u00b6':
+                para._element.remove(hl)
+                cleaned = True
+    return cleaned
+
+
 def clean_heading_anchors(doc):
     for para in doc.paragraphs:
-        if para.style and 'Heading' in para.style.name:
-            for run in para.runs:
-                if run.text and run.text.endswith('\u00b6'):
-                    run.text = run.text.rstrip('\u00b6').rstrip()
-            for hl in para._element.findall(qn('w:hyperlink')):
-                hl_text = ''.join(r.text or '' for r in hl.findall('.//' + qn('w:t')))
-                if hl_text.strip() == '\u00b6':
-                    para._element.remove(hl)
+        clean_heading_anchor(para, get_style_name(para))
+
+
+def scale_image(inline):
+    """Fit an inline image to the page, scale it down and center its paragraph."""
+    try:
+        extent = inline.find(qn('wp:extent'))
+        if extent is None:
+            return False
+        cx, cy = int(extent.get('cx')), int(extent.get('cy'))
+        max_w, max_h = int(MAX_IMAGE_WIDTH), int(MAX_IMAGE_HEIGHT)
+        new_cx, new_cy = cx, cy
+        if new_cx > max_w:
+            ratio = max_w / new_cx
+            new_cx, new_cy = max_w, int(new_cy * ratio)
+        if new_cy > max_h:
+            ratio = max_h / new_cy
+            new_cy, new_cx = max_h, int(new_cx * ratio)
+        new_cx = int(new_cx * IMAGE_SCALE)
+        new_cy = int(new_cy * IMAGE_SCALE)
+        extent.set('cx', str(new_cx))
+        extent.set('cy', str(new_cy))
+        for ext in inline.iter(qn('a:ext')):
+            if ext.get('cx') and ext.get('cy'):
+                ext.set('cx', str(new_cx))
+                ext.set('cy', str(new_cy))
+        parent = inline.getparent()
+        while parent is not None:
+            if parent.tag == qn('w:p'):
+                pPr = parent.find(qn('w:pPr'))
+                if pPr is None:
+                    pPr = OxmlElement('w:pPr')
+                    parent.insert(0, pPr)
+                jc = pPr.find(qn('w:jc'))
+                if jc is None:
+                    jc = OxmlElement('w:jc')
+                    pPr.append(jc)
+                jc.set(qn('w:val'), 'center')
+                break
+            parent = parent.getparent()
+        return True
+    except Exception:
+        return False
 
 
 def process_images(doc):
     processed = 0
     for shape in doc.inline_shapes:
-        try:
-            inline = shape._inline
-            extent = inline.find(qn('wp:extent'))
-            if extent is None:
-                continue
-            cx, cy = int(extent.get('cx')), int(extent.get('cy'))
-            max_w, max_h = int(MAX_IMAGE_WIDTH), int(MAX_IMAGE_HEIGHT)
-            new_cx, new_cy = cx, cy
-            if new_cx > max_w:
-                ratio = max_w / new_cx
-                new_cx, new_cy = max_w, int(new_cy * ratio)
-            if new_cy > max_h:
-                ratio = max_h / new_cy
-                new_cy, new_cx = max_h, int(new_cx * ratio)
-            new_cx = int(new_cx * IMAGE_SCALE)
-            new_cy = int(new_cy * IMAGE_SCALE)
-            extent.set('cx', str(new_cx))
-            extent.set('cy', str(new_cy))
-            for ext in inline.iter(qn('a:ext')):
-                if ext.get('cx') and ext.get('cy'):
-                    ext.set('cx', str(new_cx))
-                    ext.set('cy', str(new_cy))
-            parent = inline.getparent()
-            while parent is not None:
-                if parent.tag == qn('w:p'):
-                    pPr = parent.find(qn('w:pPr'))
-                    if pPr is None:
-                        pPr = OxmlElement('w:pPr')
-                        parent.insert(0, pPr)
-                    jc = pPr.find(qn('w:jc'))
-                    if jc is None:
-                        jc = OxmlElement('w:jc')
-                        pPr.append(jc)
-                    jc.set(qn('w:val'), 'center')
-                    break
-                parent = parent.getparent()
+        if scale_image(shape._inline):
             processed += 1
-        except Exception:
-            pass
     return processed
 
 
@@ -466,202 +591,573 @@ def set_cell_borders(cell, color='000000', size='4'):
     tcPr.append(tcBorders)
 
 
+def format_table(table):
+    """Full page width, black header, bold index column, zebra stripes."""
+    tblPr = table._tbl.tblPr
+    if tblPr is None:
+        tblPr = OxmlElement('w:tblPr')
+        table._tbl.insert(0, tblPr)
+
+    # Set table to full page width
+    tblW = tblPr.find(qn('w:tblW'))
+    if tblW is None:
+        tblW = OxmlElement('w:tblW')
+        tblPr.append(tblW)
+    tblW.set(qn('w:type'), 'dxa')
+    tblW.set(qn('w:w'), str(int(TABLE_WIDTH / Emu(635))))  # convert to DXA
+
+    # Center table
+    jc = tblPr.find(qn('w:jc'))
+    if jc is None:
+        jc = OxmlElement('w:jc')
+        tblPr.append(jc)
+    jc.set(qn('w:val'), 'center')
+
+    for row_idx, row in enumerate(table.rows):
+        for col_idx, cell in enumerate(row.cells):
+            set_cell_borders(cell, '999999', '4')
+
+            if row_idx == 0:
+                # Header row: black background, white bold text
+                set_cell_shading(cell, '000000')
+                for para in cell.paragraphs:
+                    para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                    for run in para.runs:
+                        run.font.bold = True
+                        run.font.color.rgb = RGBColor(0xFF, 0xFF, 0xFF)
+                        run.font.size = Pt(10)
+            else:
+                # Data rows: alternating grey/white
+                set_cell_shading(cell, 'E8E8E8' if row_idx % 2 == 0 else 'FFFFFF')
+
+                for para in cell.paragraphs:
+                    para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                    for run in para.runs:
+                        run.font.size = Pt(10)
+
+                        # Bold first column (index)
+                        if col_idx == 0:
+                            run.font.bold = True
+
+            # Compact cell spacing
+            for para in cell.paragraphs:
+                para.paragraph_format.space_before = Pt(2)
+                para.paragraph_format.space_after = Pt(2)
+
+    # Table-level borders
+    tblBorders = OxmlElement('w:tblBorders')
+    for edge in ['top', 'left', 'bottom', 'right', 'insideH', 'insideV']:
+        border = OxmlElement('w:{}'.format(edge))
+        border.set(qn('w:val'), 'single')
+        border.set(qn('w:sz'), '4')
+        border.set(qn('w:space'), '0')
+        border.set(qn('w:color'), '999999')
+        tblBorders.append(border)
+    existing = tblPr.find(qn('w:tblBorders'))
+    if existing is not None:
+        tblPr.remove(existing)
+    tblPr.append(tblBorders)
+
+
 def format_tables(doc):
     """Format tables: full page width, black header, bold index column, zebra stripes."""
     formatted = 0
-    # Page width minus margins = usable width
-    usable_width = Inches(7.27)  # 8.27 - 2*0.5
-
     for table in doc.tables:
         try:
-            tblPr = table._tbl.tblPr
-            if tblPr is None:
-                tblPr = OxmlElement('w:tblPr')
-                table._tbl.insert(0, tblPr)
-
-            # Set table to full page width
-            tblW = tblPr.find(qn('w:tblW'))
-            if tblW is None:
-                tblW = OxmlElement('w:tblW')
-                tblPr.append(tblW)
-            tblW.set(qn('w:type'), 'dxa')
-            tblW.set(qn('w:w'), str(int(usable_width / Emu(635))))  # convert to DXA
-
-            # Center table
-            jc = tblPr.find(qn('w:jc'))
-            if jc is None:
-                jc = OxmlElement('w:jc')
-                tblPr.append(jc)
-            jc.set(qn('w:val'), 'center')
-
-            num_cols = len(table.columns)
-
-            for row_idx, row in enumerate(table.rows):
-                for col_idx, cell in enumerate(row.cells):
-                    set_cell_borders(cell, '999999', '4')
-
-                    if row_idx == 0:
-                        # Header row: black background, white bold text
-                        set_cell_shading(cell, '000000')
-                        for para in cell.paragraphs:
-                            para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                            for run in para.runs:
-                                run.font.bold = True
-                                run.font.color.rgb = RGBColor(0xFF, 0xFF, 0xFF)
-                                run.font.size = Pt(10)
-                    else:
-                        # Data rows: alternating grey/white
-                        set_cell_shading(cell, 'E8E8E8' if row_idx % 2 == 0 else 'FFFFFF')
-
-                        for para in cell.paragraphs:
-                            para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                            for run in para.runs:
-                                run.font.size = Pt(10)
-
-                                # Bold first column (index)
-                                if col_idx == 0:
-                                    run.font.bold = True
-
-                    # Compact cell spacing
-                    for para in cell.paragraphs:
-                        para.paragraph_format.space_before = Pt(2)
-                        para.paragraph_format.space_after = Pt(2)
-
-            # Table-level borders
-            tblBorders = OxmlElement('w:tblBorders')
-            for edge in ['top', 'left', 'bottom', 'right', 'insideH', 'insideV']:
-                border = OxmlElement('w:{}'.format(edge))
-                border.set(qn('w:val'), 'single')
-                border.set(qn('w:sz'), '4')
-                border.set(qn('w:space'), '0')
-                border.set(qn('w:color'), '999999')
-                tblBorders.append(border)
-            existing = tblPr.find(qn('w:tblBorders'))
-            if existing is not None:
-                tblPr.remove(existing)
-            tblPr.append(tblBorders)
+            format_table(table)
             formatted += 1
         except Exception as e:
             print("  [WARN] Table format error: {}".format(e))
     return formatted
 
 
+def split_code_paragraph(para, style_name):
+    """
+    Split a Source Code paragraph with more than MAX_CODE_BREAKS w:br line
+    breaks into one paragraph per line. Returns True if it was replaced.
+    """
+    if style_name != 'Source Code':
+        return False
+    if len(para._element.findall('.//' + qn('w:br'))) <= MAX_CODE_BREAKS:
+        return False
+
+    try:
+        parent = para._element.getparent()
+        index = list(parent).index(para._element)
+
+        # Collect all text lines by walking runs
+        lines = []
+        current_line_runs = []
+
+        for child in para._element:
+            if child.tag == qn('w:pPr'):
+                continue
+            if child.tag == qn('w:r'):
+                has_br = child.find(qn('w:br')) is not None
+                if has_br:
+                    # Save current line, start new one
+                    # Get text from this run before the break
+                    for t_elem in child.findall(qn('w:t')):
+                        if t_elem.text:
+                            rPr = child.find(qn('w:rPr'))
+                            current_line_runs.append((t_elem.text, rPr))
+                    lines.append(current_line_runs)
+                    current_line_runs = []
+                else:
+                    for t_elem in child.findall(qn('w:t')):
+                        if t_elem.text:
+                            rPr = child.find(qn('w:rPr'))
+                            current_line_runs.append((t_elem.text, rPr))
+
+        if current_line_runs:
+            lines.append(current_line_runs)
+
+        if len(lines) <= 1:
+            return False
+
+        # Remove the original paragraph
+        parent.remove(para._element)
+
+        # Create new paragraphs for each line
+        for line_idx, line_runs in enumerate(lines):
+            text = ''.join(t for t, rpr in line_runs).strip()
+            if not text and line_idx > 0:
+                continue  # Skip empty lines (but keep first)
+
+            new_p = OxmlElement('w:p')
+            # Copy paragraph properties with style
+            pPr = OxmlElement('w:pPr')
+            pStyle = OxmlElement('w:pStyle')
+            pStyle.set(qn('w:val'), 'SourceCode')
+            pPr.append(pStyle)
+            new_p.append(pPr)
+
+            # Add runs with their formatting
+            for run_text, run_rPr in line_runs:
+                new_r = OxmlElement('w:r')
+                if run_rPr is not None:
+                    new_r.append(copy.deepcopy(run_rPr))
+                new_t = OxmlElement('w:t')
+                new_t.set(qn('xml:space'), 'preserve')
+                new_t.text = run_text
+                new_r.append(new_t)
+                new_p.append(new_r)
+
+            parent.insert(index, new_p)
+            index += 1
+
+        return True
+
+    except Exception:
+        return False  # Skip problematic paragraphs
+
+
 def split_large_code_paragraphs(doc):
     """
     Split large Source Code paragraphs (with many w:br line breaks) into
     separate paragraphs — one per line. This prevents blank pages caused by
     Word refusing to split a single paragraph across pages.
     """
-    MAX_BREAKS = 6  # Split if more than 6 line breaks in one paragraph
-    split_count = 0
+    # Collect paragraphs first (can't modify while iterating)
+    return sum(1 for para in list(doc.paragraphs) if split_code_paragraph(para, get_style_name(para)))
 
-    # Collect paragraphs to split (can't modify while iterating)
-    to_split = []
-    for para in doc.paragraphs:
-        if para.style and para.style.name == 'Source Code':
-            breaks = para._element.findall('.//' + qn('w:br'))
-            if len(breaks) > MAX_BREAKS:
-                to_split.append(para)
 
-    for para in to_split:
-        try:
-            parent = para._element.getparent()
-            index = list(parent).index(para._element)
-            style_name = para.style.name
+def reduce_spacing(para):
+    """Cap a paragraph's own space before/after; True if it was changed."""
+    pf = para.paragraph_format
+    changed = False
+    if pf.space_before and pf.space_before > MAX_SPACE_BEFORE:
+        pf.space_before = MAX_SPACE_BEFORE
+        changed = True
+    if pf.space_after and pf.space_after > MAX_SPACE_AFTER:
+        pf.space_after = MAX_SPACE_AFTER
+        changed = True
+    return changed
+
 
-            # Collect all text lines by walking runs
-            lines = []
-            current_line_runs = []
+def reduce_paragraph_spacing(doc):
+    return sum(1 for para in doc.paragraphs if reduce_spacing(para))
 
-            for child in para._element:
-                if child.tag == qn('w:pPr'):
+
+# ======================================================================
+# SINGLE-PASS POST-PROCESSING
+# ======================================================================
+
+class DocxPostProcessor:
+    """
+    Applies the DOCX fixes in one walk over the direct children of w:body.
+
+    Handlers are registered per kind and run in registration order:
+      - document handlers, handler(doc): once, before the walk (sections, styles)
+      - paragraph handlers, handler(para, position, style_name): each body
+        paragraph; position is its index among the body's paragraphs and
+        style_name is resolved once per paragraph from a per-document map
+      - table handlers, handler(table): each body table
+      - image handlers, handler(inline): each inline image inside a body
+        element that is still in the document after its own handlers
+    A handler returns something truthy when it changed the element; each
+    handler counts those in counts[name]. A paragraph handler that removes
+    or replaces its paragraph returns REMOVED, which also stops later
+    handlers from seeing it.
+    """
+
+    REMOVED = 'removed'
+
+    def __init__(self):
+        self.document_handlers = []
+        self.paragraph_handlers = []
+        self.table_handlers = []
+        self.image_handlers = []
+        self.counts = {}
+
+    def _register(self, handlers, name, handler):
+        handlers.append((name, handler))
+        self.counts[name] = 0
+
+    def on_document(self, name, handler):
+        self._register(self.document_handlers, name, handler)
+
+    def on_paragraph(self, name, handler):
+        self._register(self.paragraph_handlers, name, handler)
+
+    def on_table(self, name, handler):
+        self._register(self.table_handlers, name, handler)
+
+    def on_image(self, name, handler):
+        self._register(self.image_handlers, name, handler)
+
+    def run(self, doc):
+        """Apply every handler to doc; returns the per-handler counts."""
+        counts = self.counts
+        for name in counts:
+            counts[name] = 0
+        for name, handler in self.document_handlers:
+            if handler(doc):
+                counts[name] += 1
+
+        body = doc.element.body
+        p_tag, tbl_tag = qn('w:p'), qn('w:tbl')
+        style_names, default_style = get_paragraph_style_names(doc)
+        position = 0
+        for child in list(body):
+            if child.tag == p_tag:
+                para = Paragraph(child, doc._body)
+                style_name = style_names.get(child.style) or default_style
+                kept = True
+                for name, handler in self.paragraph_handlers:
+                    result = handler(para, position, style_name)
+                    if result:
+                        counts[name] += 1
+                    if result == self.REMOVED:
+                        kept = False
+                        break
+                position += 1
+                if not kept:
                     continue
-                if child.tag == qn('w:r'):
-                    has_br = child.find(qn('w:br')) is not None
-                    if has_br:
-                        # Save current line, start new one
-                        # Get text from this run before the break
-                        for t_elem in child.findall(qn('w:t')):
-                            if t_elem.text:
-                                rPr = child.find(qn('w:rPr'))
-                                current_line_runs.append((t_elem.text, rPr))
-                        lines.append(current_line_runs)
-                        current_line_runs = []
-                    else:
-                        for t_elem in child.findall(qn('w:t')):
-                            if t_elem.text:
-                                rPr = child.find(qn('w:rPr'))
-                                current_line_runs.append((t_elem.text, rPr))
-
-            if current_line_runs:
-                lines.append(current_line_runs)
-
-            if len(lines) <= 1:
-                continue
+            elif child.tag == tbl_tag:
+                table = Table(child, doc._body)
+                for name, handler in self.table_handlers:
+                    if handler(table):
+                        counts[name] += 1
+
+            if self.image_handlers:
+                for inline in child.xpath('descendant-or-self::w:p/w:r/w:drawing/wp:inline'):
+                    for name, handler in self.image_handlers:
+                        if handler(inline):
+                            counts[name] += 1
+        return counts
+
+
+def remove_duplicate_title_handler(para, position, style_name):
+    if position != 0:
+        return False
+    second = next(para._element.itersiblings(qn('w:p')), None)
+    if second is None:
+        return False
+    second = Paragraph(second, para._parent)
+    if is_duplicate_title(para, second, style_name, get_style_name(second)):
+        para._element.getparent().remove(para._element)
+        return DocxPostProcessor.REMOVED
+    return False
+
+
+def remove_unwanted_handler(para, position, style_name):
+    if is_unwanted_paragraph(para):
+        try:
+            para._element.getparent().remove(para._element)
+        except:
+            pass
+        return DocxPostProcessor.REMOVED
+    return False
 
-            # Remove the original paragraph
-            parent.remove(para._element)
-
-            # Create new paragraphs for each line
-            for line_idx, line_runs in enumerate(lines):
-                text = ''.join(t for t, rpr in line_runs).strip()
-                if not text and line_idx > 0:
-                    continue  # Skip empty lines (but keep first)
-
-                new_p = OxmlElement('w:p')
-                # Copy paragraph properties with style
-                pPr = OxmlElement('w:pPr')
-                pStyle = OxmlElement('w:pStyle')
-                pStyle.set(qn('w:val'), 'SourceCode')
-                pPr.append(pStyle)
-                new_p.append(pPr)
-
-                # Add runs with their formatting
-                for run_text, run_rPr in line_runs:
-                    new_r = OxmlElement('w:r')
-                    if run_rPr is not None:
-                        new_r.append(copy.deepcopy(run_rPr))
-                    new_t = OxmlElement('w:t')
-                    new_t.set(qn('xml:space'), 'preserve')
-                    new_t.text = run_text
-                    new_r.append(new_t)
-                    new_p.append(new_r)
-
-                parent.insert(index, new_p)
-                index += 1
-
-            split_count += 1
 
-        except Exception as e:
-            pass  # Skip problematic paragraphs
+def format_table_handler(table):
+    try:
+        format_table(table)
+        return True
+    except Exception as e:
+        print("  [WARN] Table format error: {}".format(e))
+        return False
 
-    return split_count
 
+def build_post_processor():
+    """
+    The standard fixes, in the order the separate passes used to run:
+    margins and styles, then per paragraph duplicate title, matplotlib
+    artifacts, heading anchors, code splitting and spacing, then tables,
+    then images.
+    """
+    processor = DocxPostProcessor()
+    processor.on_document('margins', set_margins)
+    processor.on_document('style spacing', fix_style_spacing)
+    processor.on_document('heading styles', apply_heading_styles)
+    processor.on_paragraph('duplicate title', remove_duplicate_title_handler)
+    processor.on_paragraph('artifacts', remove_unwanted_handler)
+    processor.on_paragraph('heading anchors', lambda para, position, style_name:
+                           clean_heading_anchor(para, style_name))
+    processor.on_paragraph('splits', lambda para, position, style_name:
+                           DocxPostProcessor.REMOVED if split_code_paragraph(para, style_name) else False)
+    processor.on_paragraph('spacing', lambda para, position, style_name: reduce_spacing(para))
+    processor.on_table('tables', format_table_handler)
+    processor.on_image('images', scale_image)
+    return processor
+
+
+# ======================================================================
+# PANDOC BACKEND
+# ======================================================================
+
+class PandocError(Exception):
+    """Pandoc rejected a document."""
+
+
+class PandocServerUnavailable(Exception):
+    """pandoc-server could not be started or stopped answering."""
+
+
+class PandocTimeout(PandocError):
+    """pandoc-server gave up on a document after PANDOC_SERVER_TIMEOUT."""
+
+
+def find_free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def collect_local_resources(html_text, base_dir):
+    """
+    Relative image files referenced by the HTML, as {src: base64 content}.
+
+    pandoc-server runs sandboxed and never reads the disk or the network, so
+    images that are not already embedded as data URIs are sent along with
+    the request. Returns None if an image can't be sent that way (a remote
+    URL, an absolute path or a file that can't be read); such documents
+    need a pandoc subprocess, which fetches them itself.
+    """
+    files = {}
+    for m in re.finditer(r'<img\b[^>]*?\ssrc="([^"]+)"', html_text):
+        src = unescape(m.group(1))
+        if src in files or src.startswith('data:'):
+            continue
+        if re.match(r'^([a-zA-Z][a-zA-Z0-9+.-]*:|/)', src):
+            return None
+        path = urllib.parse.unquote(src)
+        try:
+            with open(Path(base_dir) / path, 'rb') as f:
+                content = base64.b64encode(f.read()).decode('ascii')
+        except OSError:
+            return None
+        # Pandoc looks the image up both as written and percent-decoded
+        files[src] = files[path] = content
+    return files
 
-def reduce_paragraph_spacing(doc):
-    fixed = 0
-    max_before, max_after = Pt(14), Pt(6)
-    for para in doc.paragraphs:
-        pf = para.paragraph_format
-        changed = False
-        if pf.space_before and pf.space_before > max_before:
-            pf.space_before = max_before
-            changed = True
-        if pf.space_after and pf.space_after > max_after:
-            pf.space_after = max_after
-            changed = True
-        if changed:
-            fixed += 1
-    return fixed
+
+class PandocServer:
+    """
+    One long-lived pandoc-server on localhost, shared by every conversion.
+
+    Pandoc's startup and reference-doc loading are paid once instead of per
+    file; documents go over HTTP and the DOCX comes back in memory. Uses
+    the pandoc-server executable if installed, otherwise `pandoc server`
+    (pandoc 3.x).
+    """
+
+    def __init__(self):
+        self.process = None
+        self.url = None
+
+    def start(self):
+        port = find_free_port()
+        # Without --timeout pandoc-server gives up after 2s, too short for
+        # notebooks with many embedded plots
+        options = ['--port', str(port), '--timeout', str(PANDOC_SERVER_TIMEOUT)]
+        if shutil.which('pandoc-server'):
+            command = ['pandoc-server'] + options
+        else:
+            command = ['pandoc', 'server'] + options
+        try:
+            self.process = subprocess.Popen(command, stdin=subprocess.DEVNULL,
+                                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except OSError as e:
+            raise PandocServerUnavailable(str(e))
+        self.url = 'http://127.0.0.1:{}'.format(port)
+
+        deadline = time.monotonic() + PANDOC_SERVER_START_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise PandocServerUnavailable('exited with code {}'.format(self.process.returncode))
+            try:
+                with urllib.request.urlopen(self.url + '/version', timeout=1) as response:
+                    response.read()
+                return
+            except OSError:
+                time.sleep(0.05)
+        self.close()
+        raise PandocServerUnavailable('no answer after {}s'.format(PANDOC_SERVER_START_TIMEOUT))
+
+    def convert(self, html_text, files):
+        """HTML text -> DOCX bytes, with its images as from collect_local_resources."""
+        request = {
+            'text': html_text,
+            'from': 'html',
+            'to': 'docx',
+            'standalone': True,
+            'wrap': 'none',
+            'files': files,
+        }
+        req = urllib.request.Request(self.url, data=json.dumps(request).encode('utf-8'), headers={
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+        })
+        try:
+            # A little longer than the server's own limit, so it reports first
+            with urllib.request.urlopen(req, timeout=PANDOC_SERVER_TIMEOUT + 10) as response:
+                reply = json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            message = e.read().decode('utf-8', 'replace') or str(e)
+            # The timeout middleware answers 503
+            if e.code == 503 or 'timeout' in message.lower():
+                raise PandocTimeout(message)
+            raise PandocError(message)
+        except (OSError, ValueError) as e:
+            raise PandocServerUnavailable(str(e))
+        if reply.get('error'):
+            raise PandocError(reply['error'])
+        return base64.b64decode(reply['output'])
+
+    def close(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process = None
+
+
+# None = not started yet, False = disabled or unavailable (use subprocesses)
+_pandoc_server = None
+
+
+def use_pandoc_server(enabled):
+    """Turn the shared pandoc-server on (started lazily) or off."""
+    global _pandoc_server
+    if not enabled:
+        stop_pandoc_server()
+        _pandoc_server = False
+    elif _pandoc_server is False:
+        _pandoc_server = None
+
+
+def get_pandoc_server():
+    """The running pandoc-server, starting it on first use; None if unavailable."""
+    global _pandoc_server
+    if _pandoc_server is None:
+        server = PandocServer()
+        try:
+            server.start()
+        except PandocServerUnavailable as e:
+            print("    Pandoc: server unavailable ({}), running pandoc per file".format(e))
+            _pandoc_server = False
+            return None
+        atexit.register(server.close)
+        _pandoc_server = server
+        print("    Pandoc: using pandoc-server at {}".format(server.url))
+    return _pandoc_server or None
+
+
+def attach_pandoc_server(url):
+    """Use a pandoc-server started by another process (batch pool workers)."""
+    global _pandoc_server
+    server = PandocServer()
+    server.url = url
+    _pandoc_server = server
+
+
+def stop_pandoc_server():
+    global _pandoc_server
+    if _pandoc_server:
+        _pandoc_server.close()
+    _pandoc_server = None
+
+
+def run_pandoc_subprocess(html_text, resource_dir):
+    """HTML text -> DOCX bytes with a one-off pandoc process (the fallback)."""
+    result = subprocess.run([
+        'pandoc', '--from=html', '--to=docx', '--standalone',
+        '--resource-path={}'.format(str(resource_dir)),
+        '--wrap=none',
+        '-o', '-',
+    ], input=html_text.encode('utf-8'), capture_output=True)
+    if result.returncode != 0:
+        raise PandocError(result.stderr.decode('utf-8', 'replace'))
+    return result.stdout
+
+
+def run_pandoc(html_text, resource_dir):
+    """
+    HTML text -> DOCX bytes, in memory.
+
+    Goes through the shared pandoc-server when available; if it cannot be
+    started, or dies mid-batch, this and later files use one pandoc
+    subprocess each. A file the server times out on is retried with a
+    subprocess, which has no time limit, and so is one whose images the
+    server can't be given (see collect_local_resources).
+    """
+    global _pandoc_server
+    server = get_pandoc_server()
+    files = collect_local_resources(html_text, resource_dir) if server is not None else None
+    if server is not None and files is None:
+        print("    Pandoc: remote, absolute or unreadable image links, running pandoc for this file")
+    elif server is not None:
+        try:
+            return server.convert(html_text, files)
+        except PandocTimeout:
+            print("    Pandoc: server timed out after {}s, running pandoc for this file".format(
+                PANDOC_SERVER_TIMEOUT))
+        except PandocServerUnavailable as e:
+            print("    Pandoc: server stopped answering ({}), running pandoc per file".format(e))
+            server.close()
+            _pandoc_server = False
+    return run_pandoc_subprocess(html_text, resource_dir)
 
 
 # ======================================================================
 # MAIN CONVERSION
 # ======================================================================
 
-def convert_html_to_docx(html_path, output_path):
+def convert_html_to_docx(html_path, output_path, html_text=None, pandoc_job=None):
     """
     Convert HTML -> DOCX via Pandoc, then post-process for formatting + syntax colors.
+
+    If html_text is given it is used instead of reading html_path; html_path
+    then only names the document and sets the folder relative images are
+    resolved from. The DOCX stays in memory until the final save.
+
+    pandoc_job is a Future for (html_text, docx_bytes) already started by
+    run_pandoc_job, so Pandoc can run while the previous file is
+    post-processed (see convert_pipelined).
     """
     html_path = Path(html_path)
     output_path = Path(output_path)
@@ -669,47 +1165,41 @@ def convert_html_to_docx(html_path, output_path):
 
     try:
         # Read original HTML
-        with open(html_path, 'r', encoding='utf-8') as f:
-            html_text = f.read()
+        if html_text is None and pandoc_job is None:
+            with open(html_path, 'r', encoding='utf-8') as f:
+                html_text = f.read()
 
         # Step 1: Pandoc
         print("    [1/4] Converting HTML -> DOCX via Pandoc...")
-        result = subprocess.run([
-            'pandoc', '--from=html', '--to=docx', '--standalone',
-            '--resource-path={}'.format(str(html_path.parent)),
-            '--wrap=none',
-            '-o', str(output_path),
-            str(html_path),
-        ], capture_output=True, text=True)
-        if result.returncode != 0:
-            print("    [ERROR] Pandoc: {}".format(result.stderr))
+        try:
+            if pandoc_job is not None:
+                html_text, docx_bytes = pandoc_job.result()
+            else:
+                docx_bytes = run_pandoc(html_text, html_path.parent)
+        except PandocError as e:
+            print("    [ERROR] Pandoc: {}".format(e))
             return None
 
         # Step 2: Syntax colors
         print("    [2/4] Applying syntax highlighting colors...")
-        doc = Document(str(output_path))
-        colored, styled = apply_syntax_colors(doc, html_text)
-
-        # Step 3: Spacing & layout
-        print("    [3/4] Fixing spacing & layout...")
-        set_margins(doc)
-        fix_style_spacing(doc)
-        apply_heading_styles(doc)
-        dup = remove_duplicate_title(doc)
-        artifacts = remove_unwanted_paragraphs(doc)
-        clean_heading_anchors(doc)
-        splits = split_large_code_paragraphs(doc)
-        spacing_fixed = reduce_paragraph_spacing(doc)
-
-        # Step 4: Tables & images
-        print("    [4/4] Formatting tables & images...")
-        tables = format_tables(doc)
-        images = process_images(doc)
+        doc = Document(BytesIO(docx_bytes))
+        color_start = time.perf_counter()
+        colored, styled, code_blocks = apply_syntax_colors(doc, html_text)
+        color_time = time.perf_counter() - color_start
+
+        # Step 3: Spacing, layout, tables & images
+        print("    [3/4] Fixing spacing, layout, tables & images...")
+        counts = build_post_processor().run(doc)
 
+        # Step 4: Save
+        print("    [4/4] Saving DOCX...")
         doc.save(str(output_path))
 
-        print("      Code colored: {} input + {} output".format(colored, styled))
-        print("      Tables: {} | Images: {} | Artifacts: {} | Splits: {}".format(tables, images, artifacts, splits))
+        coverage = (colored + styled) / code_blocks if code_blocks else 1.0
+        print("      Code colored: {} input + {} output of {} blocks ({:.0%} coverage) in {:.2f}s".format(
+            colored, styled, code_blocks, coverage, color_time))
+        print("      Tables: {} | Images: {} | Artifacts: {} | Splits: {}".format(
+            counts['tables'], counts['images'], counts['artifacts'], counts['splits']))
         print("    > Generated: {}".format(output_path))
         return str(output_path)
 
@@ -720,8 +1210,99 @@ def convert_html_to_docx(html_path, output_path):
         return None
 
 
-def batch_convert(input_dir, output_dir=None):
-    """Batch convert all .html files in a directory to formatted DOCX."""
+def load_notebook_to_html():
+    """Import notebook_to_html from HTML_generator (only needed for .ipynb input)."""
+    module = sys.modules.get('notebook_to_html_R010')
+    if module is None:
+        spec = importlib.util.spec_from_file_location('notebook_to_html_R010', str(NOTEBOOK_TO_HTML))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+def render_notebook(notebook_path):
+    """HTML text for a notebook, rendered in memory by notebook_to_html."""
+    notebook_path = Path(notebook_path)
+    with open(notebook_path, 'rb') as f:
+        notebook = f.read()
+    return load_notebook_to_html().render_notebook_html(notebook, default_title=notebook_path.stem)
+
+
+def convert_notebook_to_docx(notebook_path, output_path):
+    """
+    Convert .ipynb -> DOCX in one process: notebook_to_html renders the HTML
+    in memory and it goes straight to Pandoc, with no .html written or re-read.
+    """
+    return convert_html_to_docx(notebook_path, output_path, html_text=render_notebook(notebook_path))
+
+
+def convert_to_docx(input_path, output_path, pandoc_job=None):
+    """Convert an .html or .ipynb file, picking the converter by extension."""
+    if pandoc_job is None and Path(input_path).suffix.lower() == '.ipynb':
+        return convert_notebook_to_docx(input_path, output_path)
+    return convert_html_to_docx(input_path, output_path, pandoc_job=pandoc_job)
+
+
+def run_pandoc_job(input_path):
+    """Read (or render) an .html/.ipynb file and run Pandoc: (html_text, docx_bytes)."""
+    input_path = Path(input_path)
+    if input_path.suffix.lower() == '.ipynb':
+        html_text = render_notebook(input_path)
+    else:
+        with open(input_path, 'r', encoding='utf-8') as f:
+            html_text = f.read()
+    return html_text, run_pandoc(html_text, input_path.parent)
+
+
+def convert_pipelined(items, capture=False):
+    """
+    Convert [(input_path, output_path), ...] in order, overlapping stages.
+
+    Pandoc for file i+1 runs on a background thread (waiting on the Pandoc
+    process, so without holding the GIL) while file i is post-processed
+    with python-docx. Returns one (result, log, error) per item; with
+    capture=True each file's console output is returned in log instead of
+    printed.
+    """
+    results = []
+    with ThreadPoolExecutor(max_workers=1) as pandoc_pool:
+        next_job = pandoc_pool.submit(run_pandoc_job, items[0][0]) if items else None
+        for i, (input_path, output_path) in enumerate(items):
+            job = next_job
+            if i + 1 < len(items):
+                next_job = pandoc_pool.submit(run_pandoc_job, items[i + 1][0])
+            log = StringIO()
+            try:
+                with redirect_stdout(log) if capture else nullcontext():
+                    result = convert_to_docx(input_path, output_path, pandoc_job=job)
+                results.append((result, log.getvalue(), None))
+            except Exception as e:
+                results.append((None, log.getvalue(), str(e)))
+    return results
+
+
+def _init_batch_worker(pandoc_url):
+    """Pool initializer: share the parent's pandoc-server, or run pandoc per file."""
+    if pandoc_url:
+        attach_pandoc_server(pandoc_url)
+    else:
+        use_pandoc_server(False)
+
+
+def _convert_chunk_worker(items):
+    """Run convert_pipelined on a chunk of the batch in a pool worker."""
+    return convert_pipelined(items, capture=True)
+
+
+def batch_convert(input_dir, output_dir=None, notebooks=False, jobs=1):
+    """
+    Batch convert all .html (or, with notebooks=True, .ipynb) files in a directory to formatted DOCX.
+
+    With jobs > 1 the files are split into contiguous chunks converted by a
+    process pool, each worker pipelining its chunk (see convert_pipelined)
+    against one shared pandoc-server. Output is printed in file order.
+    """
     input_dir = Path(input_dir)
     if output_dir is None:
         output_dir = input_dir
@@ -729,26 +1310,47 @@ def batch_convert(input_dir, output_dir=None):
         output_dir = Path(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
 
-    html_files = sorted(input_dir.glob("*.html"))
-    if not html_files:
-        print("No .html files found in {}".format(input_dir))
+    suffix = ".ipynb" if notebooks else ".html"
+    input_files = sorted(input_dir.glob("*" + suffix))
+    if not input_files:
+        print("No {} files found in {}".format(suffix, input_dir))
         return []
 
-    print("Found {} HTML file(s) to convert...".format(len(html_files)))
+    print("Found {} {} file(s) to convert...".format(len(input_files), "notebook" if notebooks else "HTML"))
     print("-" * 60)
 
+    items = [(input_path, output_dir / "{}.docx".format(input_path.stem)) for input_path in input_files]
+    server = get_pandoc_server()
+    jobs = max(1, min(jobs or 1, len(items)))
+
     converted = []
-    for html_path in html_files:
-        output_path = output_dir / "{}.docx".format(html_path.stem)
-        try:
-            result = convert_html_to_docx(html_path, output_path)
-            if result:
-                converted.append(result)
-        except Exception as e:
-            print("    x Failed: {}: {}".format(html_path.name, e))
+    def report(item, result, log, error):
+        sys.stdout.write(log)
+        if error:
+            print("    x Failed: {}: {}".format(item[0].name, error))
+        elif result:
+            converted.append(result)
+
+    if jobs == 1:
+        for item, (result, log, error) in zip(items, convert_pipelined(items)):
+            report(item, result, log, error)
+    else:
+        # Two chunks per worker keeps them busy when files differ in size
+        chunk_size = max(1, -(-len(items) // (jobs * 2)))
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_batch_worker,
+                                 initargs=(server.url if server else None,)) as pool:
+            futures = [pool.submit(_convert_chunk_worker, chunk) for chunk in chunks]
+            for chunk, future in zip(chunks, futures):
+                try:
+                    chunk_results = future.result()
+                except Exception as e:
+                    chunk_results = [(None, '', str(e))] * len(chunk)
+                for item, (result, log, error) in zip(chunk, chunk_results):
+                    report(item, result, log, error)
 
     print("-" * 60)
-    print("Converted {} of {} file(s)".format(len(converted), len(html_files)))
+    print("Converted {} of {} file(s)".format(len(converted), len(input_files)))
     return converted
 
 
@@ -772,15 +1374,27 @@ Examples:
     # Batch conversion (all .html files in a directory)
     python html_to_word.py --batch /path/to/html/
     python html_to_word.py --batch /path/to/html/ -o /path/to/output/
+    python html_to_word.py --batch /path/to/html/ --jobs 4
+
+    # Notebooks, rendered to HTML in memory (no intermediate .html files)
+    python html_to_word.py notebook.ipynb
+    python html_to_word.py --batch /path/to/notebooks/ --notebooks
         """
     )
 
-    parser.add_argument('input', nargs='?', help='Input .html file (or directory with --batch)')
+    parser.add_argument('input', nargs='?', help='Input .html or .ipynb file (or directory with --batch)')
     parser.add_argument('-o', '--output', help='Output .docx file or directory (for --batch)')
     parser.add_argument('--batch', action='store_true',
                         help='Batch convert all .html files in the input directory')
+    parser.add_argument('--notebooks', action='store_true',
+                        help='With --batch, convert the .ipynb files instead (rendered in memory via notebook_to_html)')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='Worker processes for batch conversion (default: 1)')
+    parser.add_argument('--no-pandoc-server', action='store_true',
+                        help='Run one pandoc process per file instead of a shared pandoc-server')
 
     args = parser.parse_args()
+    use_pandoc_server(not args.no_pandoc_server)
 
     print("=" * 60)
     print("    HTML -> Formatted Word Converter")
@@ -797,10 +1411,10 @@ Examples:
         print("  {}".format(script_dir))
 
         output_dir = args.output if args.output else str(script_dir / "Word_Outputs")
-        batch_convert(input_dir=str(script_dir), output_dir=output_dir)
+        batch_convert(input_dir=str(script_dir), output_dir=output_dir, jobs=args.jobs)
 
     elif args.batch:
-        batch_convert(input_dir=args.input, output_dir=args.output)
+        batch_convert(input_dir=args.input, output_dir=args.output, notebooks=args.notebooks, jobs=args.jobs)
 
     else:
         input_path = Path(args.input)
@@ -808,8 +1422,9 @@ Examples:
             print("\n  x File not found: {}".format(input_path))
             return
         output_path = Path(args.output) if args.output else input_path.with_suffix('.docx')
-        convert_html_to_docx(input_path, output_path)
+        convert_to_docx(input_path, output_path)
 
+    stop_pandoc_server()
     print("\n" + "=" * 60)
     print("  Done!")
     print("=" * 60)